@@ -0,0 +1,103 @@
+# benchmarks/bench_codificacao.py
+"""
+Compara o treino do XGBoost com a preparação original (pd.get_dummies denso) e com o
+CodificadorOneHot esparso de 'func/codificacao.py': tempo de preparação, tempo de treino e
+pico de memória acima da base (cada variante roda em um processo novo).
+A coluna sintética 'Merchant_ID' simula um campo categórico de alta cardinalidade.
+
+Uso (a partir da raiz do projeto):
+    python benchmarks/bench_codificacao.py --linhas 100000 --cardinalidade 0 2000
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import resource
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, 'benchmarks'))
+from gerador import gerar_transacoes  # noqa: E402
+from func.modelo import COLUNAS_IGNORADAS, HIPERPARAMETROS_PADRAO, preparar_dados_para_modelo  # noqa: E402
+
+
+def _rss_atual_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+
+def _preparar_referencia(df):
+    """Preparação original: get_dummies em todas as colunas não-ID."""
+    df_processado = pd.get_dummies(df.drop(columns=COLUNAS_IGNORADAS, errors='ignore'))
+    return df_processado.drop(columns='Fraud_Label'), df_processado['Fraud_Label']
+
+
+def _preparar_esparso(df):
+    X, y, _ = preparar_dados_para_modelo(df)
+    return X, y
+
+
+def _executar(variante, linhas, cardinalidade, fila):
+    from xgboost import XGBClassifier
+
+    df = gerar_transacoes(linhas)
+    if cardinalidade:
+        rng = np.random.default_rng(3)
+        # Cauda longa: poucos estabelecimentos concentram a maior parte das transações
+        df['Merchant_ID'] = pd.Series(rng.zipf(1.3, linhas) % cardinalidade).map('M_{}'.format)
+    base = _rss_atual_mb()
+
+    inicio = time.perf_counter()
+    X, y = (_preparar_referencia if variante == 'get_dummies' else _preparar_esparso)(df)
+    t_preparo = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    XGBClassifier(**HIPERPARAMETROS_PADRAO).fit(X, y)
+    t_treino = time.perf_counter() - inicio
+
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    fila.put((X.shape[1], t_preparo, t_treino, pico - base))
+
+
+def medir(variante, linhas, cardinalidade):
+    """Roda a variante em um processo novo. Retorna None se ele morrer (ex.: falta de memória)."""
+    contexto = multiprocessing.get_context('spawn')
+    fila = contexto.Queue()
+    processo = contexto.Process(target=_executar, args=(variante, linhas, cardinalidade, fila))
+    processo.start()
+    while True:
+        try:
+            resultado = fila.get(timeout=1)
+            break
+        except queue.Empty:
+            if not processo.is_alive():
+                resultado = None
+                break
+    processo.join()
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=100_000)
+    parser.add_argument("--cardinalidade", type=int, nargs="+", default=[0, 2000],
+                        help="Valores distintos de Merchant_ID (0 = sem a coluna).")
+    args = parser.parse_args()
+
+    print(f"{'cardinalidade':>13} | {'variante':>11} | {'colunas':>7} | {'preparo':>8} | {'treino':>8} | {'pico de memória':>15}")
+    for cardinalidade in args.cardinalidade:
+        for variante in ('get_dummies', 'esparso'):
+            resultado = medir(variante, args.linhas, cardinalidade)
+            if resultado is None:
+                print(f"{cardinalidade:>13,} | {variante:>11} | processo encerrado antes do fim (memória insuficiente?)")
+                continue
+            colunas, t_preparo, t_treino, memoria = resultado
+            print(f"{cardinalidade:>13,} | {variante:>11} | {colunas:>7,} | {t_preparo:>7.2f}s | {t_treino:>7.2f}s | {memoria:>12,.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/bench_kpis.py
+"""
+Compara o cálculo original dos KPIs (máscaras booleanas + nunique) com o motor de
+passada única de 'func/kpis.py'.
+
+Uso (a partir da raiz do projeto):
+    python benchmarks/bench_kpis.py --linhas 1000000 10000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from func.functions import calcular_kpis_gerais  # noqa: E402
+
+
+def kpis_referencia(df):
+    """Implementação original de 'calcular_kpis_gerais', mantida como referência."""
+    num_transacoes = df['Transaction_ID'].nunique()
+    valor_total = df['Transaction_Amount'].sum()
+    df_fraude = df[df['Fraud_Label'] == 1]
+    df_legitima = df[df['Fraud_Label'] == 0]
+    num_fraudes = len(df_fraude)
+    return {
+        'valor_total': valor_total,
+        'num_transacoes': num_transacoes,
+        'ticket_medio': df['Transaction_Amount'].mean(),
+        'num_fraudes': num_fraudes,
+        'valor_fraudes': df_fraude['Transaction_Amount'].sum(),
+        'taxa_fraude_vol': (num_fraudes / num_transacoes) * 100 if num_transacoes > 0 else 0,
+        'risco_medio_fraudes': df_fraude['Risk_Score'].mean() if num_fraudes > 0 else 0,
+        'risco_medio_legitimas': df_legitima['Risk_Score'].mean() if not df_legitima.empty else 0
+    }
+
+
+def gerar_transacoes(linhas, semente=42):
+    """DataFrame sintético com as colunas usadas pelos KPIs (tipos iguais aos do dashboard)."""
+    rng = np.random.default_rng(semente)
+    fraude = (rng.random(linhas) < 0.05).astype(np.int8)
+    return pd.DataFrame({
+        'Transaction_ID': pd.Series(np.arange(linhas)).map('TXN_{}'.format),
+        'Transaction_Amount': rng.exponential(100, linhas).round(2),
+        'Risk_Score': rng.random(linhas).astype(np.float32),
+        'Fraud_Label': fraude,
+    })
+
+
+def medir(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'linhas':>12} | {'referência':>11} | {'motor':>11} | {'motor (IDs únicos)':>18} | speedup")
+    for linhas in args.linhas:
+        df = gerar_transacoes(linhas)
+        t_ref, esperado = medir(lambda: kpis_referencia(df), args.repeticoes)
+        t_motor, obtido = medir(lambda: calcular_kpis_gerais(df, ids_unicos=False), args.repeticoes)
+        t_unicos, obtido_unicos = medir(lambda: calcular_kpis_gerais(df, ids_unicos=True), args.repeticoes)
+
+        for chave, valor in esperado.items():
+            assert np.isclose(valor, obtido[chave]) and np.isclose(valor, obtido_unicos[chave]), chave
+
+        print(f"{linhas:>12,} | {t_ref:>10.3f}s | {t_motor:>10.3f}s | {t_unicos:>17.3f}s | {t_ref / t_unicos:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
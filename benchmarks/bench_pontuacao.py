@@ -0,0 +1,113 @@
+# benchmarks/bench_pontuacao.py
+"""
+Mede a pontuação com o modelo salvo ('func/pontuacao.py'): vazão em lote (DataFrame e lista
+de dicionários), latência de uma transação isolada pelo micro-lote e pela API HTTP, e confere
+que as probabilidades batem com predict_proba sobre a matriz de treino.
+O modelo é treinado como o do dashboard, com as colunas da tabela analítica (derivadas do ETL e
+features por usuário); a pontuação recebe os registros crus mais as features por usuário.
+
+Uso (a partir da raiz do projeto):
+    python benchmarks/bench_pontuacao.py --linhas-treino 100000 --linhas 1000000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import etl  # noqa: E402
+from func.features import calcular_features_usuario, colunas_features  # noqa: E402
+from func.modelo import RegistroModelos, preparar_dados_para_modelo  # noqa: E402
+from func.pontuacao import LoteadorPontuacao, Pontuador  # noqa: E402
+from gerador import gerar_transacoes  # noqa: E402
+from servidor_pontuacao import criar_handler  # noqa: E402
+
+
+def enriquecer(df):
+    """Mesmas colunas da tabela analítica: as derivadas por 'etl.transformar_dados' e as features por usuário."""
+    df = etl.transformar_dados(df.copy(), verbose=False)
+    features = calcular_features_usuario(df['User_ID'], df['Timestamp'], df['Transaction_Amount'])
+    return pd.concat([df, features.set_axis(df.index)], axis=1)
+
+
+def registros_para_pontuar(cru, enriquecido):
+    """Registros crus (sem o rótulo) mais as features por usuário, como um cliente da API os envia."""
+    registros = cru.drop(columns='Fraud_Label').astype({'Timestamp': str})
+    return pd.concat([registros, enriquecido[colunas_features()]], axis=1)
+
+
+def percentis_ms(latencias):
+    serie = pd.Series(latencias) * 1000
+    return f"p50={serie.quantile(0.5):.3f}ms p99={serie.quantile(0.99):.3f}ms"
+
+
+def medir_vazao(funcao, linhas):
+    inicio = time.perf_counter()
+    funcao()
+    segundos = time.perf_counter() - inicio
+    return f"{linhas / segundos:>12,.0f} linhas/s ({segundos:.3f}s)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas-treino", type=int, default=100_000)
+    parser.add_argument("--linhas", type=int, default=1_000_000, help="Linhas pontuadas no teste de vazão.")
+    parser.add_argument("--pedidos", type=int, default=2000, help="Pedidos unitários no teste de latência.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        treino = enriquecer(gerar_transacoes(args.linhas_treino))
+        registro = RegistroModelos(diretorio)
+        registro.treinar(treino)
+        pontuador = Pontuador.carregar(diretorio)
+        print(f"Modelo {pontuador.impressao}: {len(pontuador.colunas)} features")
+
+        # Conferência: mesmas probabilidades do modelo com a matriz montada como no treino
+        cru = gerar_transacoes(10_000, semente=7)
+        amostra = enriquecer(cru)
+        X, _, _ = preparar_dados_para_modelo(amostra, pontuador.codificador)
+        esperado = registro.carregar_modelo(pontuador.impressao).predict_proba(X)[:, 1]
+        pedidos = registros_para_pontuar(cru, amostra)
+        assert np.allclose(pontuador.pontuar(pedidos), esperado, atol=1e-6)
+        registros = pedidos.to_dict('records')
+        assert np.allclose(pontuador.pontuar(registros), esperado, atol=1e-6)
+
+        cru = gerar_transacoes(args.linhas, semente=1)
+        df = registros_para_pontuar(cru, enriquecer(cru))
+        lista = df.head(100_000).to_dict('records')
+        print(f"Lote (DataFrame):        {medir_vazao(lambda: pontuador.pontuar(df), len(df))}")
+        print(f"Lote (dicionários):      {medir_vazao(lambda: pontuador.pontuar(lista), len(lista))}")
+
+        loteador = LoteadorPontuacao(pontuador)
+        latencias = []
+        for registro_unico in registros[:args.pedidos]:
+            inicio = time.perf_counter()
+            loteador.pontuar([registro_unico])
+            latencias.append(time.perf_counter() - inicio)
+        print(f"Unitário (micro-lote):   {percentis_ms(latencias)}")
+
+        servidor = ThreadingHTTPServer(("127.0.0.1", 0), criar_handler(loteador, 0.5))
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{servidor.server_port}/pontuar"
+        latencias = []
+        for registro_unico in registros[:args.pedidos]:
+            corpo = json.dumps(registro_unico, default=str).encode()
+            inicio = time.perf_counter()
+            with urllib.request.urlopen(urllib.request.Request(url, data=corpo)) as resposta:
+                resposta.read()
+            latencias.append(time.perf_counter() - inicio)
+        print(f"Unitário (HTTP):         {percentis_ms(latencias)}")
+        servidor.shutdown()
+        loteador.fechar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+# benchmarks/executar.py
+"""
+Suíte de benchmarks do pipeline completo sobre dados sintéticos ('benchmarks/gerador.py'):
+geração, cada etapa do ETL, exportação Parquet, carregamento do dashboard, KPIs, mapa
+agregado, outliers e treino do modelo. Cada caso roda em um processo novo, dentro de um
+diretório de trabalho por escala, e registra tempo e pico de memória (RSS).
+
+Os resultados vão para o histórico 'benchmarks/historico.json' e são comparados com a
+execução marcada como baseline: variações acima da tolerância são reportadas como regressão
+(código de saída 1).
+
+Uso (a partir da raiz do projeto):
+    python benchmarks/executar.py --linhas 1000000 10000000 --marcar-baseline
+    python benchmarks/executar.py --linhas 1000000 10000000
+    python benchmarks/executar.py --casos kpis mapa outliers --diretorio /tmp/bench --manter
+    python benchmarks/executar.py --comparar
+"""
+import argparse
+import contextlib
+import inspect
+import io
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import resource
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, 'benchmarks'))
+
+# --- CONFIGURAÇÕES ---
+ARQUIVO_HISTORICO = os.path.join(RAIZ, 'benchmarks', 'historico.json')
+ARQUIVO_BANCO = 'creditdata.db'  # Relativo ao diretório de trabalho, como o DB_URL do projeto
+NOME_TABELA_ANALITICA = 'analytics_dashboard'
+TOLERANCIA_PADRAO = 0.10          # Variação máxima (10%) antes de acusar regressão
+MINIMO_SEGUNDOS_COMPARACAO = 0.05 # Tempos menores que isso são ruído e não entram na comparação
+COLUNA_OUTLIERS = 'Transaction_Amount'
+TAMANHO_LOTE_ETL = 100_000
+
+
+def _rss_atual_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+
+# --- CASOS ---
+# Cada caso prepara o que não deve entrar na medição (imports, leitura dos dados) e devolve a
+# função medida. Só o ETL devolve algo: um dicionário {etapa: segundos} com os tempos parciais.
+
+def _caso_gerar(linhas):
+    from gerador import gravar_sqlite
+
+    def executar():
+        if os.path.exists(ARQUIVO_BANCO):
+            os.remove(ARQUIVO_BANCO)
+        gravar_sqlite(ARQUIVO_BANCO, linhas)
+    return executar
+
+
+def _caso_etl(linhas):
+    """Carga completa em lotes, com o tempo de cada etapa (como 'etl.py --full-refresh --chunksize')."""
+    import etl
+
+    engine = etl.criar_engine(etl.DB_URL)
+
+    def executar():
+        estatisticas = {}
+        rowid_final = etl.obter_ultimo_rowid_origem(engine)
+        with engine.begin() as conn:
+            lotes = etl.extrair_dados_em_lotes(conn, 0, rowid_final, TAMANHO_LOTE_ETL, estatisticas)
+            lotes = etl.transformar_dados_em_lotes(lotes, estatisticas)
+            etl.carregar_dados_em_lotes(lotes, conn, False, rowid_final, estatisticas)
+        inicio = time.perf_counter()
+        etl.publicar_versao(engine, dados_alterados=True)
+        etapas = {etapa: segundos for etapa, (_, segundos) in estatisticas.items()}
+        etapas['Publicação'] = time.perf_counter() - inicio
+        return etapas
+    return executar
+
+
+def _caso_parquet(linhas):
+    import etl
+
+    engine = etl.criar_engine(etl.DB_URL)
+
+    def executar():
+        # Como no ETL: a marca de versão do Parquet é o que faz o dashboard lê-lo
+        if etl.exportar_parquet(engine, etl.DIRETORIO_PARQUET):
+            etl.publicar_versao(engine, parquet_atualizado=True)
+    return executar
+
+
+def _caso_carregar_dados(linhas):
+    """Leitura fria do conjunto do dashboard (do Parquet, se o caso 'parquet' já rodou)."""
+    from func import functions
+
+    def executar():
+        functions.carregar_dados()
+    return executar
+
+
+def _com_dados(funcao):
+    """Casos que operam sobre o DataFrame do dashboard já carregado (a leitura não é medida)."""
+    def preparar(linhas):
+        from func import functions
+        df = functions.carregar_dados()
+
+        def executar():
+            funcao(functions, df)
+        return executar
+    return preparar
+
+
+def _caso_treino(linhas):
+    from func import functions
+    from func.modelo import treinar_modelo_xgboost_e_obter_importancias
+
+    df = functions.carregar_dados()
+
+    def executar():
+        treinar_modelo_xgboost_e_obter_importancias(df)
+    return executar
+
+
+def _caso_usuarios(exato):
+    """Usuários distintos do período inteiro: união dos sketches do ETL ou COUNT(DISTINCT) (sem o cache do Streamlit)."""
+    def preparar(linhas):
+        from func import functions
+
+        def executar():
+            inspect.unwrap(functions.contar_usuarios)(exato=exato)
+        return executar
+    return preparar
+
+
+# nome -> (preparação, pode repetir). Na ordem de execução: cada caso depende dos anteriores.
+CASOS = {
+    'gerar': (_caso_gerar, False),
+    'etl': (_caso_etl, False),
+    'parquet': (_caso_parquet, False),
+    'carregar_dados': (_caso_carregar_dados, False),
+    'kpis': (_com_dados(lambda functions, df: functions.calcular_kpis_gerais(df)), True),
+    'mapa': (_com_dados(lambda functions, df: functions.criar_mapa_agregado_por_localizacao(df)), True),
+    'outliers': (_com_dados(lambda functions, df: functions.identificar_outliers(df, COLUNA_OUTLIERS)), True),
+    'usuarios_sketch': (_caso_usuarios(False), True),
+    'usuarios_exato': (_caso_usuarios(True), True),
+    'treino': (_caso_treino, False),
+}
+
+
+def _executar_caso(caso, diretorio, linhas, repeticoes, fila):
+    os.chdir(diretorio)
+    try:
+        # A saída do ETL e os avisos do Streamlit fora do 'streamlit run' não interessam aqui
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            preparar, repetivel = CASOS[caso]
+            funcao = preparar(linhas)
+            base = _rss_atual_mb()
+            tempos = []
+            for _ in range(repeticoes if repetivel else 1):
+                inicio = time.perf_counter()
+                etapas = funcao()
+                tempos.append(time.perf_counter() - inicio)
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        fila.put({
+            'segundos': min(tempos),
+            'pico_mb': round(pico, 1),
+            'base_mb': round(base, 1),
+            'etapas': {etapa: round(s, 4) for etapa, s in (etapas or {}).items()},
+        })
+    except Exception as e:
+        fila.put({'erro': f"{type(e).__name__}: {e}"})
+
+
+def medir_caso(caso, diretorio, linhas, repeticoes=1):
+    """Roda o caso em um processo novo. Se ele morrer (ex.: falta de memória), o erro é registrado."""
+    contexto = multiprocessing.get_context('spawn')
+    fila = contexto.Queue()
+    processo = contexto.Process(target=_executar_caso, args=(caso, diretorio, linhas, repeticoes, fila))
+    processo.start()
+    while True:
+        try:
+            resultado = fila.get(timeout=1)
+            break
+        except queue.Empty:
+            if not processo.is_alive():
+                resultado = {'erro': f"processo encerrado com código {processo.exitcode} (memória insuficiente?)"}
+                break
+    processo.join()
+    return resultado
+
+
+def _preparado(caso, diretorio):
+    """Se o resultado do caso de preparação ('gerar' ou 'etl') já existe no diretório."""
+    caminho = os.path.join(diretorio, ARQUIVO_BANCO)
+    if not os.path.exists(caminho):
+        return False
+    if caso == 'gerar':
+        return True
+    with contextlib.closing(sqlite3.connect(caminho)) as conn:
+        return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (NOME_TABELA_ANALITICA,)).fetchone() is not None
+
+
+def executar_escala(diretorio, linhas, selecionados, repeticoes):
+    """
+    Roda os casos selecionados para uma escala. 'gerar' e 'etl' também rodam (sem registro)
+    quando um caso selecionado depende deles e o diretório ainda não tem o resultado.
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    precisa_etl = any(caso in selecionados for caso in list(CASOS)[2:])
+    precisa_gerar = precisa_etl or 'etl' in selecionados
+    resultados = []
+    for caso in CASOS:
+        registrar = caso in selecionados
+        if not registrar:
+            necessario = (caso == 'gerar' and precisa_gerar) or (caso == 'etl' and precisa_etl)
+            if not necessario or _preparado(caso, diretorio):
+                continue
+        resultado = medir_caso(caso, diretorio, linhas, repeticoes)
+        if not registrar:
+            print(f"{linhas:>12,} | {caso:<26} | (preparação) {resultado.get('erro', '')}")
+            if 'erro' in resultado:
+                break
+            continue
+        resultado = {'caso': caso, 'linhas': linhas, **resultado}
+        resultados.append(resultado)
+        imprimir_resultado(resultado)
+        if 'erro' in resultado and caso in ('gerar', 'etl'):
+            break  # Os próximos casos dependem deste
+    return resultados
+
+
+def imprimir_resultado(resultado):
+    prefixo = f"{resultado['linhas']:>12,} | {resultado['caso']:<26} |"
+    if 'erro' in resultado:
+        print(f"{prefixo} ERRO: {resultado['erro']}")
+        return
+    vazao = resultado['linhas'] / resultado['segundos'] if resultado['segundos'] > 0 else float('inf')
+    print(f"{prefixo} {resultado['segundos']:>9.3f}s | {vazao:>13,.0f} linhas/s | "
+          f"pico {resultado['pico_mb']:>8,.0f} MB (base {resultado['base_mb']:,.0f} MB)")
+    for etapa, segundos in resultado['etapas'].items():
+        print(f"{'':>12} | {'  ' + etapa:<26} | {segundos:>9.3f}s")
+
+
+# --- HISTÓRICO E COMPARAÇÃO ---
+
+def ler_historico(caminho=ARQUIVO_HISTORICO):
+    if not os.path.exists(caminho):
+        return {'baseline': None, 'execucoes': []}
+    with open(caminho, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def gravar_historico(historico, caminho=ARQUIVO_HISTORICO):
+    temporario = f"{caminho}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(historico, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, caminho)
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def descrever_plataforma():
+    return {
+        'python': platform.python_version(),
+        'sistema': platform.platform(),
+        'cpus': os.cpu_count(),
+        'memoria_gb': round(os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') / 2**30, 1),
+    }
+
+
+def _buscar_execucao(historico, id_execucao):
+    for execucao in historico['execucoes']:
+        if execucao['id'] == id_execucao:
+            return execucao
+    raise SystemExit(f"Execução '{id_execucao}' não encontrada em '{ARQUIVO_HISTORICO}'.")
+
+
+def comparar(atual, baseline, tolerancia=TOLERANCIA_PADRAO):
+    """
+    Compara tempo e pico de memória de cada (caso, linhas) presente nas duas execuções.
+    Retorna a lista de regressões (descrições) acima da tolerância.
+    """
+    referencia = {(r['caso'], r['linhas']): r for r in baseline['resultados'] if 'erro' not in r}
+    regressoes = []
+    print(f"\nComparação de '{atual['id']}' com a baseline '{baseline['id']}' (tolerância {tolerancia:.0%}):")
+    print(f"{'linhas':>12} | {'caso':<26} | {'tempo':>17} | {'pico de memória':>17}")
+    for resultado in atual['resultados']:
+        chave = (resultado['caso'], resultado['linhas'])
+        if chave not in referencia:
+            continue
+        prefixo = f"{resultado['linhas']:>12,} | {resultado['caso']:<26} |"
+        if 'erro' in resultado:
+            print(f"{prefixo} ERRO (na baseline rodou)")
+            regressoes.append(f"{resultado['caso']} @ {resultado['linhas']:,}: falhou")
+            continue
+        base = referencia[chave]
+        razao_tempo = resultado['segundos'] / base['segundos'] if base['segundos'] > 0 else 1.0
+        razao_pico = resultado['pico_mb'] / base['pico_mb'] if base['pico_mb'] > 0 else 1.0
+        marcas = []
+        if razao_tempo > 1 + tolerancia and max(resultado['segundos'], base['segundos']) >= MINIMO_SEGUNDOS_COMPARACAO:
+            marcas.append('tempo')
+        if razao_pico > 1 + tolerancia:
+            marcas.append('memória')
+        for marca in marcas:
+            regressoes.append(f"{resultado['caso']} @ {resultado['linhas']:,}: {marca}")
+        print(f"{prefixo} {razao_tempo:>8.2f}x ({resultado['segundos']:.2f}s) | "
+              f"{razao_pico:>8.2f}x ({resultado['pico_mb']:,.0f} MB)" + (f"  <-- REGRESSÃO ({', '.join(marcas)})" if marcas else ""))
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, nargs="+", default=[1_000_000], help="Escalas (nº de transações).")
+    parser.add_argument("--casos", nargs="+", choices=list(CASOS), default=list(CASOS))
+    parser.add_argument("--repeticoes", type=int, default=3, help="Repetições dos casos em memória (vale o menor tempo).")
+    parser.add_argument("--diretorio", default=None,
+                        help="Diretório de trabalho (um subdiretório por escala). Padrão: temporário, removido ao final.")
+    parser.add_argument("--manter", action="store_true", help="Não remove o diretório de trabalho temporário.")
+    parser.add_argument("--marcar-baseline", nargs="?", const="", default=None, metavar="ID",
+                        help="Marca esta execução (ou a execução ID do histórico, sem rodar nada) como baseline.")
+    parser.add_argument("--comparar", nargs="?", const="", default=None, metavar="ID",
+                        help="Só compara a execução ID (padrão: a última) com a baseline, sem rodar nada.")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO)
+    args = parser.parse_args()
+
+    historico = ler_historico()
+    if args.marcar_baseline:
+        historico['baseline'] = _buscar_execucao(historico, args.marcar_baseline)['id']
+        gravar_historico(historico)
+        print(f"Baseline: {historico['baseline']}")
+        return
+    if args.comparar is not None:
+        if not historico['execucoes']:
+            raise SystemExit("O histórico está vazio.")
+        if historico['baseline'] is None:
+            raise SystemExit("Nenhuma baseline marcada (use --marcar-baseline).")
+        atual = _buscar_execucao(historico, args.comparar) if args.comparar else historico['execucoes'][-1]
+        regressoes = comparar(atual, _buscar_execucao(historico, historico['baseline']), args.tolerancia)
+        sys.exit(1 if regressoes else 0)
+
+    raiz_trabalho = args.diretorio or tempfile.mkdtemp(prefix='bench_credit_')
+    execucao = {
+        'id': datetime.now().strftime('%Y%m%d-%H%M%S'),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'commit': _commit_atual(),
+        'plataforma': descrever_plataforma(),
+        'resultados': [],
+    }
+    print(f"Execução {execucao['id']} (commit {execucao['commit']}) em '{raiz_trabalho}'")
+    print(f"{'linhas':>12} | {'caso':<26} | {'tempo':>10} | {'vazão':>19} | pico de memória")
+    try:
+        for linhas in args.linhas:
+            diretorio = os.path.join(raiz_trabalho, f"linhas_{linhas}")
+            execucao['resultados'] += executar_escala(diretorio, linhas, args.casos, args.repeticoes)
+    finally:
+        if args.diretorio is None and not args.manter:
+            shutil.rmtree(raiz_trabalho, ignore_errors=True)
+
+    historico['execucoes'].append(execucao)
+    if args.marcar_baseline is not None:
+        historico['baseline'] = execucao['id']
+    gravar_historico(historico)
+    print(f"\nResultados gravados em '{ARQUIVO_HISTORICO}'.")
+
+    if args.marcar_baseline is not None:
+        print(f"Baseline: {execucao['id']}")
+    elif historico['baseline'] is not None:
+        regressoes = comparar(execucao, _buscar_execucao(historico, historico['baseline']), args.tolerancia)
+        if regressoes:
+            print("\nRegressões: " + "; ".join(regressoes))
+            sys.exit(1)
+    falhas = [r for r in execucao['resultados'] if 'erro' in r]
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# benchmarks/gerador.py
+"""
+Gerador de transações sintéticas com o esquema da tabela TransacoesCompletas.
+Os dados são gerados em lotes a partir de uma semente, então qualquer escala (1M a 100M de
+linhas) pode ser gravada no SQLite com memória limitada ao tamanho do lote.
+
+Uso (a partir da raiz do projeto):
+    python benchmarks/gerador.py creditdata.db --linhas 10000000
+"""
+import argparse
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+# --- CONFIGURAÇÕES ---
+NOME_TABELA_ORIGEM = "TransacoesCompletas"
+TAMANHO_LOTE_GERACAO = 1_000_000
+INICIO_PERIODO = pd.Timestamp('2023-01-01')
+DIAS_PERIODO = 365
+TIPOS_TRANSACAO = ['POS', 'Online', 'ATM Withdrawal', 'Bank Transfer']
+DISPOSITIVOS = ['Mobile', 'Laptop', 'Tablet']
+CARTOES = ['Visa', 'Mastercard', 'Amex', 'Discover']
+LOCAIS = {
+    'New York': (40.7, -74.0), 'London': (51.5, -0.1), 'Tokyo': (35.7, 139.7),
+    'Sydney': (-33.9, 151.2), 'Mumbai': (19.1, 72.9),
+}
+COLUNAS = ['Transaction_ID', 'User_ID', 'Transaction_Amount', 'Transaction_Type', 'Timestamp', 'Device_Type',
+           'Location', 'Latitude', 'Longitude', 'Failed_Transaction_Count_7d', 'Card_Type', 'Risk_Score', 'Fraud_Label']
+
+
+def num_usuarios_padrao(linhas):
+    """~20 transações por usuário, com no mínimo 1.000 usuários."""
+    return max(1000, linhas // 20)
+
+
+def gerar_lote(inicio, linhas, num_usuarios, semente=42, timestamp_texto=False):
+    """
+    Gera as linhas [inicio, inicio + linhas) da sequência sintética. O lote depende só de
+    'inicio' e da semente, então a mesma escala sempre gera os mesmos dados.
+    A fraude segue o padrão de 'card testing' do dashboard: mais provável com muitas
+    falhas nos últimos 7 dias, e com Risk_Score mais alto.
+    """
+    rng = np.random.default_rng([semente, inicio])
+    falhas = rng.poisson(1.0, linhas)
+    fraude = ((falhas >= 4) & (rng.random(linhas) < 0.6)) | (rng.random(linhas) < 0.03)
+    locais = np.array(list(LOCAIS))
+    indice_local = rng.integers(0, len(locais), linhas)
+    coordenadas = np.array(list(LOCAIS.values()))
+    timestamps = INICIO_PERIODO + pd.to_timedelta(rng.integers(0, DIAS_PERIODO * 86400, linhas), unit='s')
+    return pd.DataFrame({
+        'Transaction_ID': pd.Series(np.arange(inicio, inicio + linhas)).map('TXN_{}'.format),
+        'User_ID': pd.Series(rng.integers(0, num_usuarios, linhas)).map('USER_{}'.format),
+        'Transaction_Amount': rng.exponential(100, linhas).round(2),
+        'Transaction_Type': rng.choice(TIPOS_TRANSACAO, linhas),
+        'Timestamp': timestamps.strftime('%Y-%m-%d %H:%M:%S') if timestamp_texto else timestamps,
+        'Device_Type': rng.choice(DISPOSITIVOS, linhas),
+        'Location': locais[indice_local],
+        'Latitude': coordenadas[indice_local, 0],
+        'Longitude': coordenadas[indice_local, 1],
+        'Failed_Transaction_Count_7d': falhas,
+        'Card_Type': rng.choice(CARTOES, linhas),
+        'Risk_Score': np.clip(rng.normal(0.3 + 0.45 * fraude, 0.15), 0, 1).round(4),
+        'Fraud_Label': fraude.astype(np.int64),
+    }, columns=COLUNAS)
+
+
+def gerar_transacoes(linhas, semente=42, num_usuarios=None):
+    """DataFrame sintético (em memória) com o esquema de TransacoesCompletas."""
+    return gerar_lote(0, linhas, num_usuarios or num_usuarios_padrao(linhas), semente)
+
+
+def gravar_sqlite(caminho, linhas, semente=42, num_usuarios=None, tamanho_lote=TAMANHO_LOTE_GERACAO):
+    """Grava 'linhas' transações sintéticas na tabela de origem do banco SQLite, lote a lote."""
+    num_usuarios = num_usuarios or num_usuarios_padrao(linhas)
+    conn = sqlite3.connect(caminho)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute(f"DROP TABLE IF EXISTS {NOME_TABELA_ORIGEM}")
+        conn.execute(
+            f"CREATE TABLE {NOME_TABELA_ORIGEM} ("
+            "Transaction_ID TEXT, User_ID TEXT, Transaction_Amount REAL, Transaction_Type TEXT, Timestamp TEXT, "
+            "Device_Type TEXT, Location TEXT, Latitude REAL, Longitude REAL, Failed_Transaction_Count_7d INTEGER, "
+            "Card_Type TEXT, Risk_Score REAL, Fraud_Label INTEGER)"
+        )
+        insercao = f"INSERT INTO {NOME_TABELA_ORIGEM} VALUES ({', '.join('?' * len(COLUNAS))})"
+        for inicio in range(0, linhas, tamanho_lote):
+            lote = gerar_lote(inicio, min(tamanho_lote, linhas - inicio), num_usuarios, semente, timestamp_texto=True)
+            conn.executemany(insercao, lote.itertuples(index=False, name=None))
+            conn.commit()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("banco", help="Caminho do arquivo SQLite a criar.")
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    parser.add_argument("--usuarios", type=int, default=None, help="Nº de usuários distintos (padrão: linhas / 20).")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    gravar_sqlite(args.banco, args.linhas, args.semente, args.usuarios)
+    print(f"{args.linhas:,} transações gravadas em '{os.path.abspath(args.banco)}' em {time.perf_counter() - inicio:.1f}s")
@@ -0,0 +1,130 @@
+# benchmarks/orcamento_imports.py
+"""
+Orçamento de importação do dashboard: abre cada página em um processo novo (AppTest do
+Streamlit) e verifica
+  - quais bibliotecas pesadas a página carregou, contra a lista das que ela pode usar;
+  - o tempo da primeira renderização (partida a frio) e de um rerun, contra o orçamento.
+Sai com código 1 se alguma página estourar o orçamento (serve de verificação no CI).
+O tempo de importar o próprio Streamlit não entra na conta.
+
+Uso (a partir da raiz do projeto, ou com --diretorio apontando para onde está o creditdata.db):
+    python benchmarks/orcamento_imports.py
+    python benchmarks/orcamento_imports.py --paginas "Resumo Estratégico" --fator 2
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import sys
+import time
+import warnings
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARQUIVO_APP = os.path.join(RAIZ, 'app.py')
+
+# --- CONFIGURAÇÕES ---
+PESADOS = ['pandas', 'numpy', 'sqlalchemy', 'pyarrow', 'plotly', 'folium', 'streamlit_folium', 'scipy', 'xgboost']
+# Página -> (bibliotecas pesadas que ela pode carregar, orçamento em ms da primeira renderização, do rerun).
+# Orçamento None = sem limite de tempo (páginas que leem dados: o tempo depende do tamanho do banco).
+# pyarrow é permitido em quem mostra DataFrames: o Streamlit serializa tabelas e métricas via Arrow.
+ORCAMENTOS = {
+    "Visão Geral": ({'pandas', 'numpy', 'sqlalchemy', 'pyarrow', 'plotly'}, None, None),
+    "Análise Geográfica": ({'pandas', 'numpy', 'sqlalchemy', 'pyarrow', 'folium', 'streamlit_folium'}, None, None),
+    "Analise Exploratoria": ({'pandas', 'numpy', 'sqlalchemy', 'pyarrow', 'plotly', 'scipy', 'xgboost'}, None, None),
+    "Análise Direcionada": ({'pandas', 'numpy', 'sqlalchemy', 'pyarrow', 'plotly'}, None, None),
+    "Resumo Estratégico": (set(), 300, 50),
+    "Performance": ({'pandas', 'numpy', 'pyarrow', 'plotly'}, None, None),
+}
+PAGINAS_COM_PARAMETRO = {"Performance": {"performance": "1"}}
+
+
+def _medir_pagina(pagina, diretorio, fila):
+    os.chdir(diretorio)
+    sys.path.insert(0, RAIZ)  # Como o 'streamlit run', que põe o diretório do app no sys.path
+    warnings.filterwarnings('ignore')
+    from streamlit.testing.v1 import AppTest
+
+    ja_carregados = set(sys.modules)
+    teste = AppTest.from_file(ARQUIVO_APP, default_timeout=600)
+    for chave, valor in PAGINAS_COM_PARAMETRO.get(pagina, {}).items():
+        teste.query_params[chave] = valor
+    teste.session_state['pagina_selecionada'] = pagina
+
+    inicio = time.perf_counter()
+    teste.run()
+    primeira = time.perf_counter() - inicio
+    # O AppTest não sabe reenviar o estado de um st.pills de seleção única (trata o texto como lista)
+    teste.get('button_group')[0].set_value([pagina])
+    inicio = time.perf_counter()
+    teste.run()
+    rerun = time.perf_counter() - inicio
+
+    carregados = set(sys.modules) - ja_carregados
+    fila.put({
+        'primeira_ms': primeira * 1000,
+        'rerun_ms': rerun * 1000,
+        'pesados': sorted(modulo for modulo in PESADOS if modulo in carregados),
+        'excecoes': [str(excecao.value) for excecao in teste.exception],
+    })
+
+
+def medir_pagina(pagina, diretorio):
+    """Roda a página em um processo novo (partida a frio). Retorna None se o processo morrer."""
+    contexto = multiprocessing.get_context('spawn')
+    fila = contexto.Queue()
+    processo = contexto.Process(target=_medir_pagina, args=(pagina, diretorio, fila))
+    processo.start()
+    while True:
+        try:
+            resultado = fila.get(timeout=1)
+            break
+        except queue.Empty:
+            if not processo.is_alive():
+                resultado = None
+                break
+    processo.join()
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paginas", nargs="+", choices=list(ORCAMENTOS), default=list(ORCAMENTOS))
+    parser.add_argument("--diretorio", default=os.getcwd(), help="Diretório com o creditdata.db (padrão: o atual).")
+    parser.add_argument("--fator", type=float, default=1.0,
+                        help="Multiplica os orçamentos de tempo (ex.: 2 em máquinas de CI mais lentas).")
+    args = parser.parse_args()
+
+    violacoes = []
+    print(f"{'página':<22} | {'1ª renderização':>15} | {'rerun':>9} | bibliotecas pesadas carregadas")
+    for pagina in args.paginas:
+        permitidos, orcamento_primeira, orcamento_rerun = ORCAMENTOS[pagina]
+        resultado = medir_pagina(pagina, os.path.abspath(args.diretorio))
+        if resultado is None:
+            print(f"{pagina:<22} | processo encerrado antes do fim")
+            violacoes.append(f"{pagina}: processo encerrado")
+            continue
+        print(f"{pagina:<22} | {resultado['primeira_ms']:>12,.0f} ms | {resultado['rerun_ms']:>6,.0f} ms | "
+              f"{', '.join(resultado['pesados']) or '-'}")
+
+        if resultado['excecoes']:
+            violacoes.append(f"{pagina}: exceção ao renderizar ({resultado['excecoes'][0]})")
+        proibidos = sorted(set(resultado['pesados']) - permitidos)
+        if proibidos:
+            violacoes.append(f"{pagina}: importou {', '.join(proibidos)}")
+        if orcamento_primeira is not None and resultado['primeira_ms'] > orcamento_primeira * args.fator:
+            violacoes.append(f"{pagina}: 1ª renderização em {resultado['primeira_ms']:,.0f} ms "
+                             f"(orçamento {orcamento_primeira * args.fator:,.0f} ms)")
+        if orcamento_rerun is not None and resultado['rerun_ms'] > orcamento_rerun * args.fator:
+            violacoes.append(f"{pagina}: rerun em {resultado['rerun_ms']:,.0f} ms "
+                             f"(orçamento {orcamento_rerun * args.fator:,.0f} ms)")
+
+    if violacoes:
+        print("\nOrçamento estourado:")
+        for violacao in violacoes:
+            print(f"  - {violacao}")
+        sys.exit(1)
+    print("\nTodas as páginas dentro do orçamento.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,77 +1,1071 @@
 # Arquivo: etl.py
+import argparse
+import hashlib
+import os
+import shutil
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
 import time
 
+from func import cardinalidade
+from func import instrumentacao
+from func import outliers as motor_outliers
+from func.features import calcular_features_usuario, colunas_features
+
 # --- CONFIGURAÇÕES ---
 DB_URL = "sqlite:///creditdata.db"
 NOME_TABELA_ORIGEM = "TransacoesCompletas"  # Nome da sua tabela com dados brutos
 NOME_TABELA_DESTINO = "analytics_dashboard" # Tabela otimizada que o dashboard vai usar
+NOME_TABELA_METADADOS = "etl_metadados"     # Guarda a marca d'água (high-water mark) do ETL incremental
+NOME_TABELA_LOTE = "_etl_lote"              # Tabela temporária usada no upsert incremental
+NOME_TABELA_CARGA = "_etl_carga"            # Tabela de carga (staging) do modo completo, trocada pela de destino no fim
+NOME_TABELA_ROLLUP = "analytics_rollup_diario" # Agregados por (dia, Location, Transaction_Type, Fraud_Label)
+NOME_TABELA_SKETCHES = "analytics_sketches_usuarios" # HyperLogLog de User_ID no mesmo grão do rollup diário
+COLUNAS_GRUPO_SKETCH = ['Data', 'Location', 'Transaction_Type', 'Fraud_Label'] # Grão dos sketches
+NOME_TABELA_FEATURES = "_etl_features"       # Tabela temporária com as features por usuário recalculadas
+NOME_TABELA_OUTLIERS = "analytics_outliers"   # Limites e contagens de outliers por (segmento, coluna), lidos pelo dashboard
+SEGMENTO_OUTLIERS = None                      # Ex.: 'Transaction_Type' para limites por segmento (mudar exige --full-refresh)
+TAMANHO_AMOSTRA_OUTLIERS = 200_000            # Acima disso os limites vêm de uma amostra da tabela (as contagens são exatas)
+TAMANHO_BLOCO_LEITURA_OUTLIERS = 20_000       # Linhas por fetchmany na leitura da amostra
+FRACAO_RECALCULO_OUTLIERS = 0.05              # No incremental, recalcula os limites se a tabela cresceu mais que isso
+NOME_TABELA_USUARIOS_AFETADOS = "_etl_usuarios_afetados" # (TEMP) Usuários tocados pela carga incremental
+NOME_TABELA_BALDES = "_etl_baldes_usuarios"  # (TEMP) Balde (hash do User_ID) de cada usuário no cálculo das features
+CHAVE_MARCA_DAGUA = "ultimo_rowid_origem"
+CHAVE_IDS_UNICOS = "transaction_id_unico"   # Garantia (1) de que cada Transaction_ID aparece uma vez só
+CHAVE_VERSAO_DADOS = "versao_dados"         # Versão monotônica dos dados publicados (o dashboard faz cache por ela)
+CHAVE_CHECKSUM_DADOS = "checksum_dados"     # Checksum do conteúdo da versão publicada
+CHAVE_VERSAO_PARQUET = "versao_parquet"     # Versão dos dados da qual a cópia Parquet foi exportada
+TAMANHO_LOTE_PADRAO = 100_000               # Linhas por lote no modo streaming (--chunksize)
+PARTICOES_POR_WORKER = 2                    # Partições por processo na transformação paralela (--workers)
+TAMANHO_MINIMO_PARALELO = 50_000            # Abaixo disso, enviar os dados aos processos custa mais que transformar
+DIRETORIO_PARQUET = "dados_parquet"         # Cópia colunar (Parquet) particionada por mês (--parquet)
+COLUNA_PARTICAO = "Ano_Mes"
+TAMANHO_LOTE_INSERCAO = 200_000             # Linhas convertidas por chamada ao executemany na carga em massa
+# Colunas derivadas do Timestamp de cada transação: nome -> atributo do '.dt' (o mesmo do pd.Timestamp).
+# A pontuação ('func/pontuacao.py') deriva as mesmas colunas dos registros crus.
+COLUNAS_DO_TIMESTAMP = {
+    'Hora_do_Dia': 'hour',
+    'Dia_da_Semana': 'dayofweek',  # 0=Segunda, 6=Domingo
+    'Mes': 'month',
+}
+# PRAGMAs das conexões do ETL. WAL: o dashboard continua lendo a versão anterior (sem bloquear)
+# enquanto a carga escreve, e só enxerga os dados novos no commit. O modo WAL fica gravado no arquivo.
+PRAGMAS_CARGA = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',        # Com WAL só o checkpoint espera o disco; o banco não corrompe em uma queda
+    'journal_size_limit': 67_108_864, # Depois do checkpoint o arquivo -wal volta a no máximo 64 MB
+}
+CACHE_CARGA_KIB = 65_536            # Cache de páginas (64 MB) da transação de carga: índices, deduplicação e features
+
+# Índices da tabela de destino: apoiam o upsert e os filtros do dashboard (período, tipo/status e local)
+INDICES_DESTINO = {
+    'transaction_id': ['Transaction_ID'],
+    'timestamp': ['Timestamp'],
+    'tipo_fraude': ['Transaction_Type', 'Fraud_Label'],
+    'location': ['Location'],
+    'usuario': ['User_ID', 'Timestamp'],
+}
+
+def criar_engine(url=DB_URL):
+    """Engine do ETL: toda conexão nova recebe os PRAGMAS_CARGA."""
+    engine = create_engine(url)
+
+    @event.listens_for(engine, "connect")
+    def _configurar_conexao(conexao_dbapi, _registro):
+        cursor = conexao_dbapi.cursor()
+        for pragma, valor in PRAGMAS_CARGA.items():
+            cursor.execute(f"PRAGMA {pragma} = {valor}")
+        cursor.close()
+
+    return engine
+
+# --- METADADOS DO ETL ---
+
+def criar_tabela_metadados(conn):
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {NOME_TABELA_METADADOS} ("
+        "chave TEXT PRIMARY KEY, valor TEXT, atualizado_em TEXT DEFAULT CURRENT_TIMESTAMP)"
+    ))
 
-def extrair_dados(engine):
-    """Extrai os dados da tabela de origem."""
+def ler_metadado(engine, chave):
+    """Lê um valor da tabela de metadados. Retorna None se não existir."""
+    with engine.begin() as conn:
+        criar_tabela_metadados(conn)
+        return conn.execute(
+            text(f"SELECT valor FROM {NOME_TABELA_METADADOS} WHERE chave = :chave"), {'chave': chave}
+        ).scalar()
+
+def gravar_metadado(conn, chave, valor):
+    """Grava (ou atualiza) um valor na tabela de metadados, dentro da transação recebida."""
+    criar_tabela_metadados(conn)
+    conn.execute(text(
+        f"INSERT INTO {NOME_TABELA_METADADOS} (chave, valor, atualizado_em) "
+        "VALUES (:chave, :valor, CURRENT_TIMESTAMP) "
+        "ON CONFLICT(chave) DO UPDATE SET valor = excluded.valor, atualizado_em = excluded.atualizado_em"
+    ), {'chave': chave, 'valor': str(valor)})
+
+def obter_ultimo_rowid_origem(engine):
+    """Retorna o maior rowid atual da tabela de origem (0 se estiver vazia)."""
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT COALESCE(MAX(rowid), 0) FROM {NOME_TABELA_ORIGEM}")).scalar()
+
+def _consulta_extracao(rowid_inicial=0, rowid_final=None):
+    consulta = f"SELECT * FROM {NOME_TABELA_ORIGEM} WHERE rowid > :inicio"
+    parametros = {'inicio': rowid_inicial}
+    if rowid_final is not None:
+        consulta += " AND rowid <= :fim"
+        parametros['fim'] = rowid_final
+    return text(consulta), parametros
+
+@instrumentacao.instrumentar('etl.extrair_dados')
+def extrair_dados(engine, rowid_inicial=0, rowid_final=None):
+    """
+    Extrai os dados da tabela de origem.
+    Se 'rowid_inicial' for informado, extrai apenas as linhas novas (rowid > rowid_inicial).
+    """
     print("Iniciando Extração (Extract)...")
     try:
-        df = pd.read_sql(f"SELECT * FROM {NOME_TABELA_ORIGEM}", engine)
+        consulta, parametros = _consulta_extracao(rowid_inicial, rowid_final)
+        df = pd.read_sql(consulta, engine, params=parametros)
         print(f"Sucesso! {len(df)} registros extraídos.")
         return df
     except Exception as e:
         print(f"ERRO na extração: {e}")
         return None
 
-def transformar_dados(df):
+def transformar_dados(df, verbose=True):
     """Aplica todas as transformações e cálculos pesados aqui."""
     if df is None or df.empty:
-        print("Nenhum dado para transformar.")
+        if verbose:
+            print("Nenhum dado para transformar.")
         return None
         
-    print("Iniciando Transformação (Transform)...")
+    if verbose:
+        print("Iniciando Transformação (Transform)...")
     
     # Garante que a coluna de data é do tipo datetime
     df['Timestamp'] = pd.to_datetime(df['Timestamp'])
     
     # --- Feature Engineering: Crie aqui todas as colunas que seu dashboard precisa ---
-    df['Hora_do_Dia'] = df['Timestamp'].dt.hour
-    df['Dia_da_Semana'] = df['Timestamp'].dt.dayofweek # 0=Segunda, 6=Domingo
-    df['Mes'] = df['Timestamp'].dt.month
+    for coluna, atributo in COLUNAS_DO_TIMESTAMP.items():
+        df[coluna] = getattr(df['Timestamp'].dt, atributo)
     
-    # Exemplo de uma transformação mais complexa: Média de gastos do usuário até aquela data
-    # ATENÇÃO: pode ser lento para datasets muito grandes
-    # df.sort_values(by=['User_ID', 'Timestamp'], inplace=True)
-    # df['Media_Gasto_Usuario'] = df.groupby('User_ID')['Transaction_Amount'].expanding().mean().reset_index(level=0, drop=True)
+    # As features por usuário (janelas móveis, média de gastos etc.) dependem do histórico completo
+    # de cada usuário, então são calculadas depois da carga: veja 'atualizar_features_usuario'.
 
     # Garante que a coluna de fraude seja numérica
     if 'Fraud_Label' in df.columns:
         df['Fraud_Label'] = df['Fraud_Label'].astype(int)
 
-    print("Sucesso! Dados transformados e enriquecidos.")
+    if verbose:
+        print("Sucesso! Dados transformados e enriquecidos.")
     return df
 
-def carregar_dados(df, engine):
-    """Carrega o DataFrame transformado em uma nova tabela no banco."""
+def balde_usuario(usuarios, num_baldes):
+    """Balde (0 a num_baldes - 1) de cada User_ID, pelo hash do pandas: estável entre processos e execuções."""
+    return pd.util.hash_pandas_object(pd.Series(usuarios), index=False).to_numpy() % num_baldes
+
+def particionar_por_usuario(df, num_particoes):
+    """
+    Divide o DataFrame por hash do User_ID ('balde_usuario'): todas as linhas de um usuário caem
+    na mesma partição, o que permite calcular features por usuário dentro de cada processo.
+    """
+    chaves = balde_usuario(df['User_ID'], num_particoes)
+    ordem = np.argsort(chaves, kind='stable')
+    limites = np.cumsum(np.bincount(chaves, minlength=num_particoes))[:-1]
+    return [df.iloc[posicoes] for posicoes in np.split(ordem, limites) if len(posicoes)]
+
+def _transformar_particao(df):
+    return transformar_dados(df, verbose=False)
+
+@instrumentacao.instrumentar('etl.transformar_dados')
+def transformar_dados_paralelo(df, executor=None, num_workers=1, verbose=True):
+    """
+    Versão paralela de 'transformar_dados': particiona por User_ID e transforma as partições
+    nos processos do 'executor'. O resultado volta na ordem original das linhas, idêntico ao serial.
+    Sem executor (ou com poucos dados) roda no processo atual.
+    """
+    if executor is None or df is None or len(df) < TAMANHO_MINIMO_PARALELO:
+        return transformar_dados(df, verbose)
+
+    if verbose:
+        print(f"Iniciando Transformação (Transform) em {num_workers} processos...")
+    particoes = particionar_por_usuario(df, num_workers * PARTICOES_POR_WORKER)
+    resultados = list(executor.map(_transformar_particao, particoes))
+    # Junção determinística: o índice vem da extração, então ordenar por ele restaura a ordem original
+    df = pd.concat([r for r in resultados if r is not None]).sort_index(kind='stable')
+    if verbose:
+        print("Sucesso! Dados transformados e enriquecidos.")
+    return df
+
+def _ampliar_cache(conn):
+    """Cache de páginas maior na conexão da carga (as leituras, como a do Parquet, ficam com o padrão)."""
+    conn.execute(text(f"PRAGMA cache_size = -{CACHE_CARGA_KIB}"))
+
+def _descartar_tabela(conn, nome_tabela):
+    conn.execute(text(f"DROP TABLE IF EXISTS {nome_tabela}"))
+
+def _valores_para_sqlite(df):
+    """
+    Colunas do DataFrame como listas de valores Python, no mesmo formato que o to_sql grava:
+    datas como texto 'AAAA-MM-DD HH:MM:SS.ffffff' e NaN/NaT como NULL.
+    """
+    colunas = []
+    for _, serie in df.items():
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            # ~3x mais rápido que o dt.strftime: texto ISO do numpy, com o 'T' trocado por espaço no próprio buffer
+            texto = np.datetime_as_string(serie.to_numpy(dtype='datetime64[us]'), unit='us')
+            texto.view(np.uint32).reshape(-1, texto.itemsize // 4)[:, 10] = ord(' ')
+            valores = pd.Series(texto, index=serie.index, dtype=object)
+        else:
+            valores = serie
+        if serie.hasnans:
+            valores = valores.astype(object).where(serie.notna(), None)
+        colunas.append(valores.tolist())
+    return colunas
+
+def gravar_em_massa(df, conn, nome_tabela, tamanho_lote=TAMANHO_LOTE_INSERCAO):
+    """
+    Acrescenta o DataFrame à tabela (criada com o mesmo esquema do to_sql, se não existir) usando o
+    executemany do driver dentro da transação de 'conn'. O to_sql monta um dicionário por linha no
+    SQLAlchemy; aqui cada lote vira listas de colunas e vai direto para o sqlite3.
+    """
+    if not inspect(conn).has_table(nome_tabela):
+        conn.execute(text(pd.io.sql.get_schema(df, nome_tabela, con=conn)))
+    colunas = ", ".join(f'"{col}"' for col in df.columns)
+    insercao = f"INSERT INTO {nome_tabela} ({colunas}) VALUES ({', '.join(['?'] * len(df.columns))})"
+    cursor = conn.connection.cursor()
+    try:
+        for inicio in range(0, len(df), tamanho_lote):
+            cursor.executemany(insercao, zip(*_valores_para_sqlite(df.iloc[inicio:inicio + tamanho_lote])))
+    finally:
+        cursor.close()
+
+def _upsert_por_transaction_id(df, conn):
+    """
+    Substitui as transações já existentes (mesmo Transaction_ID) e insere as novas.
+    A tabela de lote é esvaziada ao final; quem chama é responsável por removê-la.
+    Retorna o intervalo (Timestamp mínimo, máximo) afetado, incluindo as versões substituídas.
+    """
+    gravar_em_massa(df, conn, NOME_TABELA_LOTE)
+    colunas = ", ".join(f'"{col}"' for col in df.columns)
+    intervalo = conn.execute(text(
+        f"SELECT MIN(Timestamp), MAX(Timestamp) FROM ("
+        f"SELECT Timestamp FROM {NOME_TABELA_DESTINO} "
+        f"WHERE Transaction_ID IN (SELECT Transaction_ID FROM {NOME_TABELA_LOTE}) "
+        f"UNION ALL SELECT Timestamp FROM {NOME_TABELA_LOTE})"
+    )).one()
+    # Usuários do lote (e das versões substituídas) têm as features recalculadas no fim da carga
+    conn.execute(text(
+        f"INSERT OR IGNORE INTO {NOME_TABELA_USUARIOS_AFETADOS} (User_ID) "
+        f"SELECT User_ID FROM {NOME_TABELA_DESTINO} "
+        f"WHERE Transaction_ID IN (SELECT Transaction_ID FROM {NOME_TABELA_LOTE}) "
+        f"UNION SELECT User_ID FROM {NOME_TABELA_LOTE}"
+    ))
+    conn.execute(text(
+        f"DELETE FROM {NOME_TABELA_DESTINO} "
+        f"WHERE Transaction_ID IN (SELECT Transaction_ID FROM {NOME_TABELA_LOTE})"
+    ))
+    conn.execute(text(
+        f"INSERT INTO {NOME_TABELA_DESTINO} ({colunas}) SELECT {colunas} FROM {NOME_TABELA_LOTE}"
+    ))
+    conn.execute(text(f"DELETE FROM {NOME_TABELA_LOTE}"))
+    return tuple(intervalo)
+
+def _preparar_usuarios_afetados(conn):
+    """Cria (vazia) a tabela temporária, por conexão, com os usuários afetados pela carga."""
+    conn.execute(text(
+        f"CREATE TEMP TABLE IF NOT EXISTS {NOME_TABELA_USUARIOS_AFETADOS} (User_ID TEXT PRIMARY KEY)"
+    ))
+    conn.execute(text(f"DELETE FROM {NOME_TABELA_USUARIOS_AFETADOS}"))
+
+def _unir_intervalos(atual, novo):
+    if atual is None:
+        return novo
+    return (min(atual[0], novo[0]), max(atual[1], novo[1]))
+
+# --- ROLLUPS (AGREGADOS PRÉ-CALCULADOS) ---
+
+@instrumentacao.instrumentar('etl.atualizar_rollups')
+def atualizar_rollups(conn, intervalo=None):
+    """
+    (Re)calcula o rollup diário a partir da tabela de destino.
+    - intervalo=None: reconstrói o rollup inteiro.
+    - intervalo=(inicio, fim): recalcula apenas os dias entre 'inicio' e 'fim'.
+    Latitude/Longitude são guardadas como somas para permitir médias em qualquer recorte.
+    """
+    filtro, parametros = "", {}
+    if intervalo is not None:
+        filtro = "WHERE Timestamp >= date(:inicio) AND Timestamp < date(:fim, '+1 day')"
+        parametros = {'inicio': intervalo[0], 'fim': intervalo[1]}
+
+    selecao = f"""
+        SELECT date(Timestamp) AS Data, Location, Transaction_Type, Fraud_Label,
+               COUNT(*) AS Total_Transacoes,
+               SUM(Transaction_Amount) AS Soma_Valor,
+               SUM(Risk_Score) AS Soma_Risk_Score,
+               SUM(CASE WHEN Longitude IS NOT NULL THEN Latitude END) AS Soma_Latitude,
+               SUM(CASE WHEN Latitude IS NOT NULL THEN Longitude END) AS Soma_Longitude,
+               SUM(Latitude IS NOT NULL AND Longitude IS NOT NULL) AS Total_Coordenadas
+        FROM {NOME_TABELA_DESTINO} {filtro}
+        GROUP BY 1, 2, 3, 4
+    """
+    if intervalo is None:
+        _descartar_tabela(conn, NOME_TABELA_ROLLUP)
+        conn.execute(text(f"CREATE TABLE {NOME_TABELA_ROLLUP} AS {selecao}"))
+        conn.execute(text(f"CREATE INDEX idx_{NOME_TABELA_ROLLUP}_data ON {NOME_TABELA_ROLLUP} (Data)"))
+    else:
+        conn.execute(text(
+            f"DELETE FROM {NOME_TABELA_ROLLUP} WHERE Data BETWEEN date(:inicio) AND date(:fim)"
+        ), parametros)
+        conn.execute(text(f"INSERT INTO {NOME_TABELA_ROLLUP} {selecao}"), parametros)
+
+# --- SKETCHES DE USUÁRIOS DISTINTOS ---
+# Usuários distintos não se somam entre dias, então o rollup não responde "usuários ativos no período".
+# Cada linha do rollup ganha um sketch HyperLogLog dos User_ID ('func/cardinalidade.py'); o dashboard une
+# os sketches do recorte (qualquer período, Location, tipo ou classe) sem ler as transações.
+
+@instrumentacao.instrumentar('etl.atualizar_sketches_usuarios')
+def atualizar_sketches_usuarios(conn, intervalo=None, chunksize=TAMANHO_LOTE_PADRAO):
+    """
+    (Re)calcula os sketches de usuários distintos, com o mesmo recorte de 'atualizar_rollups':
+    - intervalo=None: reconstrói a tabela inteira.
+    - intervalo=(inicio, fim): recalcula apenas os dias entre 'inicio' e 'fim'.
+    Lê só as chaves e o User_ID, em lotes; de cada lote ficam apenas os registradores (o maior rho
+    por grupo e registrador), então a memória não cresce com o nº de transações repetidas.
+    Retorna o nº de sketches gravados.
+    """
+    filtro, parametros = "", {}
+    if intervalo is None:
+        _descartar_tabela(conn, NOME_TABELA_SKETCHES)
+    else:
+        filtro = "WHERE Timestamp >= date(:inicio) AND Timestamp < date(:fim, '+1 day')"
+        parametros = {'inicio': intervalo[0], 'fim': intervalo[1]}
+        conn.execute(text(
+            f"DELETE FROM {NOME_TABELA_SKETCHES} WHERE Data BETWEEN date(:inicio) AND date(:fim)"
+        ), parametros)
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {NOME_TABELA_SKETCHES} "
+        "(Data TEXT, Location TEXT, Transaction_Type TEXT, Fraud_Label INTEGER, Sketch_Usuarios BLOB)"
+    ))
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS idx_{NOME_TABELA_SKETCHES}_data ON {NOME_TABELA_SKETCHES} (Data)"))
+
+    consulta = text(
+        f"SELECT date(Timestamp) AS Data, Location, Transaction_Type, Fraud_Label, User_ID "
+        f"FROM {NOME_TABELA_DESTINO} {filtro}"
+    )
+    grupos, acumulado = {}, None
+    for lote in pd.read_sql(consulta, conn, params=parametros, chunksize=chunksize):
+        codigos = lote.groupby(COLUNAS_GRUPO_SKETCH, dropna=False, sort=False).ngroup().to_numpy()
+        # Mesma ordem do ngroup (primeira aparição); NULL vira None para servir de chave entre os lotes
+        unicos = lote[COLUNAS_GRUPO_SKETCH].drop_duplicates()
+        unicos = unicos.astype(object).where(unicos.notna(), None)
+        globais = np.array([grupos.setdefault(chave, len(grupos)) for chave in unicos.itertuples(index=False, name=None)])
+        acumulado = cardinalidade.acumular(globais[codigos], cardinalidade.hash_valores(lote['User_ID']), acumulado)
+    if not grupos:
+        return 0
+
+    sketches = pd.DataFrame(list(grupos), columns=COLUNAS_GRUPO_SKETCH)
+    sketches['Sketch_Usuarios'] = cardinalidade.serializar(acumulado, len(grupos))
+    gravar_em_massa(sketches, conn, NOME_TABELA_SKETCHES)
+    return len(sketches)
+
+# --- FEATURES POR USUÁRIO ---
+# Calculadas sobre a tabela de destino já carregada (e deduplicada), lendo só 4 colunas.
+# Assim o resultado é o mesmo no modo completo, incremental ou em lotes, inclusive quando
+# chegam transações antigas fora de ordem: todo o histórico dos usuários afetados é recalculado.
+
+def _garantir_colunas_features(conn, tabela):
+    existentes = {linha[1] for linha in conn.execute(text(f"PRAGMA table_info({tabela})"))}
+    for coluna in colunas_features():
+        if coluna not in existentes:
+            tipo = "INTEGER" if coluna.startswith("Qtd_") else "REAL"
+            conn.execute(text(f'ALTER TABLE {tabela} ADD COLUMN "{coluna}" {tipo}'))
+
+def _preparar_baldes_usuarios(conn, tabela, filtro, num_baldes, chunksize):
+    """
+    Cria a tabela temporária usuário -> balde a partir dos User_ID distintos, lidos em lotes. A chave
+    (Balde, User_ID) faz cada balde ser lido por uma faixa da chave e o índice de User_ID da tabela.
+    """
+    _descartar_tabela(conn, NOME_TABELA_BALDES)
+    conn.execute(text(
+        f"CREATE TEMP TABLE {NOME_TABELA_BALDES} (Balde INTEGER, User_ID TEXT, PRIMARY KEY (Balde, User_ID)) WITHOUT ROWID"
+    ))
+    condicao = "AND User_ID IS NOT NULL" if filtro else "WHERE User_ID IS NOT NULL"
+    usuarios = pd.read_sql(text(f"SELECT DISTINCT User_ID FROM {tabela}{filtro} {condicao}"), conn, chunksize=chunksize)
+    cursor = conn.connection.cursor()
+    try:
+        for lote in usuarios:
+            baldes = balde_usuario(lote['User_ID'], num_baldes)
+            cursor.executemany(f"INSERT INTO {NOME_TABELA_BALDES} VALUES (?, ?)", zip(baldes.tolist(), lote['User_ID'].tolist()))
+    finally:
+        cursor.close()
+
+def _calcular_features_balde(lote):
+    """
+    Features de um balde (colunas linha, Transaction_ID, User_ID, Timestamp e Transaction_Amount).
+    User_ID e Transaction_ID viram hashes de 64 bits; o Transaction_ID desempata transações do mesmo
+    usuário no mesmo segundo, de forma estável entre os modos (o rowid muda quando o upsert reinsere
+    uma linha). Retorna (linhas, features), em ordem crescente de 'linha'.
+    """
+    features = calcular_features_usuario(
+        pd.util.hash_pandas_object(lote['User_ID'], index=False).to_numpy(),
+        pd.to_datetime(lote['Timestamp'], format='ISO8601').to_numpy(),
+        lote['Transaction_Amount'].to_numpy(dtype=np.float64),
+        desempate=pd.util.hash_pandas_object(lote['Transaction_ID'], index=False).to_numpy(),
+    )
+    linhas = lote['linha'].to_numpy()
+    ordem = np.argsort(linhas)
+    return linhas[ordem], features.take(ordem)
+
+@instrumentacao.instrumentar('etl.atualizar_features_usuario')
+def atualizar_features_usuario(conn, apenas_afetados=False, chunksize=TAMANHO_LOTE_PADRAO, tabela=NOME_TABELA_DESTINO,
+                               executor=None, num_workers=1):
+    """
+    Recalcula as features por usuário ('func/features.py') e grava as colunas na tabela de destino
+    (ou em 'tabela', como a tabela de carga do modo completo).
+    - apenas_afetados=True: só os usuários registrados pela carga incremental.
+    Os usuários são divididos pelo hash do User_ID ('balde_usuario') em baldes de ~'chunksize' linhas,
+    calculados um por vez: o pico de memória depende do 'chunksize', não do tamanho da tabela.
+    Com 'executor', os baldes são calculados nos processos enquanto o SQLite lê os próximos e grava os
+    prontos (até num_workers + 1 baldes em memória); a leitura e a gravação continuam neste processo.
+    Linhas sem User_ID ficam sem features.
+    Retorna o intervalo (Timestamp mínimo, máximo) das linhas recalculadas, ou None se não houver
+    nenhuma: no incremental ele cobre todo o histórico dos usuários afetados, não só o do lote.
+    """
+    _garantir_colunas_features(conn, tabela)
+    filtro = f" WHERE User_ID IN (SELECT User_ID FROM {NOME_TABELA_USUARIOS_AFETADOS})" if apenas_afetados else ""
+    total, minimo, maximo = conn.execute(text(
+        f"SELECT COUNT(*), MIN(Timestamp), MAX(Timestamp) FROM {tabela}{filtro}"
+    )).one()
+    if not total:
+        return None
+    if total < TAMANHO_MINIMO_PARALELO:
+        executor = None
+    # Em paralelo, ao menos PARTICOES_POR_WORKER baldes por processo (como na transformação)
+    num_baldes = max(-(-total // chunksize), num_workers * PARTICOES_POR_WORKER if executor else 1)
+    _preparar_baldes_usuarios(conn, tabela, filtro, num_baldes, chunksize)
+
+    # Tabela auxiliar com 'linha' como INTEGER PRIMARY KEY (é o próprio rowid): o UPDATE ... FROM
+    # encontra cada linha direto pela chave. A inserção usa o executemany do driver, sem o to_sql.
+    colunas = colunas_features()
+    _descartar_tabela(conn, NOME_TABELA_FEATURES)
+    conn.execute(text(
+        f"CREATE TABLE {NOME_TABELA_FEATURES} (linha INTEGER PRIMARY KEY, "
+        + ", ".join(f'"{col}" REAL' for col in colunas) + ")"
+    ))
+    consulta = text(
+        f"SELECT t.rowid AS linha, t.Transaction_ID, t.User_ID, t.Timestamp, t.Transaction_Amount "
+        f"FROM {NOME_TABELA_BALDES} AS b JOIN {tabela} AS t ON t.User_ID = b.User_ID WHERE b.Balde = :balde"
+    )
+    insercao = f"INSERT INTO {NOME_TABELA_FEATURES} VALUES ({', '.join(['?'] * (len(colunas) + 1))})"
+    cursor = conn.connection.cursor()
+
+    def gravar(linhas, features):
+        cursor.executemany(insercao, zip(linhas.tolist(), *(features[col].to_numpy().tolist() for col in colunas)))
+
+    pendentes = deque()
+    try:
+        for balde in range(num_baldes):
+            lote = pd.read_sql(consulta, conn, params={'balde': balde})
+            if lote.empty:
+                continue
+            if executor is None:
+                gravar(*_calcular_features_balde(lote))
+                continue
+            pendentes.append(executor.submit(_calcular_features_balde, lote))
+            if len(pendentes) > num_workers:
+                gravar(*pendentes.popleft().result())
+        while pendentes:
+            gravar(*pendentes.popleft().result())
+    finally:
+        for futuro in pendentes:
+            futuro.cancel()
+        cursor.close()
+
+    atribuicoes = ", ".join(f'"{col}" = f."{col}"' for col in colunas)
+    conn.execute(text(
+        f"UPDATE {tabela} SET {atribuicoes} "
+        f"FROM {NOME_TABELA_FEATURES} AS f WHERE {tabela}.rowid = f.linha"
+    ))
+    _descartar_tabela(conn, NOME_TABELA_FEATURES)
+    _descartar_tabela(conn, NOME_TABELA_BALDES)
+    return minimo, maximo
+
+# --- OUTLIERS ---
+# Limites de 'func/outliers.py' (IQR, MAD/z robusto e percentis) de todas as colunas numéricas.
+# Cada linha ganha uma máscara por método (Outlier_IQR, Outlier_MAD, Outlier_Percentil: bit i = coluna
+# de Bit i) e NOME_TABELA_OUTLIERS guarda limites e contagens, que o dashboard lê sem varrer os dados.
+
+def _colunas_numericas_outliers(conn, tabela):
+    """Colunas avaliadas: as numéricas da tabela, menos o rótulo e as próprias máscaras, na ordem da tabela."""
+    mascaras = set(motor_outliers.COLUNAS_FLAGS.values())
+    return [linha[1] for linha in conn.execute(text(f"PRAGMA table_info({tabela})"))
+            if linha[2].upper() in ('FLOAT', 'REAL', 'INTEGER', 'BIGINT')
+            and linha[1] != 'Fraud_Label' and linha[1] not in mascaras]
+
+def _ler_amostra_outliers(conn, tabela, colunas, total):
+    """
+    Linhas usadas no cálculo dos limites: a tabela inteira até TAMANHO_AMOSTRA_OUTLIERS linhas; acima
+    disso, uma amostra sistemática por rowid (determinística, espalhada por todo o período).
+    Lê direto do cursor, em blocos pequenos, para uma matriz float64 já no layout por coluna do motor
+    de outliers (sem DataFrame intermediário nem cópia extra).
+    Retorna (valores, segmentos); segmentos é None sem SEGMENTO_OUTLIERS.
+    """
+    passo = -(-total // TAMANHO_AMOSTRA_OUTLIERS)
+    selecao = [f'"{col}"' for col in colunas] + ([SEGMENTO_OUTLIERS] if SEGMENTO_OUTLIERS else [])
+    filtro = f"WHERE rowid % {passo} = 0" if passo > 1 else ""
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(f"SELECT {', '.join(selecao)} FROM {tabela} {filtro}")
+        blocos = []
+        while linhas := cursor.fetchmany(TAMANHO_BLOCO_LEITURA_OUTLIERS):
+            blocos.append(np.ascontiguousarray(np.array(linhas, dtype=object if SEGMENTO_OUTLIERS else np.float64).T))
+    finally:
+        cursor.close()
+    if not blocos:
+        return np.empty((0, len(colunas))), None
+    # (colunas x linhas) contígua; a transposta devolvida é o que o motor espera, sem copiar
+    valores = np.concatenate(blocos, axis=1)
+    if SEGMENTO_OUTLIERS:
+        return np.ascontiguousarray(valores[:-1], dtype=np.float64).T, valores[-1]
+    return valores.T, None
+
+def _limites_publicados(conn, colunas):
+    """Limites publicados, se ainda valem para as colunas e o segmento atuais."""
+    if not inspect(conn).has_table(NOME_TABELA_OUTLIERS):
+        return None
+    limites = pd.read_sql(text(f"SELECT * FROM {NOME_TABELA_OUTLIERS}"), conn)
+    if limites.empty or 'Linhas_Base' not in limites.columns or limites['Coluna_Segmento'].iloc[0] != SEGMENTO_OUTLIERS:
+        return None
+    if limites.drop_duplicates('Coluna').sort_values('Bit')['Coluna'].tolist() != colunas:
+        return None
+    return limites
+
+def _expressao_mascara(metodo, limites_segmento, parametros):
+    """Máscara de um método em SQL: soma de (1 << Bit) das colunas fora dos limites (NULL não conta)."""
+    termos = []
+    for coluna, bit, inferior, superior in limites_segmento[
+        ['Coluna', 'Bit', motor_outliers.coluna_limite(metodo, 'Inferior'), motor_outliers.coluna_limite(metodo, 'Superior')]
+    ].itertuples(index=False):
+        if pd.isna(inferior) or pd.isna(superior):
+            continue
+        parametros[f'i_{metodo}_{bit}'], parametros[f's_{metodo}_{bit}'] = float(inferior), float(superior)
+        termos.append(f'(CASE WHEN "{coluna}" < :i_{metodo}_{bit} OR "{coluna}" > :s_{metodo}_{bit} THEN {1 << int(bit)} ELSE 0 END)')
+    return " + ".join(termos) or "0"
+
+def _publicar_outliers(conn, tabela, limites):
+    """Grava os limites com o total de linhas e de outliers (Qtd_Outliers_<MÉTODO>) por (Segmento, Coluna)."""
+    colunas = limites.drop_duplicates('Coluna').sort_values('Bit')['Coluna'].tolist()
+    segmento = SEGMENTO_OUTLIERS or f"'{motor_outliers.SEGMENTO_GLOBAL}'"
+    # As contagens saem das máscaras, somadas no próprio SQLite (um GROUP BY, sem trazer as linhas)
+    somas = [f'SUM(("{mascara}" >> {bit}) & 1)' for mascara in motor_outliers.COLUNAS_FLAGS.values()
+             for bit in range(len(colunas))]
+    contagens = []
+    for segmento_valor, linhas, *valores in conn.execute(text(
+        f"SELECT {segmento}, COUNT(*), {', '.join(somas)} FROM {tabela} GROUP BY 1"
+    )):
+        valores = np.array(valores, dtype=np.float64).reshape(len(motor_outliers.METODOS), len(colunas))
+        contagem = pd.DataFrame({'Segmento': segmento_valor, 'Coluna': colunas, 'Linhas': linhas})
+        for metodo, qtd in zip(motor_outliers.METODOS, valores):
+            contagem[f'Qtd_Outliers_{motor_outliers.ROTULOS_METODOS[metodo]}'] = qtd
+        contagens.append(contagem)
+
+    anteriores = ['Coluna_Segmento', 'Linhas'] + [col for col in limites.columns if col.startswith('Qtd_Outliers_')]
+    resumo = limites.drop(columns=anteriores, errors='ignore').merge(pd.concat(contagens), on=['Segmento', 'Coluna'], how='left')
+    resumo.insert(0, 'Coluna_Segmento', SEGMENTO_OUTLIERS)
+    _descartar_tabela(conn, NOME_TABELA_OUTLIERS)
+    gravar_em_massa(resumo, conn, NOME_TABELA_OUTLIERS)
+
+@instrumentacao.instrumentar('etl.atualizar_outliers')
+def atualizar_outliers(conn, recalcular_limites=True, tabela=NOME_TABELA_DESTINO):
+    """
+    Marca os outliers de cada linha e publica limites e contagens em NOME_TABELA_OUTLIERS.
+    Os limites são calculados em NumPy; as máscaras, por um UPDATE com os limites como parâmetros,
+    sem trazer as linhas para o Python.
+    - recalcular_limites=True (modo completo): novos limites e todas as linhas remarcadas.
+    - recalcular_limites=False (incremental): mantém os limites publicados e remarca só as linhas dos
+      usuários afetados (as novas e as que tiveram as features recalculadas). Enquanto isso as máscaras
+      podem diferir das de um full refresh (os limites não incluem as linhas novas). Quando a tabela
+      cresce mais que FRACAO_RECALCULO_OUTLIERS desde o cálculo dos limites (ou não há limites válidos
+      publicados), recalcula os limites e remarca tudo.
+    Os limites guardam Linhas_Base (linhas da tabela no cálculo) e Calculado_Em, mostrado na EDA.
+    Retorna o nº de linhas marcadas.
+    """
+    colunas = _colunas_numericas_outliers(conn, tabela)
+    existentes = {linha[1] for linha in conn.execute(text(f"PRAGMA table_info({tabela})"))}
+    for mascara in motor_outliers.COLUNAS_FLAGS.values():
+        if mascara not in existentes:
+            conn.execute(text(f'ALTER TABLE {tabela} ADD COLUMN "{mascara}" INTEGER'))
+
+    filtro = f"User_ID IN (SELECT User_ID FROM {NOME_TABELA_USUARIOS_AFETADOS})"
+    total = conn.execute(text(f"SELECT COUNT(*) FROM {tabela}")).scalar()
+    limites = None if recalcular_limites else _limites_publicados(conn, colunas)
+    if limites is not None:
+        base = limites['Linhas_Base'].iloc[0]
+        if total > base * (1 + FRACAO_RECALCULO_OUTLIERS):
+            print(f"A tabela cresceu {total / max(base, 1) - 1:.1%} desde o cálculo dos limites de outliers: recalculando.")
+            limites = None
+    if limites is None:
+        valores, segmentos = _ler_amostra_outliers(conn, tabela, colunas, total)
+        if not len(valores):
+            return 0
+        limites = motor_outliers.calcular_limites(valores, colunas, segmentos)
+        limites = limites.rename(columns={'Linhas': 'Linhas_Amostra'})
+        limites['Linhas_Base'] = total
+        limites['Calculado_Em'] = pd.Timestamp.now().isoformat(sep=' ', timespec='seconds')
+        filtro = None
+
+    marcadas = 0
+    for segmento_valor, limites_segmento in limites.groupby('Segmento', sort=False):
+        parametros = {}
+        atribuicoes = ", ".join(
+            f'"{mascara}" = {_expressao_mascara(metodo, limites_segmento, parametros)}'
+            for metodo, mascara in motor_outliers.COLUNAS_FLAGS.items()
+        )
+        condicoes = [filtro] if filtro else []
+        if SEGMENTO_OUTLIERS:
+            condicoes.append(f"{SEGMENTO_OUTLIERS} = :segmento")
+            parametros['segmento'] = segmento_valor
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        marcadas += conn.execute(text(f"UPDATE {tabela} SET {atribuicoes} {where}"), parametros).rowcount
+    _publicar_outliers(conn, tabela, limites)
+    return marcadas
+
+@instrumentacao.instrumentar('etl.criar_indices')
+def criar_indices(conn, tabela=NOME_TABELA_DESTINO):
+    """
+    Cria (se ainda não existirem) os índices da tabela de destino. Os nomes são sempre os da tabela
+    de destino, então a tabela de carga recebe os índices definitivos e eles seguem com ela na troca.
+    """
+    for nome, colunas in INDICES_DESTINO.items():
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS idx_{NOME_TABELA_DESTINO}_{nome} "
+            f"ON {tabela} ({', '.join(colunas)})"
+        ))
+
+def _trocar_tabela_carga(conn, chunksize=TAMANHO_LOTE_PADRAO, executor=None, num_workers=1):
+    """
+    Prepara a tabela de carga do modo completo (índices, deduplicação, features e outliers) e a coloca no lugar
+    da tabela de destino com um RENAME. Tudo roda na transação da carga: até o commit, os leitores
+    (em WAL, sem bloquear) continuam vendo a tabela antiga inteira, e depois a nova inteira.
+    """
+    # A antiga sai antes dos índices porque eles usam os nomes definitivos (que ela ainda ocupa)
+    _descartar_tabela(conn, NOME_TABELA_DESTINO)
+    criar_indices(conn, NOME_TABELA_CARGA)
+    # Mesma semântica do upsert: se a origem repetir um Transaction_ID, vale a versão mais recente
+    conn.execute(text(
+        f"DELETE FROM {NOME_TABELA_CARGA} WHERE rowid NOT IN "
+        f"(SELECT MAX(rowid) FROM {NOME_TABELA_CARGA} GROUP BY Transaction_ID)"
+    ))
+    atualizar_features_usuario(conn, chunksize=chunksize, tabela=NOME_TABELA_CARGA, executor=executor, num_workers=num_workers)
+    atualizar_outliers(conn, tabela=NOME_TABELA_CARGA)
+    conn.execute(text(f"ALTER TABLE {NOME_TABELA_CARGA} RENAME TO {NOME_TABELA_DESTINO}"))
+
+def _finalizar_carga(conn, incremental, intervalo=None, marca_dagua=None, chunksize=TAMANHO_LOTE_PADRAO,
+                     executor=None, num_workers=1):
+    """
+    Passos comuns após a carga: índices, features por usuário, outliers, rollups (e sketches de usuários)
+    e marca d'água, na mesma transação. As leituras em lotes usam 'chunksize' linhas, e as features
+    por usuário são calculadas nos processos do 'executor', se houver.
+    No modo completo, é aqui que a tabela de carga substitui a de destino.
+    Retorna o intervalo de Timestamp afetado (no modo completo, o da tabela inteira). No incremental ele
+    inclui todo o histórico dos usuários afetados, cujas features foram recalculadas.
+    """
+    if not incremental:
+        _trocar_tabela_carga(conn, chunksize, executor, num_workers)
+        atualizar_rollups(conn)
+        atualizar_sketches_usuarios(conn, chunksize=chunksize)
+        intervalo = tuple(conn.execute(text(
+            f"SELECT MIN(Timestamp), MAX(Timestamp) FROM {NOME_TABELA_DESTINO}"
+        )).one())
+    else:
+        criar_indices(conn)
+        if intervalo is not None:
+            intervalo_features = atualizar_features_usuario(conn, apenas_afetados=True, chunksize=chunksize,
+                                                            executor=executor, num_workers=num_workers)
+            atualizar_outliers(conn, recalcular_limites=False)
+            # Rollups e sketches não usam as features: bastam os dias do lote
+            atualizar_rollups(conn, intervalo)
+            atualizar_sketches_usuarios(conn, intervalo, chunksize)
+            # Já a cópia Parquet precisa reescrever todos os meses com features recalculadas
+            intervalo = _unir_intervalos(intervalo_features, intervalo)
+    # Deduplicação (modo completo) e upsert (incremental) garantem IDs únicos; o dashboard
+    # usa essa garantia para contar transações sem o 'nunique'.
+    gravar_metadado(conn, CHAVE_IDS_UNICOS, 1)
+    if marca_dagua is not None:
+        gravar_metadado(conn, CHAVE_MARCA_DAGUA, marca_dagua)
+    return intervalo
+
+@instrumentacao.instrumentar('etl.carregar_dados')
+def carregar_dados(df, engine, incremental=False, marca_dagua=None, executor=None, num_workers=1):
+    """
+    Carrega o DataFrame transformado na tabela de destino.
+    - Modo completo: grava a tabela de carga e a troca pela de destino.
+    - Modo incremental: faz upsert por Transaction_ID.
+    Rollups e marca d'água são atualizados na mesma transação da carga.
+    Retorna o intervalo de Timestamp afetado, ou None se nada foi carregado.
+    """
     if df is None:
         print("Nenhum dado para carregar.")
-        return
+        return None
         
     print(f"Iniciando Carga (Load) para a tabela '{NOME_TABELA_DESTINO}'...")
     try:
-        # O parâmetro if_exists='replace' apaga a tabela antiga e cria uma nova.
-        # Isso garante que os dados estejam sempre atualizados após a execução do script.
-        df.to_sql(NOME_TABELA_DESTINO, engine, if_exists='replace', index=False)
-        print("Sucesso! Tabela otimizada criada/atualizada.")
+        with engine.begin() as conn:
+            _ampliar_cache(conn)
+            intervalo = None
+            if incremental:
+                _descartar_tabela(conn, NOME_TABELA_LOTE)
+                _preparar_usuarios_afetados(conn)
+                intervalo = _upsert_por_transaction_id(df, conn)
+                _descartar_tabela(conn, NOME_TABELA_LOTE)
+            else:
+                # A tabela atual segue intacta (e visível para o dashboard) até a troca no fim da transação
+                _descartar_tabela(conn, NOME_TABELA_CARGA)
+                gravar_em_massa(df, conn, NOME_TABELA_CARGA)
+            intervalo = _finalizar_carga(conn, incremental, intervalo, marca_dagua,
+                                         executor=executor, num_workers=num_workers)
+        modo = "atualizada (incremental)" if incremental else "criada/atualizada"
+        print(f"Sucesso! Tabela otimizada {modo} com {len(df)} registros.")
+        return intervalo
     except Exception as e:
         print(f"ERRO na carga: {e}")
+        return None
+
+# --- MODO STREAMING (LOTES) ---
+# Cada etapa é um gerador: só um lote por vez fica em memória, então o pico de RAM
+# depende do 'chunksize' e não do tamanho da tabela de origem.
+
+def _registrar_vazao(estatisticas, etapa, linhas, segundos):
+    instrumentacao.REGISTRO.registrar(f"etl.lote.{etapa}", segundos, linhas)
+    if estatisticas is not None:
+        total = estatisticas.setdefault(etapa, [0, 0.0])
+        total[0] += linhas
+        total[1] += segundos
+
+def imprimir_vazao(estatisticas):
+    """Imprime linhas processadas, tempo e vazão (linhas/s) de cada etapa."""
+    print("Vazão por etapa:")
+    for etapa, (linhas, segundos) in estatisticas.items():
+        vazao = linhas / segundos if segundos > 0 else float('inf')
+        print(f"  {etapa:<24} {linhas:>12,} linhas em {segundos:8.2f}s ({vazao:,.0f} linhas/s)")
+
+def extrair_dados_em_lotes(conn, rowid_inicial=0, rowid_final=None, chunksize=TAMANHO_LOTE_PADRAO, estatisticas=None):
+    """Gera lotes de até 'chunksize' linhas da tabela de origem."""
+    consulta, parametros = _consulta_extracao(rowid_inicial, rowid_final)
+    lotes = pd.read_sql(consulta, conn, params=parametros, chunksize=chunksize)
+    while True:
+        inicio = time.perf_counter()
+        lote = next(lotes, None)
+        if lote is None:
+            return
+        _registrar_vazao(estatisticas, 'Extração', len(lote), time.perf_counter() - inicio)
+        yield lote
+
+def transformar_dados_em_lotes(lotes, estatisticas=None, executor=None, num_workers=1):
+    """Aplica 'transformar_dados' a cada lote recebido (em paralelo, se houver 'executor')."""
+    for lote in lotes:
+        inicio = time.perf_counter()
+        lote = transformar_dados_paralelo(lote, executor, num_workers, verbose=False)
+        if lote is None:
+            continue
+        _registrar_vazao(estatisticas, 'Transformação', len(lote), time.perf_counter() - inicio)
+        yield lote
+
+def carregar_dados_em_lotes(lotes, conn, incremental=False, marca_dagua=None, estatisticas=None, chunksize=TAMANHO_LOTE_PADRAO,
+                            executor=None, num_workers=1):
+    """
+    Grava os lotes na tabela de destino usando a conexão (e a transação) recebida.
+    No modo completo os lotes vão para a tabela de carga, trocada pela de destino no fim.
+    Retorna (total de linhas gravadas, intervalo de Timestamp afetado).
+    """
+    _ampliar_cache(conn)
+    # O SQLite não permite DROP TABLE com uma leitura pendente na mesma conexão,
+    # por isso as tabelas são removidas antes de consumir o primeiro lote.
+    _descartar_tabela(conn, NOME_TABELA_LOTE if incremental else NOME_TABELA_CARGA)
+    if incremental:
+        _preparar_usuarios_afetados(conn)
+
+    total = 0
+    intervalo = None
+    for lote in lotes:
+        inicio = time.perf_counter()
+        if incremental:
+            intervalo = _unir_intervalos(intervalo, _upsert_por_transaction_id(lote, conn))
+        else:
+            gravar_em_massa(lote, conn, NOME_TABELA_CARGA)
+        total += len(lote)
+        _registrar_vazao(estatisticas, 'Carga', len(lote), time.perf_counter() - inicio)
+
+    if incremental:
+        _descartar_tabela(conn, NOME_TABELA_LOTE)
+    if total > 0:
+        inicio = time.perf_counter()
+        intervalo = _finalizar_carga(conn, incremental, intervalo, marca_dagua, chunksize, executor, num_workers)
+        _registrar_vazao(estatisticas, 'Índices/Features/Rollups', total, time.perf_counter() - inicio)
+    elif marca_dagua is not None:
+        gravar_metadado(conn, CHAVE_MARCA_DAGUA, marca_dagua)
+    return total, intervalo
+
+def executar_etl_em_lotes(engine, rowid_inicial, rowid_final, incremental, chunksize, executor=None, num_workers=1):
+    """
+    Executa extração, transformação e carga lote a lote.
+    Leitura e escrita usam a mesma conexão e uma única transação: se algo falhar,
+    a tabela de destino e a marca d'água permanecem como estavam.
+    Retorna o intervalo de Timestamp afetado, ou None se nada foi carregado.
+    """
+    print(f"Iniciando ETL em lotes de {chunksize:,} linhas...")
+    estatisticas = {}
+    try:
+        with engine.begin() as conn:
+            lotes = extrair_dados_em_lotes(conn, rowid_inicial, rowid_final, chunksize, estatisticas)
+            lotes = transformar_dados_em_lotes(lotes, estatisticas, executor, num_workers)
+            total, intervalo = carregar_dados_em_lotes(lotes, conn, incremental, rowid_final, estatisticas, chunksize,
+                                                       executor, num_workers)
+        print(f"Sucesso! {total:,} registros processados em lotes.")
+        imprimir_vazao(estatisticas)
+        return intervalo
+    except Exception as e:
+        print(f"ERRO no ETL em lotes: {e}")
+        return None
+
+# --- CÓPIA COLUNAR (PARQUET) ---
+# A tabela de destino continua sendo a fonte da verdade; o Parquet é um espelho dela,
+# particionado por mês ('Ano_Mes=AAAA-MM'), que o dashboard lê via Arrow com memory-map.
+
+def _meses_do_intervalo(intervalo):
+    inicio = pd.Timestamp(intervalo[0]).to_period('M')
+    fim = pd.Timestamp(intervalo[1]).to_period('M')
+    return [str(mes) for mes in pd.period_range(inicio, fim, freq='M')]
+
+def _exportar_mes_parquet(engine, diretorio, mes, chunksize):
+    """
+    Reescreve a partição de um mês a partir da tabela de destino. Retorna o nº de linhas.
+    As máscaras de outliers ficam só no SQLite: o dashboard usa as contagens de NOME_TABELA_OUTLIERS.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    inicio = pd.Period(mes, freq='M').start_time
+    fim = inicio + pd.offsets.MonthBegin(1)
+    with engine.connect() as conn:
+        mascaras = set(motor_outliers.COLUNAS_FLAGS.values())
+        selecao = ", ".join(f'"{linha[1]}"' for linha in conn.execute(text(f"PRAGMA table_info({NOME_TABELA_DESTINO})"))
+                            if linha[1] not in mascaras)
+    consulta = text(
+        f"SELECT {selecao} FROM {NOME_TABELA_DESTINO} "
+        "WHERE Timestamp >= :inicio AND Timestamp < :fim ORDER BY Timestamp"
+    )
+    parametros = {'inicio': str(inicio.date()), 'fim': str(fim.date())}
+
+    pasta = os.path.join(diretorio, f"{COLUNA_PARTICAO}={mes}")
+    os.makedirs(pasta, exist_ok=True)
+    arquivo = os.path.join(pasta, "part-0.parquet")
+    temporario = arquivo + ".tmp"
+
+    total, escritor = 0, None
+    try:
+        with engine.connect() as conn:
+            for lote in pd.read_sql(consulta, conn, params=parametros, chunksize=chunksize):
+                lote['Timestamp'] = pd.to_datetime(lote['Timestamp'], format='ISO8601')
+                if escritor is None:
+                    tabela = pa.Table.from_pandas(lote, preserve_index=False)
+                    escritor = pq.ParquetWriter(temporario, tabela.schema, compression='zstd')
+                else:
+                    tabela = pa.Table.from_pandas(lote, schema=escritor.schema, preserve_index=False)
+                escritor.write_table(tabela)
+                total += len(lote)
+    finally:
+        if escritor is not None:
+            escritor.close()
+
+    if total == 0:
+        # O mês ficou vazio: remove a partição
+        shutil.rmtree(pasta, ignore_errors=True)
+    else:
+        os.replace(temporario, arquivo)
+    return total
+
+@instrumentacao.instrumentar('etl.exportar_parquet')
+def exportar_parquet(engine, diretorio=DIRETORIO_PARQUET, intervalo=None, chunksize=TAMANHO_LOTE_PADRAO):
+    """
+    Exporta a tabela de destino para Parquet particionado por mês.
+    - intervalo=None: reconstrói o diretório inteiro (em uma pasta nova, trocada no final).
+    - intervalo=(inicio, fim): reescreve apenas as partições dos meses afetados.
+    Retorna True se a cópia ficou igual à tabela de destino.
+    """
+    print(f"Iniciando exportação Parquet para '{diretorio}'...")
+    inicio = time.perf_counter()
+    try:
+        if intervalo is None:
+            with engine.connect() as conn:
+                intervalo = tuple(conn.execute(text(
+                    f"SELECT MIN(Timestamp), MAX(Timestamp) FROM {NOME_TABELA_DESTINO}"
+                )).one())
+            if intervalo[0] is None:
+                print("Nenhum dado para exportar.")
+                return False
+            novo = diretorio + ".novo"
+            shutil.rmtree(novo, ignore_errors=True)
+            total = sum(_exportar_mes_parquet(engine, novo, mes, chunksize) for mes in _meses_do_intervalo(intervalo))
+            antigo = diretorio + ".antigo"
+            shutil.rmtree(antigo, ignore_errors=True)
+            if os.path.exists(diretorio):
+                os.replace(diretorio, antigo)
+            os.replace(novo, diretorio)
+            shutil.rmtree(antigo, ignore_errors=True)
+        else:
+            total = sum(_exportar_mes_parquet(engine, diretorio, mes, chunksize) for mes in _meses_do_intervalo(intervalo))
+        segundos = time.perf_counter() - inicio
+        print(f"Sucesso! {total:,} registros exportados para Parquet em {segundos:.2f}s.")
+        return True
+    except Exception as e:
+        print(f"ERRO na exportação Parquet: {e}")
+        return False
+
+def parquet_em_dia(engine):
+    """Indica se a última exportação Parquet partiu da versão dos dados publicada agora."""
+    versao_parquet = ler_metadado(engine, CHAVE_VERSAO_PARQUET)
+    return versao_parquet is not None and versao_parquet == ler_metadado(engine, CHAVE_VERSAO_DADOS)
+
+# --- VERSÃO DOS DADOS ---
+# O dashboard consulta apenas a linha 'versao_dados' (um SELECT mínimo) para saber se os
+# dados mudaram; todos os caches dele usam essa versão como parte da chave.
+
+def calcular_checksum(conn):
+    """
+    Checksum barato do conteúdo publicado: esquema e agregados da tabela analítica e do rollup diário.
+    Não enxerga correções que só trocam valores de texto (Location, Transaction_Type, User_ID): por isso
+    a versão avança sempre que a carga grava linhas, e o checksum só decide quando nada foi gravado.
+    """
+    esquema = [linha[1] for linha in conn.execute(text(f"PRAGMA table_info({NOME_TABELA_DESTINO})"))]
+    agregados = conn.execute(text(
+        f"SELECT COUNT(*), MIN(Timestamp), MAX(Timestamp), ROUND(TOTAL(Transaction_Amount), 4), "
+        f"ROUND(TOTAL(Risk_Score), 4), TOTAL(Fraud_Label) FROM {NOME_TABELA_DESTINO}"
+    )).one()
+    rollup = conn.execute(text(f"SELECT COUNT(*), TOTAL(Total_Transacoes) FROM {NOME_TABELA_ROLLUP}")).one()
+    return hashlib.sha256(repr((esquema, tuple(agregados), tuple(rollup))).encode()).hexdigest()[:16]
+
+@instrumentacao.instrumentar('etl.publicar_versao')
+def publicar_versao(engine, dados_alterados=False, parquet_atualizado=False):
+    """
+    Publica a versão dos dados. É sempre o último passo do ETL (depois do Parquet), para que o
+    dashboard só troque de versão com todos os artefatos prontos.
+    - dados_alterados=True (a carga gravou linhas): a versão sempre avança.
+    - dados_alterados=False: só avança se o checksum mudou (ex.: a tabela foi alterada fora do ETL).
+    Com parquet_atualizado=True, grava também que a cópia Parquet corresponde a esta versão; o
+    dashboard só lê o Parquet quando essa marca é igual à versão publicada.
+    """
+    if not inspect(engine).has_table(NOME_TABELA_DESTINO):
+        return None
+    with engine.begin() as conn:
+        criar_tabela_metadados(conn)
+        atuais = dict(conn.execute(
+            text(f"SELECT chave, valor FROM {NOME_TABELA_METADADOS} WHERE chave IN (:versao, :checksum)"),
+            {'versao': CHAVE_VERSAO_DADOS, 'checksum': CHAVE_CHECKSUM_DADOS}
+        ).all())
+        versao = int(atuais.get(CHAVE_VERSAO_DADOS) or 0)
+        checksum = calcular_checksum(conn)
+        inalterado = not dados_alterados and checksum == atuais.get(CHAVE_CHECKSUM_DADOS)
+        if not inalterado:
+            versao += 1
+            gravar_metadado(conn, CHAVE_VERSAO_DADOS, versao)
+            gravar_metadado(conn, CHAVE_CHECKSUM_DADOS, checksum)
+        if parquet_atualizado:
+            gravar_metadado(conn, CHAVE_VERSAO_PARQUET, versao)
+    if inalterado:
+        print(f"Dados inalterados (checksum {checksum}): versão {versao} mantida.")
+    else:
+        print(f"Versão dos dados publicada: {versao} (checksum {checksum}).")
+    return versao
+
+@instrumentacao.instrumentar('etl.executar_etl')
+def executar_etl(engine, full_refresh=False, chunksize=None, diretorio_parquet=None, workers=1):
+    """
+    Executa o ETL. Por padrão roda de forma incremental, processando apenas as linhas
+    da origem acima da marca d'água. Com full_refresh=True reconstrói a tabela inteira.
+    Com 'chunksize' o processamento é feito em lotes (memória limitada).
+    Com 'diretorio_parquet' também atualiza a cópia em Parquet particionada por mês.
+    Com 'workers' > 1 a transformação e as features por usuário rodam em paralelo, particionadas por User_ID.
+    Ao final publica a nova versão dos dados (se alguma linha foi gravada).
+    """
+    marca_dagua = None if full_refresh else ler_metadado(engine, CHAVE_MARCA_DAGUA)
+    incremental = marca_dagua is not None and inspect(engine).has_table(NOME_TABELA_DESTINO)
+    rowid_final = obter_ultimo_rowid_origem(engine)
+    # Se a cópia Parquet ainda não existe, ou ficou para trás (uma execução sem --parquet mudou os
+    # dados depois da última exportação), ela é gerada por inteiro
+    parquet_completo = diretorio_parquet is not None and (
+        not incremental or not os.path.isdir(diretorio_parquet) or not parquet_em_dia(engine)
+    )
+
+    if incremental:
+        rowid_inicial = int(marca_dagua)
+        print(f"Modo incremental: processando linhas com rowid entre {rowid_inicial} e {rowid_final}.")
+        if rowid_final <= rowid_inicial:
+            print("Nenhum registro novo desde a última execução.")
+            parquet_atualizado = parquet_completo and exportar_parquet(
+                engine, diretorio_parquet, None, chunksize or TAMANHO_LOTE_PADRAO)
+            if parquet_atualizado or ler_metadado(engine, CHAVE_VERSAO_DADOS) is None:
+                publicar_versao(engine, parquet_atualizado=parquet_atualizado)
+            return
+    else:
+        rowid_inicial = 0
+        print("Modo completo (full refresh): reconstruindo a tabela de destino.")
+
+    with ProcessPoolExecutor(max_workers=workers) if workers > 1 else nullcontext() as executor:
+        if chunksize:
+            intervalo = executar_etl_em_lotes(engine, rowid_inicial, rowid_final, incremental, chunksize,
+                                              executor, workers)
+        else:
+            dados_brutos = extrair_dados(engine, rowid_inicial, rowid_final)
+            dados_transformados = transformar_dados_paralelo(dados_brutos, executor, workers)
+            intervalo = carregar_dados(dados_transformados, engine, incremental=incremental, marca_dagua=rowid_final,
+                                       executor=executor, num_workers=workers)
+
+    parquet_atualizado = False
+    if diretorio_parquet is not None and (intervalo is not None or parquet_completo):
+        parquet_atualizado = exportar_parquet(engine, diretorio_parquet, None if parquet_completo else intervalo,
+                                              chunksize or TAMANHO_LOTE_PADRAO)
+    elif diretorio_parquet is not None:
+        # Nada foi carregado: a cópia em dia continua em dia
+        parquet_atualizado = True
+
+    # Qualquer linha gravada (inclusive uma correção por upsert) gera uma nova versão
+    publicar_versao(engine, dados_alterados=intervalo is not None, parquet_atualizado=parquet_atualizado)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ETL da tabela analítica do dashboard.")
+    parser.add_argument("--full-refresh", action="store_true",
+                        help="Reconstrói a tabela de destino inteira em vez de processar só as linhas novas.")
+    parser.add_argument("--chunksize", type=int, nargs="?", const=TAMANHO_LOTE_PADRAO, default=None,
+                        help=f"Processa em lotes de N linhas (streaming). Sem valor usa {TAMANHO_LOTE_PADRAO:,}.")
+    parser.add_argument("--parquet", nargs="?", const=DIRETORIO_PARQUET, default=None, metavar="DIRETORIO",
+                        help=f"Também grava a cópia em Parquet particionada por mês (padrão: '{DIRETORIO_PARQUET}').")
+    parser.add_argument("--workers", type=int, nargs="?", const=os.cpu_count(), default=1,
+                        help="Nº de processos na transformação e nas features (particionadas por User_ID). Sem valor usa todos os núcleos.")
+    args = parser.parse_args()
+
     print("--- Iniciando processo de ETL ---")
     start_time = time.time()
     
-    db_engine = create_engine(DB_URL)
+    db_engine = criar_engine(DB_URL)
     
     # Executa os 3 passos
-    dados_brutos = extrair_dados(db_engine)
-    dados_transformados = transformar_dados(dados_brutos)
-    carregar_dados(dados_transformados, db_engine)
+    executar_etl(db_engine, full_refresh=args.full_refresh, chunksize=args.chunksize,
+                 diretorio_parquet=args.parquet, workers=args.workers)
     
     end_time = time.time()
-    print(f"--- Processo de ETL concluído em {end_time - start_time:.2f} segundos ---")
\ No newline at end of file
+    print(f"--- Processo de ETL concluído em {end_time - start_time:.2f} segundos ---")
+
+    # Tempo, linhas e memória de cada etapa; o arquivo .prom é lido pelo textfile collector do node_exporter
+    resumo = instrumentacao.REGISTRO.resumo()
+    print(resumo[['Operacao', 'Chamadas', 'Total_s', 'Linhas', 'Linhas_por_s', 'Ultima_Memoria_MB']].to_string(
+        index=False, float_format=lambda valor: f"{valor:,.2f}", na_rep="-",
+        formatters={'Linhas': lambda valor: "-" if pd.isna(valor) else f"{valor:,.0f}"}))
+    instrumentacao.REGISTRO.exportar_prometheus(instrumentacao.ARQUIVO_METRICAS_ETL, 'etl')
+    print(f"Métricas gravadas em '{instrumentacao.ARQUIVO_METRICAS_ETL}'.")
\ No newline at end of file
@@ -0,0 +1,91 @@
+# func/cardinalidade.py
+import numpy as np
+import pandas as pd
+
+# --- CONFIGURAÇÕES ---
+# Contagem aproximada de distintos com HyperLogLog (Flajolet et al., 2007) sobre hashes de 64 bits.
+# Com PRECISAO = p há m = 2^p registradores; o erro padrão relativo da estimativa é 1,04 / sqrt(m)
+# e não depende do nº de distintos (em conjuntos pequenos a correção por linear counting é ainda melhor).
+PRECISAO = 12
+NUM_REGISTRADORES = 1 << PRECISAO
+ERRO_PADRAO = 1.04 / np.sqrt(NUM_REGISTRADORES)  # ≈ 1,6%
+Z_CONFIANCA = 1.96                               # Margem de erro com ~95% de confiança
+BITS_RHO = 8                                     # O sketch serializado guarda (registrador << 8) | rho
+
+# Um sketch é esparso: só os registradores não nulos, como uint32 little-endian ordenados.
+# Grupos pequenos (poucos usuários em um dia/local/tipo) ocupam poucos bytes, e a união de
+# vários sketches é um único np.frombuffer sobre os blobs concatenados.
+
+
+def hash_valores(valores):
+    """Hash de 64 bits (SipHash com chave fixa do pandas): o mesmo valor dá o mesmo hash em qualquer execução."""
+    return pd.util.hash_array(np.asarray(valores, dtype=object))
+
+
+def posicoes(hashes):
+    """
+    Registrador (os p bits baixos) e rho (posição do primeiro bit 1 no restante do hash) de cada hash.
+    O rho é exato: o bit menos significativo é isolado (w & -w) e o log2 de uma potência de 2 não arredonda.
+    """
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    registrador = (hashes & np.uint64(NUM_REGISTRADORES - 1)).astype(np.int64)
+    resto = hashes >> np.uint64(PRECISAO)
+    menor_bit = resto & (~resto + np.uint64(1))
+    rho = np.log2(np.where(resto == 0, np.uint64(1), menor_bit).astype(np.float64)).astype(np.int64) + 1
+    rho[resto == 0] = 64 - PRECISAO + 1
+    return registrador, rho
+
+
+def acumular(grupos, hashes, acumulado=None):
+    """
+    Registradores de vários sketches de uma vez: 'grupos' traz o código inteiro (>= 0) do grupo de
+    cada hash. Fica só o maior rho por (grupo, registrador), então o resultado não cresce com o nº de
+    linhas e lotes sucessivos podem ser somados passando o 'acumulado' anterior.
+    Retorna (chaves, rho) com chave = grupo * NUM_REGISTRADORES + registrador, em ordem crescente.
+    """
+    registrador, rho = posicoes(hashes)
+    chaves = np.asarray(grupos, dtype=np.int64) * NUM_REGISTRADORES + registrador
+    if acumulado is not None:
+        chaves, rho = np.concatenate([acumulado[0], chaves]), np.concatenate([acumulado[1], rho])
+    # Uma ordenação de chave * 64 + rho deixa o maior rho de cada chave no fim do seu bloco
+    combinado = np.unique(chaves * 64 + rho)
+    chaves = combinado >> 6
+    ultimo = np.append(chaves[1:] != chaves[:-1], True)[:len(chaves)]
+    return chaves[ultimo], combinado[ultimo] & 63
+
+
+def serializar(acumulado, num_grupos):
+    """Um sketch serializado (bytes) por grupo, a partir de 'acumular'. Grupos sem dados viram b''."""
+    chaves, rho = acumulado
+    grupos = chaves // NUM_REGISTRADORES
+    codigos = (((chaves % NUM_REGISTRADORES) << BITS_RHO) | rho).astype('<u4')
+    fronteiras = np.searchsorted(grupos, np.arange(num_grupos + 1))
+    return [codigos[inicio:fim].tobytes() for inicio, fim in zip(fronteiras[:-1], fronteiras[1:])]
+
+
+def unir(sketches):
+    """União de sketches serializados: o maior rho de cada registrador. Retorna os m registradores (uint8)."""
+    codigos = np.frombuffer(b"".join(sketches), dtype='<u4')
+    registros = np.zeros(NUM_REGISTRADORES, dtype=np.uint8)
+    np.maximum.at(registros, codigos >> BITS_RHO, (codigos & ((1 << BITS_RHO) - 1)).astype(np.uint8))
+    return registros
+
+
+def estimar(registros):
+    """Estimativa do nº de distintos a partir dos registradores (com linear counting nos conjuntos pequenos)."""
+    m = NUM_REGISTRADORES
+    alfa = 0.7213 / (1 + 1.079 / m)
+    estimativa = alfa * m * m / np.sum(np.ldexp(1.0, -registros.astype(np.int64)))
+    vazios = int(np.count_nonzero(registros == 0))
+    if estimativa <= 2.5 * m and vazios > 0:
+        estimativa = m * np.log(m / vazios)
+    return float(estimativa)
+
+
+def contar_distintos(sketches):
+    """
+    Nº aproximado de distintos na união dos sketches e a margem de erro (~95%: Z_CONFIANCA x ERRO_PADRAO).
+    Retorna (estimativa, margem).
+    """
+    estimativa = estimar(unir(sketches))
+    return estimativa, float(Z_CONFIANCA * ERRO_PADRAO * estimativa)
@@ -0,0 +1,163 @@
+# func/codificacao.py
+import json
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+# --- CONFIGURAÇÕES ---
+MAX_CATEGORIAS_POR_COLUNA = 500  # Categorias mais frequentes mantidas; as demais vão para '<coluna>__outras'
+SUFIXO_OUTRAS = "__outras"
+
+
+def _codigos_categoria(categorias, valores):
+    """Posição de cada valor no vocabulário (-1 para nulos e categorias desconhecidas)."""
+    if isinstance(valores.dtype, pd.CategoricalDtype):
+        # Mapeia só as categorias do dtype e depois espalha pelos códigos
+        mapa = categorias.get_indexer(valores.cat.categories.astype(str))
+        codigos = valores.cat.codes.to_numpy()
+        return np.where(codigos >= 0, mapa[codigos], -1)
+    if valores.dtype == object:
+        return categorias.get_indexer(valores)
+    return categorias.get_indexer(valores.astype(str).where(valores.notna()))
+
+
+def _montar_csr(indices, dados, num_colunas):
+    """CSR a partir de blocos (linhas x entradas); entradas NaN são omitidas (= valor ausente no XGBoost)."""
+    presentes = ~np.isnan(dados)
+    indptr = np.zeros(len(dados) + 1, dtype=np.int64)
+    np.cumsum(presentes.sum(axis=1), out=indptr[1:])
+    # A máscara booleana percorre em ordem de linha, e os índices de cada linha já estão crescentes
+    return sp.csr_matrix((dados[presentes], indices[presentes], indptr), shape=(len(dados), num_colunas))
+
+
+def _montar_denso(indices, dados, num_colunas):
+    """Mesma matriz de '_montar_csr' em formato denso, com NaN nas entradas ausentes."""
+    presentes = ~np.isnan(dados)
+    matriz = np.full((len(dados), num_colunas), np.nan, dtype=np.float32)
+    linhas = np.broadcast_to(np.arange(len(dados))[:, None], dados.shape)
+    matriz[linhas[presentes], indices[presentes]] = dados[presentes]
+    return matriz
+
+
+class CodificadorOneHot:
+    """
+    One-hot esparso com vocabulário fixo, no lugar de pd.get_dummies.
+    - ajustar(df) aprende uma vez as colunas numéricas e o vocabulário (ordenado) de cada coluna
+      categórica, limitado às 'max_categorias' mais frequentes. Cada coluna categórica ganha
+      ainda uma coluna '<coluna>__outras' para categorias raras ou não vistas no treino.
+    - transformar(df) devolve uma matriz scipy.sparse CSR float32 com uma entrada por coluna
+      numérica e uma por coluna categórica em cada linha. Zeros numéricos são gravados
+      explicitamente; NaN e categorias nulas ficam de fora (ausentes para o XGBoost).
+    O layout depende só do vocabulário, não da ordem ou do tamanho dos dados.
+    Com denso=True a mesma matriz sai como array NumPy (NaN = ausente), útil para poucas colunas.
+    """
+
+    def __init__(self, numericas=None, categoricas=None):
+        self.numericas = list(numericas or [])
+        self.categoricas = {col: list(valores) for col, valores in (categoricas or {}).items()}
+        self._preparar()
+
+    def _preparar(self):
+        self.colunas = list(self.numericas)
+        self._inicio = {}
+        self._indices = {}
+        self._mapas = {}
+        for col, valores in self.categoricas.items():
+            self._inicio[col] = len(self.colunas)
+            self.colunas += [f"{col}_{valor}" for valor in valores] + [f"{col}{SUFIXO_OUTRAS}"]
+            self._indices[col] = pd.Index(valores)
+            self._mapas[col] = {valor: i for i, valor in enumerate(valores)}
+
+    @property
+    def num_colunas(self):
+        return len(self.colunas)
+
+    def ajustar(self, df: pd.DataFrame, ignorar=(), max_categorias=MAX_CATEGORIAS_POR_COLUNA):
+        """Aprende o layout a partir de 'df', descartando as colunas em 'ignorar'."""
+        return self.ajustar_lotes([df], ignorar, max_categorias)
+
+    def ajustar_lotes(self, lotes, ignorar=(), max_categorias=MAX_CATEGORIAS_POR_COLUNA):
+        """
+        Como 'ajustar', somando as contagens de categorias lote a lote: os dados não precisam
+        caber na memória. O esquema (numéricas x categóricas) vem do primeiro lote.
+        """
+        contagens = None
+        for lote in lotes:
+            base = lote.drop(columns=list(ignorar), errors='ignore')
+            if contagens is None:
+                colunas_categoricas = base.select_dtypes(include=['object', 'category', 'string']).columns
+                self.numericas = [col for col in base.columns if col not in colunas_categoricas]
+                contagens = {col: pd.Series(dtype='int64') for col in colunas_categoricas}
+            for col in contagens:
+                contagem = base[col].value_counts()
+                contagem.index = contagem.index.astype(str)
+                contagens[col] = contagens[col].add(contagem, fill_value=0)
+        self.categoricas = {}
+        for col, contagem in (contagens or {}).items():
+            # Ordena antes do corte para o desempate entre contagens iguais não depender da ordem dos lotes
+            contagem = contagem[contagem > 0].sort_index()
+            if len(contagem) > max_categorias:
+                contagem = contagem.nlargest(max_categorias)
+            self.categoricas[col] = sorted(contagem.index)
+        self._preparar()
+        return self
+
+    def transformar(self, df: pd.DataFrame, denso=False):
+        """CSR (linhas x colunas) para um DataFrame; colunas ausentes viram valores ausentes."""
+        n = len(df)
+        entradas = len(self.numericas) + len(self.categoricas)
+        indices = np.empty((n, entradas), dtype=np.int32)
+        dados = np.empty((n, entradas), dtype=np.float32)
+        for j, col in enumerate(self.numericas):
+            indices[:, j] = j
+            if col in df.columns:
+                dados[:, j] = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float32, na_value=np.nan)
+            else:
+                dados[:, j] = np.nan
+        for j, (col, valores) in enumerate(self.categoricas.items(), start=len(self.numericas)):
+            if col not in df.columns:
+                indices[:, j], dados[:, j] = 0, np.nan
+                continue
+            codigos = _codigos_categoria(self._indices[col], df[col])
+            # Desconhecidas vão para a coluna '__outras' (última do bloco); nulas ficam ausentes
+            indices[:, j] = self._inicio[col] + np.where(codigos >= 0, codigos, len(valores))
+            dados[:, j] = np.where(df[col].isna().to_numpy(), np.nan, 1.0)
+        return (_montar_denso if denso else _montar_csr)(indices, dados, self.num_colunas)
+
+    def transformar_registros(self, registros, denso=False):
+        """Mesma matriz de 'transformar', a partir de uma lista de dicionários (sem criar DataFrame)."""
+        entradas = len(self.numericas) + len(self.categoricas)
+        indices = np.zeros((len(registros), entradas), dtype=np.int32)
+        dados = np.full((len(registros), entradas), np.nan, dtype=np.float32)
+        indices[:, :len(self.numericas)] = np.arange(len(self.numericas))
+        categoricas = [(col, self._mapas[col], self._inicio[col], len(valores)) for col, valores in self.categoricas.items()]
+        for i, registro in enumerate(registros):
+            linha_dados = dados[i]
+            for j, col in enumerate(self.numericas):
+                valor = registro.get(col)
+                if valor is not None:
+                    linha_dados[j] = valor
+            for j, (col, mapa, inicio, outras) in enumerate(categoricas, start=len(self.numericas)):
+                valor = registro.get(col)
+                if valor is None or valor != valor:  # None ou NaN: categoria ausente
+                    continue
+                indices[i, j] = inicio + mapa.get(str(valor), outras)
+                linha_dados[j] = 1.0
+        return (_montar_denso if denso else _montar_csr)(indices, dados, self.num_colunas)
+
+    def para_dict(self):
+        return {'numericas': self.numericas, 'categoricas': self.categoricas}
+
+    @classmethod
+    def de_dict(cls, conteudo):
+        return cls(conteudo['numericas'], conteudo['categoricas'])
+
+    def salvar(self, caminho):
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump(self.para_dict(), f, ensure_ascii=False)
+
+    @classmethod
+    def carregar(cls, caminho):
+        with open(caminho, encoding='utf-8') as f:
+            return cls.de_dict(json.load(f))
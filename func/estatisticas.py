@@ -0,0 +1,192 @@
+# func/estatisticas.py
+import hashlib
+import json
+import math
+
+import numpy as np
+import pandas as pd
+
+from func import outliers as motor_outliers
+
+# --- CONFIGURAÇÕES ---
+LIMITE_MODO_APROXIMADO = 1_000_000  # A partir daqui a página sugere o modo aproximado
+TAMANHO_AMOSTRA_PADRAO = 200_000    # Tamanho do reservatório no modo aproximado
+NIVEL_CONFIANCA = 0.95
+Z_CONFIANCA = 1.96                  # Quantil da normal para 95%
+TOP_CATEGORIAS = 15
+
+
+def assinatura_dados(df: pd.DataFrame):
+    """
+    Assinatura barata de uma versão dos dados: nº de linhas, Timestamp máximo e esquema.
+    Usada como chave de cache (estatísticas, modelos) sem precisar fazer hash do DataFrame.
+    """
+    esquema = [(col, str(tipo)) for col, tipo in df.dtypes.items()]
+    max_timestamp = str(df['Timestamp'].max()) if 'Timestamp' in df.columns and not df.empty else None
+    return {
+        'linhas': int(len(df)),
+        'max_timestamp': max_timestamp,
+        'esquema': hashlib.sha256(json.dumps(esquema).encode()).hexdigest(),
+    }
+
+
+def versao_dados(df: pd.DataFrame):
+    """Versão dos dados: a publicada junto com o DataFrame (df.attrs), ou um hash curto da assinatura."""
+    if df.attrs.get('versao_dados'):
+        return df.attrs['versao_dados']
+    return hashlib.sha256(json.dumps(assinatura_dados(df), sort_keys=True).encode()).hexdigest()[:16]
+
+
+def amostrar_reservatorio(lotes, tamanho, semente=42):
+    """
+    Amostragem por reservatório (Algoritmo R, vetorizado por lote): devolve uma amostra
+    uniforme de até 'tamanho' linhas de uma sequência de DataFrames, sem conhecer o total.
+    Retorna (amostra, total_de_linhas_vistas).
+    """
+    rng = np.random.default_rng(semente)
+    reservatorio = None
+    vistos = 0
+    for lote in lotes:
+        n = len(lote)
+        if n == 0:
+            continue
+        if reservatorio is None:
+            reservatorio = lote.iloc[:0].copy()
+        # Preenche o reservatório enquanto houver espaço
+        faltam = max(tamanho - len(reservatorio), 0)
+        if faltam:
+            reservatorio = pd.concat([reservatorio, lote.iloc[:faltam]], ignore_index=True)
+        restante = lote.iloc[faltam:]
+        if len(restante):
+            # A i-ésima linha global (base 1) entra com probabilidade tamanho / i, na posição sorteada
+            posicoes_globais = vistos + faltam + np.arange(1, len(restante) + 1)
+            sorteio = (rng.random(len(restante)) * posicoes_globais).astype(np.int64)
+            entram = np.flatnonzero(sorteio < tamanho)
+            if len(entram):
+                # Quando duas linhas do lote caem na mesma posição, vale a última (como no algoritmo sequencial)
+                destinos = sorteio[entram]
+                _, ultimos = np.unique(destinos[::-1], return_index=True)
+                selecionados = entram[::-1][ultimos]
+                # A ordem dentro do reservatório é irrelevante: descarta as posições sorteadas e anexa as novas linhas
+                manter = np.ones(len(reservatorio), dtype=bool)
+                manter[sorteio[selecionados]] = False
+                reservatorio = pd.concat([reservatorio[manter], restante.iloc[selecionados]], ignore_index=True)
+        vistos += n
+    if reservatorio is None:
+        return pd.DataFrame(), 0
+    return reservatorio, vistos
+
+
+def _em_lotes(df, tamanho_lote=500_000):
+    for inicio in range(0, len(df), tamanho_lote):
+        yield df.iloc[inicio:inicio + tamanho_lote]
+
+
+def margem_quantil(tamanho_amostra, confianca=NIVEL_CONFIANCA):
+    """
+    Erro máximo de posto dos quantis estimados por amostra (desigualdade DKW):
+    com a confiança dada, o quantil amostral q está entre os quantis verdadeiros q ± margem.
+    """
+    if tamanho_amostra <= 0:
+        return 1.0
+    return math.sqrt(math.log(2 / (1 - confianca)) / (2 * tamanho_amostra))
+
+
+def _estatisticas_numericas(df_numerico, df_completo, aproximado, tamanho_populacao):
+    """Média/mediana/desvio/IQR/outliers de todas as colunas numéricas de uma vez."""
+    # Média e desvio são O(n) e calculados sempre sobre os dados completos
+    medias = df_completo.mean()
+    desvios = df_completo.std()
+    minimos = df_completo.min()
+    maximos = df_completo.max()
+    contagens = df_completo.count()
+
+    # Quantis (baseados em ordenação) usam a amostra no modo aproximado: o motor de outliers faz
+    # todas as colunas em uma passada sobre a matriz e devolve limites e contagens juntos
+    colunas = list(df_numerico.columns)
+    valores = df_numerico.to_numpy(dtype=np.float64, na_value=np.nan)
+    limites = motor_outliers.calcular_limites(valores, colunas, metodos=('iqr',)).set_index('Coluna')
+    mascara = motor_outliers.marcar_outliers(valores, limites.reset_index(), metodos=('iqr',))['iqr']
+    fora = pd.Series(motor_outliers.contar_outliers(mascara, len(colunas)), index=colunas)
+    q1, mediana, q3, iqr = limites['Q1'], limites['Mediana'], limites['Q3'], limites['IQR']
+    limite_inferior = limites[motor_outliers.coluna_limite('iqr', 'Inferior')]
+    limite_superior = limites[motor_outliers.coluna_limite('iqr', 'Superior')]
+
+    n = len(df_numerico)
+    resultado = {}
+    for col in df_numerico.columns:
+        if aproximado and n > 0:
+            p = fora[col] / n
+            n_outliers = p * tamanho_populacao
+            margem_outliers = Z_CONFIANCA * math.sqrt(p * (1 - p) / n) * tamanho_populacao
+        else:
+            n_outliers, margem_outliers = float(fora[col]), 0.0
+        resultado[col] = {
+            'media': medias[col],
+            'mediana': mediana[col],
+            'desvio_padrao': desvios[col],
+            'q1': q1[col],
+            'q3': q3[col],
+            'iqr': iqr[col],
+            'limite_inferior': limite_inferior[col],
+            'limite_superior': limite_superior[col],
+            'num_outliers': n_outliers,
+            'margem_outliers': margem_outliers,
+        }
+
+    resumo = pd.DataFrame({
+        'count': contagens, 'mean': medias, 'std': desvios, 'min': minimos,
+        '25%': q1, '50%': mediana, '75%': q3, 'max': maximos,
+    }).T
+    return resultado, resumo
+
+
+def _estatisticas_categoricas(df_categorico, fator_expansao=1.0):
+    resultado = {}
+    for col in df_categorico.columns:
+        contagem = df_categorico[col].value_counts()
+        contagem = contagem[contagem > 0]
+        if fator_expansao != 1.0:
+            # No modo aproximado as contagens da amostra são projetadas para o total
+            contagem = (contagem * fator_expansao).round().astype('int64')
+        resultado[col] = {
+            'num_categorias': int(len(contagem)),
+            'moda': contagem.index[0] if len(contagem) else None,
+            'top': contagem.head(TOP_CATEGORIAS),
+        }
+    return resultado
+
+
+def calcular_estatisticas_eda(df: pd.DataFrame, aproximado=False, tamanho_amostra=TAMANHO_AMOSTRA_PADRAO, semente=42):
+    """
+    Calcula de uma vez todas as estatísticas da página de EDA.
+    - aproximado=True: quantis, medianas, outliers e categorias usam uma amostra por
+      reservatório de 'tamanho_amostra' linhas; médias, desvios, mínimos/máximos e
+      correlações continuam exatos. As margens de erro vêm em 'erro'.
+    """
+    colunas_numericas = df.select_dtypes(include=np.number).columns.tolist()
+    colunas_categoricas = df.select_dtypes(include=['object', 'category']).columns.tolist()
+
+    amostra = df
+    aproximado = aproximado and len(df) > tamanho_amostra
+    if aproximado:
+        amostra, _ = amostrar_reservatorio(_em_lotes(df), tamanho_amostra, semente)
+
+    numericas, resumo = _estatisticas_numericas(
+        amostra[colunas_numericas], df[colunas_numericas], aproximado, len(df)
+    )
+
+    return {
+        'linhas': len(df),
+        'tipos': pd.DataFrame({'Nome da Coluna': df.columns, 'Tipo de Dado': df.dtypes.astype(str).values}),
+        'resumo': resumo,
+        'correlacao': df[colunas_numericas].corr(),
+        'numericas': numericas,
+        'categoricas': _estatisticas_categoricas(amostra[colunas_categoricas], len(df) / max(len(amostra), 1)),
+        'aproximado': aproximado,
+        'erro': {
+            'tamanho_amostra': len(amostra),
+            'margem_quantil': margem_quantil(len(amostra)) if aproximado else 0.0,
+            'confianca': NIVEL_CONFIANCA,
+        },
+    }
@@ -0,0 +1,120 @@
+# func/features.py
+import numpy as np
+import pandas as pd
+
+# --- CONFIGURAÇÕES ---
+# Janelas móveis por usuário (em segundos). Cada janela gera Qtd/Soma/Média do valor.
+JANELAS = {
+    '1h': 3600,
+    '24h': 24 * 3600,
+    '7d': 7 * 24 * 3600,
+}
+
+
+def colunas_features(janelas=JANELAS):
+    """Nomes das colunas geradas por 'calcular_features_usuario', na ordem em que são criadas."""
+    colunas = ['Segundos_Desde_Ultima', 'Media_Gasto_Usuario', 'Valor_Relativo_Media']
+    for nome in janelas:
+        colunas += [f'Qtd_Transacoes_{nome}', f'Soma_Valor_{nome}', f'Media_Valor_{nome}']
+    return colunas
+
+
+def _somas_acumuladas_por_usuario(valores, deslocamento):
+    """
+    Soma acumulada (inclusive) que recomeça em cada usuário, em precisão estendida. 'valores' vem
+    ordenado por usuário e 'deslocamento' é a posição de cada linha dentro do seu usuário.
+    Cada usuário vira uma linha de uma matriz completada com zeros e o cumsum corre por linha, então a
+    soma de um usuário não depende dos outros da entrada. Os usuários são agrupados pela potência de 2
+    do nº de transações: a matriz de cada grupo tem no máximo o dobro das posições das suas linhas.
+    """
+    inicios = np.flatnonzero(deslocamento == 0)
+    tamanhos = np.diff(np.append(inicios, len(valores)))
+    classes = np.ceil(np.log2(tamanhos)).astype(np.int64)
+    classe_linha = np.repeat(classes, tamanhos)
+    somas = np.empty(len(valores), dtype=np.longdouble)
+    for classe in np.unique(classes):
+        linhas = np.flatnonzero(classe_linha == classe)
+        tamanhos_classe = tamanhos[classes == classe]
+        usuario = np.repeat(np.arange(len(tamanhos_classe)), tamanhos_classe)
+        matriz = np.zeros((len(tamanhos_classe), 1 << int(classe)), dtype=np.longdouble)
+        matriz[usuario, deslocamento[linhas]] = valores[linhas]
+        np.cumsum(matriz, axis=1, out=matriz)
+        somas[linhas] = matriz[usuario, deslocamento[linhas]]
+    return somas
+
+
+def calcular_features_usuario(usuarios, timestamps, valores, janelas=JANELAS, desempate=None):
+    """
+    Features comportamentais por usuário, sem groupby-apply: uma ordenação (usuário, tempo) e
+    depois apenas operações vetorizadas (searchsorted + somas acumuladas segmentadas).
+    - usuarios: chaves dos usuários (qualquer tipo; ex.: User_ID ou um hash dele).
+    - timestamps: datetime64 (ou algo que pd.to_datetime entenda). Resolução de segundos.
+    - valores: valor de cada transação.
+    - desempate: chave opcional (ex.: hash do Transaction_ID) que ordena transações do mesmo
+      usuário no mesmo segundo. Sem ela, empates seguem a ordem de entrada.
+    Cada janela cobre (t - janela, t], incluindo a própria transação. Retorna um DataFrame na
+    mesma ordem da entrada:
+    - Segundos_Desde_Ultima: tempo desde a transação anterior do usuário (NaN na primeira).
+    - Media_Gasto_Usuario: média do valor até a transação atual, inclusive (média expansível).
+    - Valor_Relativo_Media: valor / média das transações anteriores do usuário (NaN na primeira
+      ou se a média anterior for zero).
+    - Qtd_Transacoes_<j>, Soma_Valor_<j>, Media_Valor_<j>: contagem, soma e média na janela j.
+    """
+    codigos, _ = pd.factorize(np.asarray(usuarios))
+    segundos = pd.to_datetime(timestamps).to_numpy(dtype='datetime64[s]').astype(np.int64)
+    n = len(codigos)
+    saida = {col: np.empty(n, dtype=np.int32 if col.startswith('Qtd_') else np.float64)
+             for col in colunas_features(janelas)}
+    if n == 0:
+        return pd.DataFrame(saida)
+
+    # 1) Uma única ordenação por (usuário, tempo[, desempate]); o lexsort é estável
+    chaves = (segundos, codigos) if desempate is None else (np.asarray(desempate), segundos, codigos)
+    ordem = np.lexsort(chaves)
+    del chaves
+    u, t = codigos[ordem], segundos[ordem]
+    v = np.nan_to_num(np.asarray(valores, dtype=np.float64)[ordem])
+    del codigos, segundos
+
+    def gravar(coluna, valores_ordenados):
+        # Devolve à ordem original das linhas, direto no array de saída
+        saida[coluna][ordem] = valores_ordenados
+
+    # Chave composta monotônica: usuário nos 32 bits altos, tempo relativo nos baixos.
+    # Assim um único searchsorted encontra o início da janela sem atravessar para outro usuário.
+    chave = (u.astype(np.int64) << 32) | (t - t.min())
+    posicao = np.arange(n)
+    inicio_usuario = np.searchsorted(u, u, side='left')
+    # Soma acumulada em precisão estendida: as somas das janelas saem de diferenças entre prefixos, e em
+    # float64 o cancelamento introduz erro relativo visível em janelas pequenas. Ela recomeça em cada
+    # usuário: com um prefixo global, as somas de um usuário mudariam na última casa conforme quem vem
+    # antes dele na entrada (os baldes do ETL, os usuários afetados no incremental).
+    soma_acumulada = _somas_acumuladas_por_usuario(v, posicao - inicio_usuario)
+
+    mesmo_usuario = np.r_[False, u[1:] == u[:-1]]
+    delta = np.full(n, np.nan)
+    delta[mesmo_usuario] = (t[1:] - t[:-1])[mesmo_usuario[1:]]
+    gravar('Segundos_Desde_Ultima', delta)
+    del delta, mesmo_usuario, t, u
+
+    # Médias expansíveis a partir das somas acumuladas segmentadas por usuário
+    qtd_ate_atual = posicao - inicio_usuario + 1
+    soma_ate_atual = soma_acumulada.astype(np.float64)
+    gravar('Media_Gasto_Usuario', soma_ate_atual / qtd_ate_atual)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media_anterior = (soma_ate_atual - v) / (qtd_ate_atual - 1)
+        gravar('Valor_Relativo_Media', np.where((qtd_ate_atual > 1) & (media_anterior > 0), v / media_anterior, np.nan))
+    del soma_ate_atual, media_anterior, qtd_ate_atual
+
+    for nome, largura in janelas.items():
+        # Primeira posição cuja chave é > chave - largura: dentro do mesmo usuário e da janela
+        inicio = np.maximum(np.searchsorted(chave, chave - largura, side='right'), inicio_usuario)
+        qtd = posicao - inicio + 1
+        # Soma da janela: prefixo atual menos o de antes do início (zero se a janela começa no usuário)
+        soma = (soma_acumulada - np.where(inicio > inicio_usuario, soma_acumulada[inicio - 1], 0)).astype(np.float64)
+        gravar(f'Qtd_Transacoes_{nome}', qtd)
+        gravar(f'Soma_Valor_{nome}', soma)
+        gravar(f'Media_Valor_{nome}', soma / qtd)
+        del inicio, qtd, soma
+
+    return pd.DataFrame(saida, copy=False)
@@ -1,136 +1,639 @@
 # func/api_dados.py
-import folium
+import functools
+import inspect
+import os
 import pandas as pd
 import numpy as np
 import streamlit as st
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from func import cardinalidade
+from func import estatisticas
+from func import instrumentacao
+from func import kpis as motor_kpis
+from func import outliers as motor_outliers
 
-@st.cache_data
-def carregar_dados():
+# --- CONFIGURAÇÕES DE ACESSO AOS DADOS ---
+DB_URL = 'sqlite:///creditdata.db'
+NOME_TABELA_ANALITICA = 'analytics_dashboard'  # Tabela gerada pelo etl.py
+NOME_TABELA_ORIGEM = 'TransacoesCompletas'     # Usada apenas se o ETL ainda não rodou
+NOME_TABELA_ROLLUP = 'analytics_rollup_diario' # Agregados diários gerados pelo etl.py
+NOME_TABELA_METADADOS = 'etl_metadados'        # Metadados publicados pelo etl.py
+NOME_TABELA_OUTLIERS = 'analytics_outliers'    # Limites e contagens de outliers gravados pelo etl.py
+NOME_TABELA_SKETCHES = 'analytics_sketches_usuarios' # Sketches HyperLogLog de User_ID gerados pelo etl.py
+LIMITE_CONTAGEM_EXATA = 50_000                 # Recortes com até essas transações contam usuários distintos exatamente
+CHAVE_VERSAO_DADOS = 'versao_dados'            # Versão monotônica publicada ao final de cada ETL
+CHAVE_CHECKSUM_DADOS = 'checksum_dados'
+CHAVE_VERSAO_PARQUET = 'versao_parquet'        # Versão dos dados da qual a cópia Parquet foi exportada
+INTERVALO_VERIFICACAO_VERSAO = 15              # Segundos entre consultas à versão publicada
+MAX_ENTRADAS_CACHE = 64                        # Limite padrão dos caches por versão (descarta versões antigas)
+DIRETORIO_PARQUET = 'dados_parquet'            # Cópia Parquet gerada por 'etl.py --parquet' (opcional)
+COLUNA_PARTICAO = 'Ano_Mes'
+
+# Colunas que cada página precisa (projeção): só elas são lidas do banco
+COLUNAS_DIRECIONADA = ['Failed_Transaction_Count_7d', 'Risk_Score', 'Fraud_Label']
+
+# Tipos compactos aplicados após a leitura
+TIPOS_COMPACTOS = {
+    'Transaction_Type': 'category',
+    'Location': 'category',
+    'Fraud_Label': 'int8',
+    'Risk_Score': 'float32',
+    'Hora_do_Dia': 'int8',
+    'Dia_da_Semana': 'int8',
+    'Mes': 'int8',
+}
+
+@st.cache_resource
+def obter_engine():
+    """Engine compartilhado por todas as sessões (mantém o pool de conexões)."""
+    return create_engine(DB_URL)
+
+def _tabela_existe(engine, nome_tabela):
+    with engine.connect() as conn:
+        return conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :nome"), {'nome': nome_tabela}
+        ).scalar() is not None
+
+def otimizar_tipos(df: pd.DataFrame):
+    """Converte as colunas conhecidas para tipos compactos (category, int8, float32)."""
+    tipos = {col: tipo for col, tipo in TIPOS_COMPACTOS.items() if col in df.columns}
+    if 'Fraud_Label' in tipos and df['Fraud_Label'].isna().any():
+        tipos.pop('Fraud_Label')
+    return df.astype(tipos)
+
+def montar_filtros(coluna_data, data_inicio=None, data_fim=None, tipo_transacao=None, fraude=None, localizacao=None):
+    """
+    Monta a cláusula WHERE parametrizada usada pelas consultas do dashboard.
+    - coluna_data: 'Timestamp' (transações) ou 'Data' (rollup diário).
+    - data_inicio / data_fim: datas inclusivas ('AAAA-MM-DD' ou date).
+    - tipo_transacao: valor de Transaction_Type. fraude: 0 ou 1. localizacao: valor de Location.
+    Retorna (clausula_where, parametros). Os valores nunca são interpolados no SQL.
+    """
+    filtros, parametros = [], {}
+    if data_inicio is not None:
+        filtros.append(f"{coluna_data} >= :data_inicio")
+        parametros['data_inicio'] = str(data_inicio)
+    if data_fim is not None:
+        # Compara com o dia seguinte para incluir todo o dia final (Timestamp tem hora)
+        filtros.append(f"{coluna_data} < date(:data_fim, '+1 day')")
+        parametros['data_fim'] = str(data_fim)
+    if tipo_transacao is not None:
+        filtros.append("Transaction_Type = :tipo_transacao")
+        parametros['tipo_transacao'] = tipo_transacao
+    if fraude is not None:
+        filtros.append("Fraud_Label = :fraude")
+        parametros['fraude'] = int(fraude)
+    if localizacao is not None:
+        filtros.append("Location = :localizacao")
+        parametros['localizacao'] = localizacao
+    where = f"WHERE {' AND '.join(filtros)}" if filtros else ""
+    return where, parametros
+
+# ---- VERSÃO DOS DADOS E CACHE ----
+
+@st.cache_data(ttl=INTERVALO_VERIFICACAO_VERSAO, show_spinner=False)
+def obter_versao_dados():
+    """
+    Versão dos dados publicada pelo 'etl.py' ("<versão>-<checksum>"), lida com um único SELECT
+    mínimo no máximo a cada INTERVALO_VERIFICACAO_VERSAO segundos. Retorna None se o ETL
+    ainda não publicou nenhuma versão.
+    """
+    try:
+        with obter_engine().connect() as conn:
+            valores = dict(conn.execute(
+                text(f"SELECT chave, valor FROM {NOME_TABELA_METADADOS} WHERE chave IN (:versao, :checksum)"),
+                {'versao': CHAVE_VERSAO_DADOS, 'checksum': CHAVE_CHECKSUM_DADOS}
+            ).all())
+    except Exception:
+        return None
+    if CHAVE_VERSAO_DADOS not in valores:
+        return None
+    return f"{valores[CHAVE_VERSAO_DADOS]}-{valores.get(CHAVE_CHECKSUM_DADOS)}"
+
+def cache_por_versao(cache=st.cache_data, **opcoes):
+    """
+    Decorador: como 'st.cache_data' (ou o 'cache' informado, ex.: st.cache_resource), mas com a
+    versão publicada pelo ETL como parte da chave. Quando o ETL publica uma nova versão, a
+    próxima chamada recalcula; entradas antigas saem por 'max_entries'/'ttl', sem reiniciar o processo.
+    Cada chamada é instrumentada (duração, linhas e acerto/falha do cache).
+    """
+    opcoes.setdefault('max_entries', MAX_ENTRADAS_CACHE)
+
+    def decorar(funcao):
+        assinatura = inspect.signature(funcao)
+
+        def executar(versao_dados, **argumentos):
+            instrumentacao.registrar_calculo()
+            return funcao(**argumentos)
+
+        # A chave do cache do Streamlit usa módulo + nome qualificado + código-fonte da função
+        executar.__module__ = funcao.__module__
+        executar.__name__ = funcao.__name__
+        executar.__qualname__ = funcao.__qualname__
+        executar.__wrapped__ = funcao
+        em_cache = cache(**opcoes)(executar)
+
+        @instrumentacao.instrumentar(funcao.__name__, cache=True)
+        @functools.wraps(funcao)
+        def chamar(*args, **kwargs):
+            # Tudo vai por nome: o Streamlit continua ignorando argumentos com prefixo '_'
+            argumentos = assinatura.bind(*args, **kwargs)
+            argumentos.apply_defaults()
+            return em_cache(versao_dados=obter_versao_dados(), **argumentos.arguments)
+
+        chamar.clear = em_cache.clear
+        return chamar
+    return decorar
+
+@cache_por_versao()
+def obter_metadado_etl(chave):
+    """Lê um valor publicado pelo ETL na tabela de metadados (None se não existir)."""
+    try:
+        with obter_engine().connect() as conn:
+            return conn.execute(
+                text(f"SELECT valor FROM {NOME_TABELA_METADADOS} WHERE chave = :chave"), {'chave': chave}
+            ).scalar()
+    except Exception:
+        return None
+
+def parquet_disponivel():
+    """
+    Indica se a cópia Parquet gerada pelo ETL existe e foi exportada a partir da versão publicada
+    (e, portanto, deve ser usada). Uma cópia antiga, de antes de um ETL rodado sem '--parquet',
+    é ignorada: os dados vêm do SQLite até a próxima exportação.
+    """
+    if not os.path.isdir(DIRETORIO_PARQUET):
+        return False
+    versao_parquet = obter_metadado_etl(CHAVE_VERSAO_PARQUET)
+    return versao_parquet is not None and versao_parquet == obter_metadado_etl(CHAVE_VERSAO_DADOS)
+
+def montar_filtros_parquet(data_inicio=None, data_fim=None, tipo_transacao=None, fraude=None, localizacao=None):
+    """
+    Traduz os filtros do dashboard para o formato do pyarrow.
+    Os filtros de data também são aplicados à coluna de partição, o que faz o Arrow
+    ignorar os arquivos dos meses fora do período (partition pruning).
+    """
+    filtros = []
+    if data_inicio is not None:
+        inicio = pd.Timestamp(data_inicio)
+        filtros += [(COLUNA_PARTICAO, '>=', inicio.strftime('%Y-%m')), ('Timestamp', '>=', inicio)]
+    if data_fim is not None:
+        fim = pd.Timestamp(data_fim)
+        filtros += [(COLUNA_PARTICAO, '<=', fim.strftime('%Y-%m')), ('Timestamp', '<', fim + pd.Timedelta(days=1))]
+    if tipo_transacao is not None:
+        filtros.append(('Transaction_Type', '=', tipo_transacao))
+    if fraude is not None:
+        filtros.append(('Fraud_Label', '=', int(fraude)))
+    if localizacao is not None:
+        filtros.append(('Location', '=', localizacao))
+    return filtros or None
+
+@instrumentacao.instrumentar()
+def ler_parquet(colunas=None, data_inicio=None, data_fim=None, tipo_transacao=None, fraude=None, localizacao=None):
+    """
+    Lê a cópia Parquet via Arrow com memory-map: apenas as colunas pedidas e apenas
+    as partições (meses) do período são lidas. Como os arquivos são mapeados em memória,
+    várias sessões compartilham o cache de páginas do sistema operacional.
+    """
+    import pyarrow.parquet as pq
+
+    tabela = pq.read_table(
+        DIRETORIO_PARQUET,
+        columns=list(colunas) if colunas else None,
+        filters=montar_filtros_parquet(data_inicio, data_fim, tipo_transacao, fraude, localizacao),
+        partitioning='hive',
+        memory_map=True,
+        read_dictionary=['Transaction_Type', 'Location'],
+    )
+    if COLUNA_PARTICAO in tabela.column_names and (not colunas or COLUNA_PARTICAO not in colunas):
+        tabela = tabela.drop_columns([COLUNA_PARTICAO])
+    return tabela.to_pandas(split_blocks=True, self_destruct=True)
+
+@instrumentacao.instrumentar('ler_transacoes')
+def _ler_transacoes(colunas=None, data_inicio=None, data_fim=None, tipo_transacao=None, fraude=None, localizacao=None):
     """
-    Conecta ao banco 'creditdata.db' e carrega a tabela principal.
-    Retorna um DataFrame.
+    Lê a tabela analítica gerada pelo 'etl.py' ('analytics_dashboard').
+    - colunas: lista de colunas a ler (projeção). None lê todas, menos as máscaras de outliers do ETL.
+    - Os filtros são aplicados no banco (WHERE parametrizado, apoiado pelos índices do ETL),
+      então só as linhas do recorte selecionado são transferidas.
+    Se existir a cópia Parquet ('etl.py --parquet') da versão atual, ela é lida via Arrow no lugar do SQLite.
+    Se o ETL ainda não rodou, usa a tabela bruta como alternativa.
+    Retorna um DataFrame com tipos compactos.
     """
-    NOME_DA_TABELA = 'TransacoesCompletas' # VERIFIQUE SE ESTE É O NOME CORRETO!
-    
     try:
-        engine = create_engine('sqlite:///creditdata.db')
-        df = pd.read_sql(f"SELECT * FROM {NOME_DA_TABELA}", engine, parse_dates=['Timestamp'])
+        # O ETL garante Transaction_ID único na sua saída; a garantia segue junto com o DataFrame
+        ids_unicos = obter_metadado_etl('transaction_id_unico') == '1'
+        if parquet_disponivel():
+            df = otimizar_tipos(ler_parquet(colunas, data_inicio, data_fim, tipo_transacao, fraude, localizacao))
+            df.attrs['ids_unicos'] = ids_unicos
+            return df
+
+        engine = obter_engine()
+        nome_tabela = NOME_TABELA_ANALITICA
+        if not _tabela_existe(engine, nome_tabela):
+            ids_unicos = False
+            st.warning(f"A tabela '{NOME_TABELA_ANALITICA}' não foi encontrada. Rode o 'etl.py' para gerá-la; "
+                       f"por enquanto os dados vêm da tabela bruta '{NOME_TABELA_ORIGEM}'.")
+            nome_tabela = NOME_TABELA_ORIGEM
+
+        if not colunas:
+            # As máscaras de outliers são internas do ETL: as páginas usam as contagens de 'carregar_resumo_outliers'
+            with engine.connect() as conn:
+                existentes = [linha[1] for linha in conn.execute(text(f"PRAGMA table_info({nome_tabela})"))]
+            colunas = [col for col in existentes if col not in motor_outliers.COLUNAS_FLAGS.values()]
+        selecao = ", ".join(f'"{col}"' for col in colunas)
+        where, parametros = montar_filtros('Timestamp', data_inicio, data_fim, tipo_transacao, fraude, localizacao)
+        df = pd.read_sql(text(f"SELECT {selecao} FROM {nome_tabela} {where}"), engine, params=parametros)
+        if 'Timestamp' in df.columns:
+            # O ETL grava o Timestamp sempre no formato ISO, o que permite o parsing rápido
+            df['Timestamp'] = pd.to_datetime(df['Timestamp'], format='ISO8601')
+        df = otimizar_tipos(df)
+        df.attrs['ids_unicos'] = ids_unicos
         return df
     except Exception as e:
-        if f"no such table: {NOME_DA_TABELA}" in str(e):
-             st.error(f"ERRO: A tabela '{NOME_DA_TABELA}' não foi encontrada. Verifique o nome na linha 15 do arquivo 'func/api_dados.py'.")
+        if "no such table" in str(e):
+             st.error(f"ERRO: As tabelas '{NOME_TABELA_ANALITICA}' e '{NOME_TABELA_ORIGEM}' não foram encontradas no banco '{DB_URL}'.")
         else:
             st.error(f"Falha ao carregar dados: {e}")
         return pd.DataFrame()
 
+@cache_por_versao()
+def consultar_transacoes(colunas=None, data_inicio=None, data_fim=None, tipo_transacao=None, fraude=None, localizacao=None):
+    """
+    Recortes filtrados da tabela analítica (ver '_ler_transacoes'), em cache por combinação de filtros.
+    Os filtros usam os índices do ETL (Timestamp, (Transaction_Type, Fraud_Label) e Location).
+    Para a tabela inteira use 'carregar_dados', que não copia os dados por sessão.
+    """
+    return _ler_transacoes(colunas, data_inicio, data_fim, tipo_transacao, fraude, localizacao)
+
+# ---- CONJUNTO DE DADOS COMPARTILHADO ENTRE SESSÕES ----
+
+class ConjuntoDados:
+    """
+    Tabela analítica carregada uma única vez e compartilhada (somente leitura) por todas as sessões.
+    Os arrays das colunas são marcados como não graváveis e as páginas recebem DataFrames que
+    apenas apontam para eles ('visao'), sem cópia. Uma escrita in-place acidental gera erro
+    em vez de corromper os dados das outras sessões.
+    """
+
+    def __init__(self, df: pd.DataFrame, versao):
+        self.versao = versao
+        self.attrs = dict(df.attrs)
+        self._colunas = {}
+        for col in df.columns:
+            serie = df[col]
+            if not isinstance(serie.dtype, pd.CategoricalDtype):
+                valores = serie.to_numpy()
+                valores.flags.writeable = False
+                serie = pd.Series(valores, index=df.index, name=col, copy=False)
+            self._colunas[col] = serie
+        self.colunas = list(df.columns)
+        self.linhas = len(df)
+
+    def visao(self, colunas=None):
+        """DataFrame com as colunas pedidas, apontando para os mesmos arrays (zero cópia)."""
+        colunas = self.colunas if colunas is None else [col for col in colunas if col in self._colunas]
+        df = pd.DataFrame({col: self._colunas[col] for col in colunas}, copy=False)
+        df.attrs.update(self.attrs, versao_dados=self.versao)
+        return df
+
+@st.cache_resource(max_entries=1, show_spinner="Carregando dados...")
+def obter_conjunto_dados(versao):
+    """
+    Carrega o conjunto compartilhado para a versão informada.
+    Com max_entries=1, uma nova versão substitui a anterior de forma atômica: o novo objeto só é
+    publicado depois de carregado, e as sessões que ainda usam o antigo mantêm uma visão consistente.
+    """
+    instrumentacao.registrar_calculo()
+    return ConjuntoDados(_ler_transacoes(), versao)
+
+@instrumentacao.instrumentar(cache=True)
+def carregar_dados(colunas=None):
+    """
+    Carrega a tabela analítica inteira (apenas as colunas pedidas).
+    Retorna uma visão somente leitura do conjunto compartilhado entre as sessões.
+    """
+    return obter_conjunto_dados(obter_versao_dados()).visao(colunas)
+
+@cache_por_versao()
+def carregar_rollup_diario(data_inicio=None, data_fim=None, tipo_transacao=None, fraude=None):
+    """
+    Carrega o rollup diário (dia x Location x Transaction_Type x Fraud_Label) gerado pelo 'etl.py'.
+    Aceita os mesmos filtros de 'consultar_transacoes', aplicados no banco.
+    Retorna um DataFrame pequeno (uma linha por combinação), com a coluna 'Data' em datetime.
+    """
+    try:
+        where, parametros = montar_filtros('Data', data_inicio, data_fim, tipo_transacao, fraude)
+        df = pd.read_sql(text(f"SELECT * FROM {NOME_TABELA_ROLLUP} {where}"), obter_engine(), params=parametros)
+        df['Data'] = pd.to_datetime(df['Data'], format='%Y-%m-%d')
+        return otimizar_tipos(df)
+    except Exception as e:
+        if "no such table" in str(e):
+            st.error(f"ERRO: A tabela '{NOME_TABELA_ROLLUP}' não foi encontrada. Rode o 'etl.py' para gerá-la.")
+        else:
+            st.error(f"Falha ao carregar o rollup diário: {e}")
+        return pd.DataFrame()
+
+@cache_por_versao()
+def carregar_resumo_outliers():
+    """
+    Limites e contagens de outliers por (Segmento, Coluna) calculados pelo 'etl.py', sem reler as
+    transações. Colunas Qtd_Outliers_IQR / _MAD / _Percentil, além dos limites de cada método.
+    Retorna um DataFrame vazio se o ETL ainda não gerou a tabela.
+    """
+    try:
+        return pd.read_sql(text(f"SELECT * FROM {NOME_TABELA_OUTLIERS}"), obter_engine())
+    except Exception:
+        return pd.DataFrame()
+
+@cache_por_versao()
+def contar_usuarios(data_inicio=None, data_fim=None, tipo_transacao=None, localizacao=None, exato=None):
+    """
+    Usuários distintos no recorte: 'ativos' (com alguma transação) e 'afetados' (com ao menos uma fraude).
+    - Aproximado: une os sketches HyperLogLog do ETL ('func/cardinalidade.py') do recorte, sem ler as
+      transações. Erro padrão relativo de cardinalidade.ERRO_PADRAO (~1,6%); as margens são de ~95%.
+    - Exato: COUNT(DISTINCT User_ID) na tabela analítica (varre as transações do recorte).
+    exato=None conta exatamente recortes com até LIMITE_CONTAGEM_EXATA transações (pelo rollup) e usa
+    os sketches acima disso; True/False força o modo. Sem os sketches, a contagem é sempre exata.
+    Retorna um dict com 'ativos', 'afetados', 'margem_ativos', 'margem_afetados' e 'aproximado',
+    ou None se as tabelas do ETL não existirem.
+    """
+    try:
+        engine = obter_engine()
+        where, parametros = montar_filtros('Data', data_inicio, data_fim, tipo_transacao, localizacao=localizacao)
+        if exato is None:
+            exato = not _tabela_existe(engine, NOME_TABELA_SKETCHES)
+            if not exato:
+                with engine.connect() as conn:
+                    transacoes = conn.execute(text(
+                        f"SELECT TOTAL(Total_Transacoes) FROM {NOME_TABELA_ROLLUP} {where}"
+                    ), parametros).scalar()
+                exato = transacoes <= LIMITE_CONTAGEM_EXATA
+
+        if exato:
+            where, parametros = montar_filtros('Timestamp', data_inicio, data_fim, tipo_transacao, localizacao=localizacao)
+            with engine.connect() as conn:
+                ativos, afetados = conn.execute(text(
+                    "SELECT COUNT(DISTINCT User_ID), COUNT(DISTINCT CASE WHEN Fraud_Label = 1 THEN User_ID END) "
+                    f"FROM {NOME_TABELA_ANALITICA} {where}"
+                ), parametros).one()
+            return {'ativos': ativos, 'afetados': afetados, 'margem_ativos': 0, 'margem_afetados': 0, 'aproximado': False}
+
+        with engine.connect() as conn:
+            linhas = conn.execute(text(f"SELECT Fraud_Label, Sketch_Usuarios FROM {NOME_TABELA_SKETCHES} {where}"), parametros).all()
+        ativos, margem_ativos = cardinalidade.contar_distintos([sketch for _, sketch in linhas])
+        afetados, margem_afetados = cardinalidade.contar_distintos([sketch for rotulo, sketch in linhas if rotulo == 1])
+        return {'ativos': ativos, 'afetados': afetados, 'margem_ativos': margem_ativos,
+                'margem_afetados': margem_afetados, 'aproximado': True}
+    except Exception:
+        return None
+
+@cache_por_versao()
+def listar_tipos_transacao():
+    """Lista os valores distintos de Transaction_Type (consulta no rollup, que é pequeno)."""
+    try:
+        with obter_engine().connect() as conn:
+            return [linha[0] for linha in conn.execute(text(
+                f"SELECT DISTINCT Transaction_Type FROM {NOME_TABELA_ROLLUP} "
+                "WHERE Transaction_Type IS NOT NULL ORDER BY Transaction_Type"
+            ))]
+    except Exception:
+        return []
+
+@cache_por_versao()
+def obter_intervalo_datas():
+    """Retorna (data mínima, data máxima) disponíveis no rollup, ou (None, None)."""
+    try:
+        with obter_engine().connect() as conn:
+            minima, maxima = conn.execute(text(f"SELECT MIN(Data), MAX(Data) FROM {NOME_TABELA_ROLLUP}")).one()
+    except Exception:
+        return None, None
+    if minima is None:
+        return None, None
+    return pd.to_datetime(minima).date(), pd.to_datetime(maxima).date()
+
 # ---- FUNÇÕES PARA A PÁGINA 'VISÃO GERAL' ----
 
-def identificar_outliers(df, coluna):
+@instrumentacao.instrumentar()
+def identificar_outliers(df, coluna, metodo='iqr', segmento=None):
     """
-    Identifica outliers em uma coluna usando o método IQR.
-    Retorna um dataframe com os outliers, a contagem e o limite superior.
+    Identifica outliers em uma coluna pelo 'metodo' ('iqr', 'mad' ou 'percentil'; ver 'func/outliers.py').
+    Com 'segmento' (ex.: 'Transaction_Type'), cada segmento usa os seus próprios limites.
+    Retorna um dataframe com os outliers, a contagem e o limite superior (o maior entre os segmentos).
     """
     if coluna not in df.columns:
         return pd.DataFrame(), 0, 0
 
-    Q1 = df[coluna].quantile(0.25)
-    Q3 = df[coluna].quantile(0.75)
-    IQR = Q3 - Q1
-    
-    limite_inferior = Q1 - 1.5 * IQR
-    limite_superior = Q3 + 1.5 * IQR
-    
-    df_outliers = df[(df[coluna] < limite_inferior) | (df[coluna] > limite_superior)]
-    
-    return df_outliers, len(df_outliers), limite_superior
-
-def calcular_kpis_gerais(df: pd.DataFrame):
-    """Calcula KPIs a partir do DataFrame já processado."""
+    valores = df[coluna].to_numpy(dtype=np.float64, na_value=np.nan)[:, None]
+    segmentos = df[segmento].to_numpy() if segmento else None
+    limites = motor_outliers.calcular_limites(valores, [coluna], segmentos, metodos=(metodo,))
+    fora = motor_outliers.marcar_outliers(valores, limites, segmentos, metodos=(metodo,))[metodo].astype(bool)
+
+    df_outliers = df[fora]
+    return df_outliers, len(df_outliers), limites[motor_outliers.coluna_limite(metodo, 'Superior')].max()
+
+@instrumentacao.instrumentar()
+def calcular_kpis_gerais(df: pd.DataFrame, ids_unicos=None):
+    """
+    Calcula KPIs a partir do DataFrame já processado, em uma única passada por Fraud_Label.
+    - ids_unicos: se True, o nº de transações é o nº de linhas (dispensa o 'nunique').
+      None usa a garantia publicada pelo ETL (df.attrs['ids_unicos']).
+    """
     if df.empty:
-        return {k: 0 for k in ['valor_total', 'num_transacoes', 'ticket_medio', 'num_fraudes', 'valor_fraudes', 'taxa_fraude_vol', 'risco_medio_fraudes', 'risco_medio_legitimas']}
-
-    num_transacoes = df['Transaction_ID'].nunique()
-    valor_total = df['Transaction_Amount'].sum()
-    df_fraude = df[df['Fraud_Label'] == 1]
-    df_legitima = df[df['Fraud_Label'] == 0]
-    num_fraudes = len(df_fraude)
-
-    kpis = {
-        'valor_total': valor_total,
-        'num_transacoes': num_transacoes,
-        'ticket_medio': df['Transaction_Amount'].mean(),
-        'num_fraudes': num_fraudes,
-        'valor_fraudes': df_fraude['Transaction_Amount'].sum(),
-        'taxa_fraude_vol': (num_fraudes / num_transacoes) * 100 if num_transacoes > 0 else 0,
-        'risco_medio_fraudes': df_fraude['Risk_Score'].mean() if num_fraudes > 0 else 0,
-        'risco_medio_legitimas': df_legitima['Risk_Score'].mean() if not df_legitima.empty else 0
-    }
-    return kpis
+        return motor_kpis.kpis_vazios()
 
-def criar_mapa_agregado_por_localizacao(df: pd.DataFrame):
+    if ids_unicos is None:
+        ids_unicos = df.attrs.get('ids_unicos', False)
+    num_transacoes = None if ids_unicos else df['Transaction_ID'].nunique()
+    return motor_kpis.calcular_kpis(
+        motor_kpis.calcular_parciais(df), num_transacoes, motor_kpis.calcular_globais(df)
+    )
+
+@instrumentacao.instrumentar()
+def calcular_kpis_rollup(df_rollup: pd.DataFrame):
     """
-    Cria um mapa de performance extremamente alta agregando os dados por localização.
-    O tamanho do círculo representa o volume de transações.
-    A cor do círculo representa a taxa de fraude.
+    Calcula os mesmos KPIs de 'calcular_kpis_gerais' a partir do rollup diário.
+    Como o rollup guarda contagens e somas por Fraud_Label, nenhuma transação é lida.
+    Métricas que exigem as linhas (ex.: ticket mediano) ficam como None.
+    """
+    if df_rollup.empty:
+        return motor_kpis.kpis_vazios()
+    return motor_kpis.calcular_kpis(motor_kpis.calcular_parciais_rollup(df_rollup))
+
+@instrumentacao.instrumentar()
+def calcular_tendencia_diaria(df_rollup: pd.DataFrame):
+    """Total de transações e de fraudes por dia, a partir do rollup diário (dias sem dados ficam com 0)."""
+    df_rollup = df_rollup.assign(
+        Total_Fraudes=df_rollup['Total_Transacoes'].where(df_rollup['Fraud_Label'] == 1, 0)
+    )
+    return df_rollup.set_index('Data').resample('D')[['Total_Transacoes', 'Total_Fraudes']].sum().reset_index()
+
+# ---- FUNÇÕES PARA A PÁGINA 'ANÁLISE EXPLORATÓRIA' ----
+
+@instrumentacao.instrumentar(cache=True)
+@st.cache_data(max_entries=8, show_spinner="Calculando estatísticas do dataset...")
+def obter_estatisticas_eda(_df: pd.DataFrame, versao, aproximado=False):
+    """
+    Estatísticas da EDA calculadas uma única vez por versão dos dados e compartilhadas entre sessões.
+    O DataFrame não entra na chave do cache (evita fazer hash dele): a chave é 'versao' + modo.
     """
+    instrumentacao.registrar_calculo()
+    return estatisticas.calcular_estatisticas_eda(_df, aproximado=aproximado)
+
+# ---- FUNÇÕES PARA A PÁGINA 'ANÁLISE GEOGRÁFICA' ----
+
+@instrumentacao.instrumentar()
+def agregar_por_localizacao(df: pd.DataFrame):
+    """Agrega as transações por localização (coordenadas médias, total de transações e de fraudes)."""
     colunas_necessarias = ['Location', 'Latitude', 'Longitude', 'Transaction_ID', 'Fraud_Label']
     if df.empty or not all(col in df.columns for col in colunas_necessarias):
-        return None
-
-    df_mapa = df.copy()
-    df_mapa.dropna(subset=['Latitude', 'Longitude', 'Location'], inplace=True)
-    if df_mapa.empty:
-        return None
+        return pd.DataFrame()
 
-    # --- AGREGAÇÃO POR LOCALIZAÇÃO ---
-    df_agregado = df_mapa.groupby('Location').agg(
+    df_mapa = df.dropna(subset=['Latitude', 'Longitude', 'Location'])
+    return df_mapa.groupby('Location', observed=True).agg(
         Latitude=('Latitude', 'mean'),
         Longitude=('Longitude', 'mean'),
         Total_Transacoes=('Transaction_ID', 'count'),
         Total_Fraudes=('Fraud_Label', 'sum')
     ).reset_index()
 
-    # Calcula a taxa de fraude e define uma cor
-    df_agregado['Taxa_Fraude'] = (df_agregado['Total_Fraudes'] / df_agregado['Total_Transacoes']) * 100
-    
-    def get_color(taxa_fraude):
-        if taxa_fraude > 10:
-            return '#d84315' # Vermelho escuro
-        elif taxa_fraude > 5:
-            return '#f4511e' # Laranja
-        elif taxa_fraude > 0:
-            return '#ffb300' # Ambar
-        return '#2e7d32' # Verde
-        
-    df_agregado['Cor'] = df_agregado['Taxa_Fraude'].apply(get_color)
+@instrumentacao.instrumentar()
+def agregar_rollup_por_localizacao(df_rollup: pd.DataFrame):
+    """Mesma agregação de 'agregar_por_localizacao', mas a partir do rollup diário."""
+    if df_rollup.empty:
+        return pd.DataFrame()
+
+    df_rollup = df_rollup.assign(
+        Total_Fraudes=df_rollup['Total_Transacoes'].where(df_rollup['Fraud_Label'] == 1, 0)
+    )
+    df_agregado = df_rollup.groupby('Location', observed=True)[
+        ['Soma_Latitude', 'Soma_Longitude', 'Total_Coordenadas', 'Total_Transacoes', 'Total_Fraudes']
+    ].sum()
+    df_agregado = df_agregado[df_agregado['Total_Coordenadas'] > 0]
+    df_agregado['Latitude'] = df_agregado['Soma_Latitude'] / df_agregado['Total_Coordenadas']
+    df_agregado['Longitude'] = df_agregado['Soma_Longitude'] / df_agregado['Total_Coordenadas']
+    return df_agregado[['Latitude', 'Longitude', 'Total_Transacoes', 'Total_Fraudes']].reset_index()
+
+@instrumentacao.instrumentar()
+def criar_mapa_agregado_por_localizacao(df: pd.DataFrame):
+    """
+    Cria um mapa de performance extremamente alta agregando os dados por localização.
+    O tamanho do círculo representa o volume de transações.
+    A cor do círculo representa a taxa de fraude.
+    """
+    return criar_mapa_de_agregado(agregar_por_localizacao(df))
+
+# Faixas de taxa de fraude (%) e suas cores: > 10, > 5, > 0 e sem fraudes
+FAIXAS_TAXA_FRAUDE = [10, 5, 0]
+CORES_TAXA_FRAUDE = ['#d84315', '#f4511e', '#ffb300'] # Vermelho escuro, Laranja, Ambar
+COR_SEM_FRAUDE = '#2e7d32' # Verde
+LIMITE_LOCAIS_CLUSTER = 2000 # Acima disso os pontos são agrupados (marker cluster)
+
+# Estilo e popup de cada ponto são montados no navegador a partir das propriedades,
+# então o HTML enviado contém só os dados (uma única camada), e não um objeto por local.
+_JS_PONTO_GEOJSON = """
+function (feature, layer) {
+    var p = feature.properties;
+    layer.setStyle({color: p.cor, fillColor: p.cor, fillOpacity: 0.6, radius: p.raio});
+    layer.bindPopup(
+        '<b>Localização:</b> ' + p.local + '<br>' +
+        '<b>Total de Transações:</b> ' + p.total.toLocaleString('en-US') + '<br>' +
+        '<b>Total de Fraudes:</b> ' + p.fraudes.toLocaleString('en-US') + '<br>' +
+        '<b>Taxa de Fraude:</b> ' + p.taxa.toFixed(2) + '%',
+        {maxWidth: 300}
+    );
+}
+"""
+_JS_PONTO_CLUSTER = """
+function (row) {
+    var marker = L.circleMarker(new L.LatLng(row[0], row[1]),
+        {color: row[6], fillColor: row[6], fillOpacity: 0.6, radius: row[7]});
+    marker.bindPopup(
+        '<b>Localização:</b> ' + row[2] + '<br>' +
+        '<b>Total de Transações:</b> ' + row[3].toLocaleString('en-US') + '<br>' +
+        '<b>Total de Fraudes:</b> ' + row[4].toLocaleString('en-US') + '<br>' +
+        '<b>Taxa de Fraude:</b> ' + row[5].toFixed(2) + '%',
+        {maxWidth: 300}
+    );
+    return marker;
+}
+"""
+
+def calcular_estilo_pontos(total_transacoes, total_fraudes):
+    """
+    Calcula, de forma vetorizada, a taxa de fraude (%), a cor e o raio de cada ponto.
+    O raio usa escala logarítmica do volume de transações.
+    """
+    total_transacoes = np.asarray(total_transacoes, dtype=np.float64)
+    taxa = np.divide(np.asarray(total_fraudes, dtype=np.float64) * 100, total_transacoes,
+                     out=np.zeros_like(total_transacoes), where=total_transacoes > 0)
+    cores = np.select([taxa > limite for limite in FAIXAS_TAXA_FRAUDE], CORES_TAXA_FRAUDE, default=COR_SEM_FRAUDE)
+    raios = np.log1p(total_transacoes) * 3
+    return taxa, cores, raios
+
+@instrumentacao.instrumentar()
+def criar_mapa_de_agregado(df_agregado: pd.DataFrame, limite_cluster=LIMITE_LOCAIS_CLUSTER):
+    """
+    Desenha o mapa a partir de um DataFrame já agregado por localização
+    (colunas Location, Latitude, Longitude, Total_Transacoes, Total_Fraudes).
+    Todos os pontos vão em uma única camada GeoJSON; acima de 'limite_cluster'
+    locais, usa uma camada de marker cluster.
+    """
+    if df_agregado.empty:
+        return None
+    import folium  # Só a página do mapa precisa do folium: fica fora da importação do módulo
+
+    taxa, cores, raios = calcular_estilo_pontos(df_agregado['Total_Transacoes'], df_agregado['Total_Fraudes'])
+    latitudes = df_agregado['Latitude'].to_numpy(dtype=np.float64)
+    longitudes = df_agregado['Longitude'].to_numpy(dtype=np.float64)
+    colunas = [
+        latitudes.round(5).tolist(),
+        longitudes.round(5).tolist(),
+        df_agregado['Location'].astype(str).tolist(),
+        df_agregado['Total_Transacoes'].astype(np.int64).tolist(),
+        df_agregado['Total_Fraudes'].astype(np.int64).tolist(),
+        taxa.round(2).tolist(),
+        cores.tolist(),
+        raios.round(1).tolist(),
+    ]
 
     # Cria o mapa
     mapa = folium.Map(
-        location=[df_agregado['Latitude'].mean(), df_agregado['Longitude'].mean()], 
+        location=[latitudes.mean(), longitudes.mean()], 
         zoom_start=4, 
         tiles="CartoDB positron"
     )
 
-    # Adiciona os círculos agregados
-    for _, row in df_agregado.iterrows():
-        raio = np.log(row['Total_Transacoes'] + 1) * 3 # Escala logarítmica para o raio
-        
-        popup_text = f"""
-        <b>Localização:</b> {row['Location']}<br>
-        <b>Total de Transações:</b> {row['Total_Transacoes']:,}<br>
-        <b>Total de Fraudes:</b> {row['Total_Fraudes']:,}<br>
-        <b>Taxa de Fraude:</b> {row['Taxa_Fraude']:.2f}%
-        """
-        
-        folium.CircleMarker(
-            location=[row['Latitude'], row['Longitude']],
-            radius=raio,
-            popup=folium.Popup(popup_text, max_width=300),
-            color=row['Cor'],
-            fill=True,
-            fill_color=row['Cor'],
-            fill_opacity=0.6
-        ).add_to(mapa)
-
-    return mapa
\ No newline at end of file
+    if len(df_agregado) > limite_cluster:
+        from folium.plugins import FastMarkerCluster
+        FastMarkerCluster(data=[list(linha) for linha in zip(*colunas)], callback=_JS_PONTO_CLUSTER).add_to(mapa)
+        return mapa
+
+    geojson = {
+        'type': 'FeatureCollection',
+        'features': [
+            {
+                'type': 'Feature',
+                'geometry': {'type': 'Point', 'coordinates': [lon, lat]},
+                'properties': {'local': local, 'total': total, 'fraudes': fraudes, 'taxa': tx, 'cor': cor, 'raio': raio},
+            }
+            for lat, lon, local, total, fraudes, tx, cor, raio in zip(*colunas)
+        ],
+    }
+    folium.GeoJson(
+        geojson,
+        name="Localizações",
+        marker=folium.CircleMarker(fill=True),
+        on_each_feature=folium.JsCode(_JS_PONTO_GEOJSON),
+    ).add_to(mapa)
+
+    return mapa
+
+@cache_por_versao(st.cache_resource, max_entries=32)
+def obter_mapa_geografico(tipo_transacao=None, fraude=None):
+    """
+    Mapa da página 'Análise Geográfica' para uma combinação de filtros.
+    O objeto é guardado em cache e compartilhado entre as sessões.
+    """
+    df_rollup = carregar_rollup_diario(tipo_transacao=tipo_transacao, fraude=fraude)
+    return criar_mapa_de_agregado(agregar_rollup_por_localizacao(df_rollup))
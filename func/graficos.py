@@ -0,0 +1,202 @@
+# func/graficos.py
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+# --- CONFIGURAÇÕES ---
+NUM_BINS_PADRAO = 50
+MAX_BINS_DISCRETOS = 100   # Inteiros com até este nº de valores distintos ganham um bin por valor
+MAX_OUTLIERS_BOX = 50      # Pontos de outlier enviados por classe no box plot
+CORES_CLASSE = {0: '#636EFA', 1: '#EF553B'}
+
+# Os gráficos desta página são desenhados a partir de resumos (bins, contagens, quartis)
+# calculados com NumPy: a figura enviada ao navegador tem poucos KB, qualquer que seja o nº de linhas.
+
+
+def _valores_e_classes(df, coluna, coluna_classe):
+    """Valores numéricos finitos da coluna e os códigos da classe (ou zeros, sem classe)."""
+    valores = df[coluna].to_numpy(dtype=np.float64)
+    if coluna_classe is None:
+        codigos, classes = np.zeros(len(valores), dtype=np.intp), np.array([None])
+    else:
+        codigos, classes = pd.factorize(df[coluna_classe], sort=True)
+    validos = np.isfinite(valores) & (codigos >= 0)
+    return valores[validos], codigos[validos], classes
+
+
+def calcular_bordas(valores, num_bins=NUM_BINS_PADRAO):
+    """
+    Bordas dos bins: um bin por valor para variáveis inteiras com poucos valores distintos
+    (ex.: contagem de falhas), senão 'num_bins' bins uniformes.
+    """
+    if len(valores) == 0:
+        return np.array([0.0, 1.0])
+    minimo, maximo = valores.min(), valores.max()
+    if np.all(np.mod(valores, 1) == 0) and maximo - minimo < MAX_BINS_DISCRETOS:
+        return np.arange(minimo - 0.5, maximo + 1.5)
+    if minimo == maximo:
+        return np.array([minimo - 0.5, maximo + 0.5])
+    return np.linspace(minimo, maximo, num_bins + 1)
+
+
+def resumir_histograma(df, coluna, coluna_classe='Fraud_Label', num_bins=NUM_BINS_PADRAO):
+    """
+    Contagens por bin e por classe em uma única passada (np.bincount sobre classe x bin).
+    Retorna um DataFrame pequeno: classe, inicio, fim, centro, contagem.
+    """
+    valores, codigos, classes = _valores_e_classes(df, coluna, coluna_classe)
+    bordas = calcular_bordas(valores, num_bins)
+    n_bins = len(bordas) - 1
+
+    # Bins uniformes: o índice sai de uma conta, sem busca (o último bin é fechado à direita)
+    largura = bordas[1] - bordas[0]
+    indices = np.clip(((valores - bordas[0]) / largura).astype(np.intp), 0, n_bins - 1)
+    contagens = np.bincount(codigos * n_bins + indices, minlength=len(classes) * n_bins).reshape(len(classes), n_bins)
+
+    return pd.DataFrame({
+        'classe': np.repeat(classes, n_bins),
+        'inicio': np.tile(bordas[:-1], len(classes)),
+        'fim': np.tile(bordas[1:], len(classes)),
+        'centro': np.tile((bordas[:-1] + bordas[1:]) / 2, len(classes)),
+        'contagem': contagens.ravel(),
+    })
+
+
+def resumir_boxplot(df, coluna, coluna_classe='Fraud_Label', max_outliers=MAX_OUTLIERS_BOX):
+    """
+    Quartis, cercas de Tukey (1,5 x IQR) e uma amostra representativa de outliers por classe.
+    Retorna uma lista de dicionários, um por classe.
+    """
+    valores, codigos, classes = _valores_e_classes(df, coluna, coluna_classe)
+    resumos = []
+    for i, classe in enumerate(classes):
+        v = valores[codigos == i]
+        if len(v) == 0:
+            continue
+        q1, mediana, q3 = np.quantile(v, [0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        dentro = v[(v >= q1 - 1.5 * iqr) & (v <= q3 + 1.5 * iqr)]
+        outliers = v[(v < q1 - 1.5 * iqr) | (v > q3 + 1.5 * iqr)]
+        if len(outliers) > max_outliers:
+            # Outliers espaçados por quantil preservam os extremos e a forma da cauda
+            outliers = np.quantile(outliers, np.linspace(0, 1, max_outliers))
+        resumos.append({
+            'classe': classe,
+            'q1': q1, 'mediana': mediana, 'q3': q3,
+            'cerca_inferior': dentro.min(), 'cerca_superior': dentro.max(),
+            'media': v.mean(), 'total': len(v), 'outliers': outliers,
+        })
+    return resumos
+
+
+def resumir_categorias(df, coluna, coluna_classe='Fraud_Label', top=None):
+    """Contagem por categoria e classe (opcionalmente apenas as 'top' categorias mais frequentes)."""
+    contagem = df.groupby([coluna, coluna_classe], observed=True).size().rename('contagem').reset_index()
+    if top is not None:
+        principais = contagem.groupby(coluna, observed=True)['contagem'].sum().nlargest(top).index
+        contagem = contagem[contagem[coluna].isin(principais)]
+    return contagem
+
+
+def _normalizar(contagens, larguras, total, histnorm):
+    if histnorm == 'probability density':
+        return contagens / (total * larguras) if total else contagens * 0.0
+    if histnorm == 'percent':
+        return contagens / total * 100 if total else contagens * 0.0
+    return contagens
+
+
+def _sem_classe(classe):
+    return classe is None or (np.isscalar(classe) and pd.isna(classe))
+
+
+def _cor(classe, cores):
+    return None if _sem_classe(classe) else (cores or {}).get(classe)
+
+
+def _rotulo_classe(classe):
+    return None if _sem_classe(classe) else str(classe)
+
+
+def figura_histograma(resumo, titulo=None, rotulo_x=None, rotulo_classe=None, histnorm=None,
+                      barmode='overlay', opacidade=None, text_auto=False, cores=CORES_CLASSE):
+    """Desenha um histograma (uma série de barras por classe) a partir de 'resumir_histograma'."""
+    fig = go.Figure()
+    for classe, grupo in resumo.groupby('classe', sort=True, dropna=False):
+        larguras = (grupo['fim'] - grupo['inicio']).to_numpy()
+        y = _normalizar(grupo['contagem'].to_numpy(), larguras, grupo['contagem'].sum(), histnorm)
+        fig.add_trace(go.Bar(
+            x=grupo['centro'], y=y, width=larguras, name=_rotulo_classe(classe),
+            marker_color=_cor(classe, cores), opacity=opacidade, showlegend=not _sem_classe(classe),
+            text=grupo['contagem'] if text_auto else None, textposition='auto' if text_auto else None,
+        ))
+    fig.update_layout(
+        title=titulo, barmode=barmode, bargap=0,
+        xaxis_title=rotulo_x, yaxis_title='count' if histnorm is None else histnorm,
+        legend_title_text=rotulo_classe,
+    )
+    return fig
+
+
+def _trace_box(resumo, cor=None, nome=None, x=None, mostrar_legenda=False):
+    return go.Box(
+        x=x, q1=[resumo['q1']], median=[resumo['mediana']], q3=[resumo['q3']],
+        lowerfence=[resumo['cerca_inferior']], upperfence=[resumo['cerca_superior']],
+        mean=[resumo['media']], name=nome, marker_color=cor, showlegend=mostrar_legenda,
+    )
+
+
+def _trace_outliers(resumo, cor=None, nome=None, horizontal=False):
+    outliers = resumo['outliers']
+    posicao = [nome] * len(outliers)
+    x, y = (outliers, posicao) if horizontal else (posicao, outliers)
+    return go.Scatter(x=x, y=y, mode='markers', marker=dict(color=cor, size=4),
+                      name=nome, showlegend=False, hoverinfo='x' if horizontal else 'y')
+
+
+def figura_boxplot(resumos, titulo=None, rotulo_y=None, rotulo_classe=None, cores=CORES_CLASSE):
+    """Box plot vertical por classe a partir de 'resumir_boxplot' (quartis pré-calculados)."""
+    fig = go.Figure()
+    for resumo in resumos:
+        nome = _rotulo_classe(resumo['classe'])
+        cor = _cor(resumo['classe'], cores)
+        fig.add_trace(_trace_box(resumo, cor, nome, x=[nome], mostrar_legenda=True))
+        if len(resumo['outliers']):
+            fig.add_trace(_trace_outliers(resumo, cor, nome))
+    fig.update_layout(title=titulo, xaxis_title=rotulo_classe, yaxis_title=rotulo_y, legend_title_text=rotulo_classe)
+    return fig
+
+
+def figura_histograma_com_box(resumo_hist, resumos_box, titulo=None, rotulo_x=None):
+    """Histograma com o box plot marginal acima (equivalente a px.histogram(..., marginal='box'))."""
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.2, 0.8], vertical_spacing=0.02)
+    for resumo in resumos_box:
+        box = _trace_box(resumo, nome='', mostrar_legenda=False)
+        # Box horizontal: os quartis passam a valer para o eixo x
+        box.update(orientation='h', x=None, y=[''])
+        fig.add_trace(box, row=1, col=1)
+        if len(resumo['outliers']):
+            fig.add_trace(_trace_outliers(resumo, nome='', horizontal=True), row=1, col=1)
+    for trace in figura_histograma(resumo_hist, cores=None).data:
+        fig.add_trace(trace, row=2, col=1)
+    fig.update_layout(title=titulo, bargap=0, showlegend=False)
+    fig.update_xaxes(title_text=rotulo_x, row=2, col=1)
+    fig.update_yaxes(title_text='count', row=2, col=1)
+    return fig
+
+
+def figura_categorias(resumo, coluna, coluna_classe='Fraud_Label', titulo=None, barmode='group', histnorm=None):
+    """Barras por categoria e classe a partir de 'resumir_categorias' (histnorm='percent' normaliza por classe)."""
+    dados = resumo.copy()
+    dados[coluna_classe] = dados[coluna_classe].astype(str)
+    if histnorm == 'percent':
+        dados['contagem'] = dados['contagem'] / dados.groupby(coluna_classe)['contagem'].transform('sum') * 100
+    fig = go.Figure()
+    for classe, grupo in dados.groupby(coluna_classe, sort=True):
+        fig.add_trace(go.Bar(x=grupo[coluna].astype(str), y=grupo['contagem'], name=classe))
+    fig.update_layout(
+        title=titulo, barmode=barmode, xaxis_title=coluna,
+        yaxis_title='count' if histnorm is None else histnorm, legend_title_text=coluna_classe,
+    )
+    return fig
@@ -0,0 +1,297 @@
+# func/instrumentacao.py
+import functools
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+# --- CONFIGURAÇÕES ---
+CAPACIDADE_PADRAO = 5000           # Medições recentes guardadas em memória (as mais antigas são descartadas)
+DIRETORIO_METRICAS = "metricas"
+ARQUIVO_METRICAS_DASHBOARD = os.path.join(DIRETORIO_METRICAS, "dashboard.prom")
+ARQUIVO_METRICAS_ETL = os.path.join(DIRETORIO_METRICAS, "etl.prom")
+INTERVALO_EXPORTACAO = 30          # Segundos entre exportações periódicas do arquivo Prometheus
+PREFIXO_METRICAS = "credit"
+# Limites (em segundos) dos buckets do histograma de duração exportado para o Prometheus
+LIMITES_HISTOGRAMA = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+_TAMANHO_PAGINA = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else None
+
+
+def _rss_bytes():
+    """Memória residente do processo (Linux, via /proc); None onde não estiver disponível."""
+    if _TAMANHO_PAGINA is None:
+        return None
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _TAMANHO_PAGINA
+    except OSError:
+        return None
+
+
+def _contar_linhas(args, kwargs, resultado):
+    """Linhas processadas: as do primeiro DataFrame recebido ou, se não houver, as do DataFrame devolvido."""
+    # O pandas não é importado aqui (o módulo é carregado até pelas páginas leves):
+    # se ele ainda não foi importado por ninguém, não há DataFrame para contar
+    pd = sys.modules.get('pandas')
+    if pd is None:
+        return None
+    for valor in (*args, *kwargs.values(), resultado):
+        if isinstance(valor, pd.DataFrame):
+            return len(valor)
+    return None
+
+
+# --- REGISTRO (EM MEMÓRIA) ---
+
+class RegistroMetricas:
+    """
+    Guarda as medições do processo: as 'capacidade' mais recentes (para percentis e gráficos)
+    e totais acumulados por operação (contagens, linhas, acertos de cache e o histograma de
+    duração exportado para o Prometheus). Seguro para uso por várias sessões (threads).
+    """
+
+    def __init__(self, capacidade=CAPACIDADE_PADRAO):
+        self._trava = threading.Lock()
+        self._recentes = deque(maxlen=capacidade)
+        self._totais = {}
+        self._ultima_exportacao = 0.0
+
+    def registrar(self, operacao, segundos, linhas=None, cache=None, memoria_bytes=None, erro=False):
+        """Registra uma execução. 'cache' é 'hit', 'miss' ou None (operação sem cache)."""
+        with self._trava:
+            self._recentes.append((time.time(), operacao, segundos, linhas, cache, memoria_bytes, erro))
+            total = self._totais.get(operacao)
+            if total is None:
+                total = self._totais[operacao] = {
+                    'chamadas': 0, 'erros': 0, 'segundos': 0.0, 'linhas': 0, 'hit': 0, 'miss': 0,
+                    'buckets': [0] * len(LIMITES_HISTOGRAMA), 'ultima_duracao': 0.0, 'ultima_memoria': None,
+                }
+            total['chamadas'] += 1
+            total['erros'] += bool(erro)
+            total['segundos'] += segundos
+            total['linhas'] += linhas or 0
+            if cache is not None:
+                total[cache] += 1
+            for i, limite in enumerate(LIMITES_HISTOGRAMA):
+                if segundos <= limite:
+                    total['buckets'][i] += 1
+            total['ultima_duracao'] = segundos
+            total['ultima_memoria'] = memoria_bytes
+
+    def limpar(self):
+        with self._trava:
+            self._recentes.clear()
+            self._totais.clear()
+
+    def recentes(self):
+        """DataFrame com as medições recentes (uma linha por execução)."""
+        import pandas as pd
+
+        with self._trava:
+            linhas = list(self._recentes)
+        df = pd.DataFrame(linhas, columns=['Instante', 'Operacao', 'Segundos', 'Linhas', 'Cache', 'Memoria_Bytes', 'Erro'])
+        df['Instante'] = pd.to_datetime(df['Instante'], unit='s')
+        df['Duracao_ms'] = df['Segundos'] * 1000
+        df['Memoria_MB'] = pd.to_numeric(df['Memoria_Bytes']) / 2**20
+        return df.drop(columns=['Segundos', 'Memoria_Bytes'])
+
+    def resumo(self):
+        """
+        Uma linha por operação: chamadas e totais desde o início do processo; percentis de
+        duração e pico de memória calculados sobre as medições recentes.
+        """
+        import pandas as pd
+
+        with self._trava:
+            totais = {operacao: dict(total) for operacao, total in self._totais.items()}
+        recentes = self.recentes()
+        percentis = recentes.groupby('Operacao')['Duracao_ms'].quantile([0.5, 0.95]).unstack() if len(recentes) else None
+        linhas = []
+        for operacao, total in sorted(totais.items()):
+            consultas_cache = total['hit'] + total['miss']
+            linhas.append({
+                'Operacao': operacao,
+                'Chamadas': total['chamadas'],
+                'Erros': total['erros'],
+                'Total_s': total['segundos'],
+                'Media_ms': total['segundos'] / total['chamadas'] * 1000,
+                'P50_ms': percentis.at[operacao, 0.5] if percentis is not None and operacao in percentis.index else None,
+                'P95_ms': percentis.at[operacao, 0.95] if percentis is not None and operacao in percentis.index else None,
+                'Linhas': total['linhas'] or None,
+                'Linhas_por_s': total['linhas'] / total['segundos'] if total['linhas'] and total['segundos'] > 0 else None,
+                'Cache_Hit': total['hit'] if consultas_cache else None,
+                'Cache_Miss': total['miss'] if consultas_cache else None,
+                'Taxa_Acerto': total['hit'] / consultas_cache if consultas_cache else None,
+                'Ultima_Memoria_MB': total['ultima_memoria'] / 2**20 if total['ultima_memoria'] is not None else None,
+            })
+        # Colunas opcionais (None) ficam como float com NaN
+        tipos = {col: 'float64' for col in ('P50_ms', 'P95_ms', 'Linhas', 'Linhas_por_s', 'Cache_Hit', 'Cache_Miss',
+                                            'Taxa_Acerto', 'Ultima_Memoria_MB')}
+        return pd.DataFrame(linhas, columns=[
+            'Operacao', 'Chamadas', 'Erros', 'Total_s', 'Media_ms', 'P50_ms', 'P95_ms', 'Linhas',
+            'Linhas_por_s', 'Cache_Hit', 'Cache_Miss', 'Taxa_Acerto', 'Ultima_Memoria_MB',
+        ]).astype(tipos)
+
+    # --- EXPORTAÇÃO (PROMETHEUS) ---
+
+    def para_prometheus(self, processo):
+        """Texto no formato de exposição do Prometheus (para o textfile collector do node_exporter)."""
+        with self._trava:
+            totais = {operacao: dict(total, buckets=list(total['buckets'])) for operacao, total in self._totais.items()}
+        nome = f"{PREFIXO_METRICAS}_operacao"
+        blocos = {
+            'duracao': [f"# HELP {nome}_duracao_segundos Duração das operações instrumentadas.",
+                        f"# TYPE {nome}_duracao_segundos histogram"],
+            'linhas': [f"# HELP {nome}_linhas_total Linhas processadas pelas operações.",
+                       f"# TYPE {nome}_linhas_total counter"],
+            'erros': [f"# HELP {nome}_erros_total Execuções que terminaram com exceção.",
+                      f"# TYPE {nome}_erros_total counter"],
+            'cache': [f"# HELP {nome}_cache_total Consultas ao cache por resultado (hit/miss).",
+                      f"# TYPE {nome}_cache_total counter"],
+            'ultima': [f"# HELP {nome}_ultima_duracao_segundos Duração da execução mais recente.",
+                       f"# TYPE {nome}_ultima_duracao_segundos gauge"],
+            'memoria': [f"# HELP {nome}_memoria_delta_bytes Variação da memória residente na execução mais recente.",
+                        f"# TYPE {nome}_memoria_delta_bytes gauge"],
+        }
+        for operacao, total in sorted(totais.items()):
+            rotulos = f'processo="{_escapar(processo)}",operacao="{_escapar(operacao)}"'
+            for limite, contagem in zip(LIMITES_HISTOGRAMA, total['buckets']):
+                blocos['duracao'].append(f'{nome}_duracao_segundos_bucket{{{rotulos},le="{limite}"}} {contagem}')
+            blocos['duracao'] += [
+                f'{nome}_duracao_segundos_bucket{{{rotulos},le="+Inf"}} {total["chamadas"]}',
+                f'{nome}_duracao_segundos_sum{{{rotulos}}} {total["segundos"]:.6f}',
+                f'{nome}_duracao_segundos_count{{{rotulos}}} {total["chamadas"]}',
+            ]
+            blocos['linhas'].append(f'{nome}_linhas_total{{{rotulos}}} {total["linhas"]}')
+            blocos['erros'].append(f'{nome}_erros_total{{{rotulos}}} {total["erros"]}')
+            if total['hit'] or total['miss']:
+                blocos['cache'] += [f'{nome}_cache_total{{{rotulos},resultado="hit"}} {total["hit"]}',
+                                    f'{nome}_cache_total{{{rotulos},resultado="miss"}} {total["miss"]}']
+            blocos['ultima'].append(f'{nome}_ultima_duracao_segundos{{{rotulos}}} {total["ultima_duracao"]:.6f}')
+            if total['ultima_memoria'] is not None:
+                blocos['memoria'].append(f'{nome}_memoria_delta_bytes{{{rotulos}}} {total["ultima_memoria"]}')
+        linhas = [linha for bloco in blocos.values() if len(bloco) > 2 for linha in bloco]
+        linhas += [f"# HELP {PREFIXO_METRICAS}_metricas_exportadas_timestamp_segundos Momento da exportação.",
+                   f"# TYPE {PREFIXO_METRICAS}_metricas_exportadas_timestamp_segundos gauge",
+                   f'{PREFIXO_METRICAS}_metricas_exportadas_timestamp_segundos{{processo="{_escapar(processo)}"}} {time.time():.3f}']
+        return "\n".join(linhas) + "\n"
+
+    def exportar_prometheus(self, caminho, processo):
+        """Grava o arquivo de forma atômica (arquivo temporário + rename): o coletor nunca lê um arquivo pela metade."""
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            f.write(self.para_prometheus(processo))
+        os.replace(temporario, caminho)
+        self._ultima_exportacao = time.monotonic()
+
+    def exportar_periodicamente(self, caminho, processo, intervalo=INTERVALO_EXPORTACAO):
+        """Exporta se a última exportação tiver mais de 'intervalo' segundos. Retorna True se exportou."""
+        if time.monotonic() - self._ultima_exportacao < intervalo:
+            return False
+        try:
+            self.exportar_prometheus(caminho, processo)
+        except OSError:
+            return False
+        return True
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+REGISTRO = RegistroMetricas()
+
+# Medições em andamento na thread atual (uma sessão do Streamlit roda em uma thread)
+_ativas = threading.local()
+
+
+def _pilha():
+    if not hasattr(_ativas, 'pilha'):
+        _ativas.pilha = []
+    return _ativas.pilha
+
+
+# --- MEDIÇÃO ---
+
+class Medicao:
+    """
+    Mede duração e variação de memória residente de um trecho. Use com 'with'
+    (ou 'iniciar'/'encerrar' quando o trecho não cabe em um bloco). 'linhas' pode ser
+    preenchido durante o trecho. Com cache='hit' a medição conta como acerto de cache,
+    a menos que 'registrar_calculo' seja chamado dentro dela (aí vira 'miss').
+    """
+
+    def __init__(self, operacao, linhas=None, cache=None, registro=None):
+        self.operacao = operacao
+        self.linhas = linhas
+        self.cache = cache
+        self.segundos = None
+        self.memoria_bytes = None
+        self._registro = registro or REGISTRO
+        self._inicio = None
+        self._rss_inicial = None
+
+    def iniciar(self):
+        _pilha().append(self)
+        self._rss_inicial = _rss_bytes()
+        self._inicio = time.perf_counter()
+        return self
+
+    def encerrar(self, erro=False):
+        self.segundos = time.perf_counter() - self._inicio
+        rss = _rss_bytes()
+        if rss is not None and self._rss_inicial is not None:
+            self.memoria_bytes = rss - self._rss_inicial
+        pilha = _pilha()
+        if self in pilha:
+            pilha.remove(self)
+        self._registro.registrar(self.operacao, self.segundos, self.linhas, self.cache, self.memoria_bytes, erro)
+        return self
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, tipo_excecao, excecao, rastreamento):
+        self.encerrar(erro=tipo_excecao is not None)
+        return False
+
+
+def medir(operacao, linhas=None, cache=None):
+    """Context manager: 'with medir("pagina.mapa") as medicao: ...'."""
+    return Medicao(operacao, linhas, cache)
+
+
+def registrar_calculo():
+    """
+    Chamado dentro de uma função em cache quando ela realmente executa: marca a medição
+    com cache mais interna em andamento como 'miss'. Sem medição ativa não faz nada.
+    """
+    for medicao in reversed(_pilha()):
+        if medicao.cache is not None:
+            medicao.cache = 'miss'
+            return
+
+
+def instrumentar(operacao=None, cache=False):
+    """
+    Decorador: registra duração, memória, linhas processadas (DataFrame de entrada ou de saída)
+    e, com cache=True, acerto/falha de cache de cada chamada. 'operacao' padrão: nome da função.
+    Preserva o '.clear()' das funções com st.cache_data/st.cache_resource.
+    """
+    def decorar(funcao):
+        nome = operacao or funcao.__name__
+
+        @functools.wraps(funcao)
+        def chamar(*args, **kwargs):
+            with Medicao(nome, cache='hit' if cache else None) as medicao:
+                resultado = funcao(*args, **kwargs)
+                medicao.linhas = _contar_linhas(args, kwargs, resultado)
+            return resultado
+
+        if hasattr(funcao, 'clear'):
+            chamar.clear = funcao.clear
+        return chamar
+    return decorar
@@ -0,0 +1,141 @@
+# func/kpis.py
+import numpy as np
+import pandas as pd
+
+# Parciais por classe de Fraud_Label: tudo o que os KPIs precisam, em uma única passada.
+# O rollup diário do ETL tem exatamente essas somas, então os mesmos KPIs saem dele.
+COLUNAS_PARCIAIS = ['Total_Transacoes', 'Soma_Valor', 'Qtd_Valor', 'Soma_Risk_Score', 'Qtd_Risk_Score']
+
+CHAVES_KPIS = ['valor_total', 'num_transacoes', 'ticket_medio', 'num_fraudes', 'valor_fraudes',
+               'taxa_fraude_vol', 'risco_medio_fraudes', 'risco_medio_legitimas']
+
+# Métricas extras registradas de forma declarativa (veja 'registrar_metrica')
+METRICAS_EXTRAS = {}
+
+
+def registrar_metrica(nome, formula, agregacao_global=None):
+    """
+    Registra uma métrica extra.
+    - formula(parciais, kpis, globais) -> valor. 'parciais' é o DataFrame por classe
+      (índice 0/1, colunas de COLUNAS_PARCIAIS), 'kpis' são as métricas básicas já calculadas
+      e 'globais' traz o resultado das agregações globais.
+    - agregacao_global: (coluna, função) calculada sobre a coluna inteira, para métricas que não
+      se decompõem por classe (ex.: mediana). Sem as linhas (ex.: rollup) o valor fica None.
+    """
+    METRICAS_EXTRAS[nome] = {'formula': formula, 'agregacao_global': agregacao_global}
+
+
+def _parcial_por_classe(classes, valores, num_classes):
+    """Soma e contagem (ignorando NaN) de 'valores' por classe, com np.bincount."""
+    validos = ~np.isnan(valores)
+    if validos.all():
+        soma = np.bincount(classes, weights=valores, minlength=num_classes)
+        quantidade = np.bincount(classes, minlength=num_classes)
+    else:
+        soma = np.bincount(classes[validos], weights=valores[validos], minlength=num_classes)
+        quantidade = np.bincount(classes[validos], minlength=num_classes)
+    return soma, quantidade
+
+
+def calcular_parciais(df: pd.DataFrame):
+    """
+    Calcula as parciais por Fraud_Label em uma única passada sobre cada coluna,
+    sem criar DataFrames intermediários de fraude/legítima.
+    """
+    rotulos = df['Fraud_Label'].to_numpy()
+    if rotulos.dtype.kind in 'iub' and len(rotulos) and rotulos.min() >= 0:
+        classes = rotulos.astype(np.intp, copy=False)
+        indice = np.arange(classes.max() + 1)
+    else:
+        # Rótulos não inteiros (ex.: NaN): fatoração genérica
+        codigos, indice = pd.factorize(rotulos, sort=True)
+        classes = codigos[codigos >= 0]
+        if len(classes) < len(codigos):
+            df = df[codigos >= 0]
+
+    num_classes = len(indice)
+    valor = df['Transaction_Amount'].to_numpy(dtype=np.float64)
+    risco = df['Risk_Score'].to_numpy(dtype=np.float64)
+    soma_valor, qtd_valor = _parcial_por_classe(classes, valor, num_classes)
+    soma_risco, qtd_risco = _parcial_por_classe(classes, risco, num_classes)
+
+    parciais = pd.DataFrame({
+        'Total_Transacoes': np.bincount(classes, minlength=num_classes),
+        'Soma_Valor': soma_valor,
+        'Qtd_Valor': qtd_valor,
+        'Soma_Risk_Score': soma_risco,
+        'Qtd_Risk_Score': qtd_risco,
+    }, index=pd.Index(indice, name='Fraud_Label'))
+    return parciais[parciais['Total_Transacoes'] > 0]
+
+
+def calcular_parciais_rollup(df_rollup: pd.DataFrame):
+    """Parciais por Fraud_Label a partir do rollup diário do ETL."""
+    parciais = df_rollup.groupby('Fraud_Label')[['Total_Transacoes', 'Soma_Valor', 'Soma_Risk_Score']].sum()
+    parciais['Qtd_Valor'] = parciais['Total_Transacoes']
+    parciais['Qtd_Risk_Score'] = parciais['Total_Transacoes']
+    return parciais[COLUNAS_PARCIAIS]
+
+
+def calcular_kpis(parciais: pd.DataFrame, num_transacoes=None, globais=None, extras=None):
+    """
+    Monta o dicionário de KPIs a partir das parciais por classe.
+    - num_transacoes: contagem de IDs distintos, se já conhecida. None usa o nº de linhas
+      (válido quando o Transaction_ID é garantidamente único).
+    - extras: nomes de métricas registradas a incluir. None inclui todas.
+    """
+    vazio = pd.Series(0, index=COLUNAS_PARCIAIS)
+    fraude = parciais.loc[1] if 1 in parciais.index else vazio
+    legitima = parciais.loc[0] if 0 in parciais.index else vazio
+
+    total_linhas = int(parciais['Total_Transacoes'].sum())
+    if num_transacoes is None:
+        num_transacoes = total_linhas
+    valor_total = parciais['Soma_Valor'].sum()
+    qtd_valor = parciais['Qtd_Valor'].sum()
+    num_fraudes = int(fraude['Total_Transacoes'])
+
+    kpis = {
+        'valor_total': valor_total,
+        'num_transacoes': num_transacoes,
+        'ticket_medio': valor_total / qtd_valor if qtd_valor > 0 else 0,
+        'num_fraudes': num_fraudes,
+        'valor_fraudes': fraude['Soma_Valor'],
+        'taxa_fraude_vol': (num_fraudes / num_transacoes) * 100 if num_transacoes > 0 else 0,
+        'risco_medio_fraudes': fraude['Soma_Risk_Score'] / fraude['Qtd_Risk_Score'] if fraude['Qtd_Risk_Score'] > 0 else 0,
+        'risco_medio_legitimas': legitima['Soma_Risk_Score'] / legitima['Qtd_Risk_Score'] if legitima['Qtd_Risk_Score'] > 0 else 0
+    }
+
+    nomes = METRICAS_EXTRAS if extras is None else extras
+    basicas = dict(kpis)
+    for nome in nomes:
+        kpis[nome] = METRICAS_EXTRAS[nome]['formula'](parciais, basicas, globais or {})
+    return kpis
+
+
+def calcular_globais(df: pd.DataFrame, extras=None):
+    """Executa as agregações globais declaradas pelas métricas extras (ex.: mediana)."""
+    globais = {}
+    for nome in (METRICAS_EXTRAS if extras is None else extras):
+        agregacao = METRICAS_EXTRAS[nome]['agregacao_global']
+        if agregacao is not None:
+            coluna, funcao = agregacao
+            globais[nome] = df[coluna].agg(funcao) if not df.empty else 0
+    return globais
+
+
+def kpis_vazios(extras=None):
+    return {k: 0 for k in CHAVES_KPIS + list(METRICAS_EXTRAS if extras is None else extras)}
+
+
+# --- MÉTRICAS EXTRAS PADRÃO ---
+
+registrar_metrica(
+    'ticket_mediano',
+    lambda parciais, kpis, globais: globais.get('ticket_mediano'),
+    agregacao_global=('Transaction_Amount', 'median'),
+)
+registrar_metrica(
+    'participacao_valor_fraude',
+    lambda parciais, kpis, globais: (kpis['valor_fraudes'] / kpis['valor_total']) * 100 if kpis['valor_total'] else 0,
+)
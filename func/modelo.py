@@ -0,0 +1,436 @@
+# func/modelo.py
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from xgboost import XGBClassifier
+
+from func.codificacao import CodificadorOneHot
+from func.estatisticas import assinatura_dados
+from func.outliers import COLUNAS_FLAGS
+
+# --- CONFIGURAÇÕES ---
+DIRETORIO_MODELOS = "modelos"  # Onde os modelos treinados ficam salvos
+ARQUIVO_ULTIMO_MODELO = "ultimo.json"  # Aponta para o último modelo válido
+# As máscaras de outliers do ETL ficam de fora: são derivadas das próprias features
+COLUNAS_IGNORADAS = ['Transaction_ID', 'User_ID', 'Timestamp'] + list(COLUNAS_FLAGS.values())
+ARQUIVO_CODIFICADOR = "codificador.json"  # Vocabulário do one-hot, salvo junto de cada modelo
+VERSAO_PREPARACAO = 2  # Entra na impressão digital: mudar a preparação das features força um novo treino
+HIPERPARAMETROS_PADRAO = {
+    'n_estimators': 100,
+    'random_state': 42,
+    'use_label_encoder': False,
+    'eval_metric': 'logloss',
+}
+TAMANHO_AMOSTRA_TREINO = 200_000  # Acima disso o treino usa amostragem estratificada (com pesos) por classe
+TAMANHO_LOTE_EXTERNO = 50_000     # Linhas por lote no treino em memória externa
+
+
+def preparar_dados_para_modelo(df, codificador=None):
+    """
+    Transforma o DataFrame em matriz de features esparsa (X, CSR) e alvo (y).
+    Sem 'codificador', um novo CodificadorOneHot é ajustado em 'df'.
+    Retorna (X, y, codificador); os nomes das colunas de X estão em codificador.colunas.
+    """
+    if codificador is None:
+        codificador = CodificadorOneHot().ajustar(df, ignorar=COLUNAS_IGNORADAS + ['Fraud_Label'])
+    X = codificador.transformar(df)
+    y = df['Fraud_Label'].to_numpy()
+
+    return X, y, codificador
+
+
+# --- AMOSTRAGEM ESTRATIFICADA ---
+# A fraude é minoria: a maior parte das linhas é de legítimas redundantes. O treino amostrado mantém
+# as classes pequenas inteiras e sorteia a classe majoritária; cada linha recebe peso
+# 1 / taxa da sua classe, o que preserva as somas ponderadas (e a taxa base de fraude) dos dados completos.
+
+def calcular_taxas_amostragem(contagens, max_linhas):
+    """
+    Taxa de amostragem por classe para caber em 'max_linhas'. Classes menores que a cota
+    igualitária do orçamento restante entram inteiras; as demais dividem o que sobrar.
+    - contagens: {classe: nº de linhas}. Retorna {classe: taxa em (0, 1]}.
+    """
+    taxas = {}
+    restante = max_linhas
+    pendentes = sorted(contagens.items(), key=lambda item: item[1])
+    for i, (classe, total) in enumerate(pendentes):
+        manter = min(total, restante / (len(pendentes) - i))
+        taxas[classe] = manter / total if total else 1.0
+        restante -= manter
+    return taxas
+
+
+def amostrar_estratificado(df, max_linhas=TAMANHO_AMOSTRA_TREINO, coluna_alvo='Fraud_Label', semente=42):
+    """
+    Amostra estratificada por classe para o treino em memória.
+    Retorna (amostra, pesos, info); 'info' descreve a amostra para a interface.
+    """
+    classes, codigos, contagens = np.unique(df[coluna_alvo].to_numpy(), return_inverse=True, return_counts=True)
+    taxas = calcular_taxas_amostragem(dict(zip(classes.tolist(), contagens.tolist())), max_linhas)
+    rng = np.random.default_rng(semente)
+    selecionadas, pesos = [], []
+    for i, classe in enumerate(classes.tolist()):
+        posicoes = np.flatnonzero(codigos == i)
+        quantidade = max(int(round(taxas[classe] * len(posicoes))), 1)
+        if quantidade < len(posicoes):
+            posicoes = rng.choice(posicoes, quantidade, replace=False)
+        selecionadas.append(posicoes)
+        pesos.append(np.full(len(posicoes), contagens[i] / len(posicoes)))
+    selecionadas, pesos = np.concatenate(selecionadas), np.concatenate(pesos)
+    ordem = np.argsort(selecionadas)  # Mantém a ordem original das linhas
+    info = {
+        'modo': 'amostra',
+        'linhas_totais': int(len(df)),
+        'linhas_treino': int(len(selecionadas)),
+        'taxas': {str(classe): taxa for classe, taxa in taxas.items()},
+    }
+    return df.iloc[selecionadas[ordem]], pesos[ordem], info
+
+
+def _importancias(booster, colunas, info):
+    """Importâncias por ganho, normalizadas para somar 1 (mesmo critério de feature_importances_)."""
+    ganhos = booster.get_score(importance_type='gain')
+    valores = np.array([ganhos.get(col, 0.0) for col in colunas], dtype=np.float64)
+    if valores.sum() > 0:
+        valores = valores / valores.sum()
+    importancias = pd.DataFrame({
+        'Variavel': colunas,
+        'Importancia': valores
+    }).sort_values(by='Importancia', ascending=False)
+    importancias.attrs['treino'] = info
+    return importancias
+
+
+def treinar_modelo_xgboost_e_obter_importancias(df, hiperparametros=None, max_linhas=TAMANHO_AMOSTRA_TREINO):
+    """
+    Treina o XGBClassifier e retorna (modelo, DataFrame de importâncias, codificador).
+    Com mais de 'max_linhas' linhas treina sobre uma amostra estratificada com pesos
+    (None treina sempre com tudo). O resumo do treino fica em importancias.attrs['treino'].
+    """
+    pesos = None
+    info = {'modo': 'completo', 'linhas_totais': int(len(df)), 'linhas_treino': int(len(df))}
+    if max_linhas and len(df) > max_linhas:
+        df, pesos, info = amostrar_estratificado(df, max_linhas)
+    X, y, codificador = preparar_dados_para_modelo(df)
+
+    model = XGBClassifier(**(hiperparametros or HIPERPARAMETROS_PADRAO))
+    model.fit(X, y, sample_weight=pesos)
+    model.get_booster().feature_names = codificador.colunas
+
+    return model, _importancias(model.get_booster(), codificador.colunas, info), codificador
+
+
+# --- TREINO EM MEMÓRIA EXTERNA ---
+
+def lotes_parquet(diretorio, tamanho_lote=TAMANHO_LOTE_EXTERNO):
+    """Lotes (DataFrames) da cópia Parquet do ETL, lidos um de cada vez pelo Arrow."""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(diretorio, format='parquet', partitioning='hive')
+    colunas = [nome for nome in dataset.schema.names if nome != 'Ano_Mes']  # Partição, não é feature
+    # Sem leitura antecipada (no máximo um lote e um arquivo em memória) e com o alocador do sistema,
+    # que devolve a memória entre os lotes: o pico não cresce a cada passada do XGBoost
+    pool = pa.system_memory_pool()
+    lotes = dataset.to_batches(columns=colunas, batch_size=tamanho_lote, batch_readahead=1,
+                               fragment_readahead=1, memory_pool=pool)
+    for lote in lotes:
+        yield lote.to_pandas(memory_pool=pool)
+
+
+def lotes_sqlite(engine, tabela, tamanho_lote=TAMANHO_LOTE_EXTERNO):
+    """Lotes (DataFrames) de uma tabela do banco, via cursor com chunksize."""
+    from sqlalchemy import text
+
+    with engine.connect() as conn:
+        yield from pd.read_sql(text(f"SELECT * FROM {tabela}"), conn, chunksize=tamanho_lote)
+
+
+class IteradorLotes(xgb.DataIter):
+    """
+    Entrega ao XGBoost os lotes de uma fonte sob demanda: só um lote fica em memória por vez e
+    o XGBoost guarda a matriz quantizada em cache no disco. O XGBoost percorre a fonte mais de
+    uma vez, por isso 'abrir_lotes' é uma função que devolve um iterador novo a cada chamada.
+    - taxas: {classe: taxa} para amostrar as classes lote a lote (Bernoulli), com peso 1 / taxa.
+      O gerador aleatório é reiniciado a cada passada, então todas as passadas veem a mesma amostra.
+    """
+
+    def __init__(self, abrir_lotes, codificador, diretorio_cache, taxas=None, coluna_alvo='Fraud_Label', semente=42):
+        self._abrir_lotes = abrir_lotes
+        self._codificador = codificador
+        self._taxas = taxas
+        self._coluna_alvo = coluna_alvo
+        self._semente = semente
+        self._lotes = None
+        self._rng = None
+        self.linhas_treino = 0
+        self._contando = True  # Conta as linhas só na primeira passada
+        super().__init__(cache_prefix=os.path.join(diretorio_cache, 'cache'))
+
+    def reset(self):
+        self._lotes = None
+        if self.linhas_treino:
+            self._contando = False
+
+    def next(self, input_data):
+        if self._lotes is None:
+            self._lotes = iter(self._abrir_lotes())
+            self._rng = np.random.default_rng(self._semente)
+        for lote in self._lotes:
+            y = lote[self._coluna_alvo].to_numpy()
+            pesos = None
+            if self._taxas:
+                taxa_linha = pd.Series(y).map(self._taxas).fillna(1.0).to_numpy()
+                manter = self._rng.random(len(y)) < taxa_linha
+                lote, y, pesos = lote[manter], y[manter], 1.0 / taxa_linha[manter]
+            if len(lote) == 0:
+                continue
+            input_data(data=self._codificador.transformar(lote), label=y, weight=pesos)
+            if self._contando:
+                self.linhas_treino += len(lote)
+            return True
+        return False
+
+
+def _parametros_booster(hiperparametros):
+    """Traduz os hiperparâmetros do XGBClassifier para xgb.train: (parâmetros, nº de rodadas)."""
+    parametros = {'objective': 'binary:logistic', 'tree_method': 'hist'}
+    rodadas = 100
+    for nome, valor in hiperparametros.items():
+        if nome == 'n_estimators':
+            rodadas = valor
+        elif nome == 'random_state':
+            parametros['seed'] = valor
+        elif nome != 'use_label_encoder':
+            parametros[nome] = valor
+    return parametros, rodadas
+
+
+def treinar_em_memoria_externa(abrir_lotes, hiperparametros=None, max_linhas=None, diretorio_cache=None):
+    """
+    Treina a partir de uma fonte em lotes, sem carregar tudo na memória.
+    1) Uma passada ajusta o codificador e conta as linhas por classe.
+    2) O XGBoost consome a fonte pelo IteradorLotes (ExtMemQuantileDMatrix, cache em disco).
+    Com 'max_linhas' as classes são amostradas lote a lote com as taxas de
+    'calcular_taxas_amostragem' (e pesos 1 / taxa).
+    Retorna (booster, DataFrame de importâncias, codificador).
+    """
+    contagens = Counter()
+
+    def contando_classes(lotes):
+        for lote in lotes:
+            contagens.update(lote['Fraud_Label'].value_counts().to_dict())
+            yield lote
+
+    codificador = CodificadorOneHot().ajustar_lotes(contando_classes(abrir_lotes()),
+                                                    ignorar=COLUNAS_IGNORADAS + ['Fraud_Label'])
+    total = sum(contagens.values())
+    taxas = calcular_taxas_amostragem(dict(contagens), max_linhas) if max_linhas and total > max_linhas else None
+
+    parametros, rodadas = _parametros_booster(hiperparametros or HIPERPARAMETROS_PADRAO)
+    with tempfile.TemporaryDirectory(prefix='xgb-cache-', dir=diretorio_cache) as cache:
+        iterador = IteradorLotes(abrir_lotes, codificador, cache, taxas)
+        matriz = xgb.ExtMemQuantileDMatrix(iterador)
+        booster = xgb.train(parametros, matriz, num_boost_round=rodadas)
+        del matriz
+    booster.feature_names = codificador.colunas
+
+    info = {
+        'modo': 'memoria_externa',
+        'linhas_totais': int(total),
+        'linhas_treino': int(iterador.linhas_treino),
+        'taxas': {str(classe): taxa for classe, taxa in taxas.items()} if taxas else None,
+    }
+    return booster, _importancias(booster, codificador.colunas, info), codificador
+
+
+def calcular_impressao_digital(df: pd.DataFrame, hiperparametros=None, max_linhas=TAMANHO_AMOSTRA_TREINO):
+    """
+    Gera uma "impressão digital" curta dos dados, dos hiperparâmetros e do modo de treino.
+    Usa apenas metadados baratos: nº de linhas, Timestamp máximo e o esquema (colunas + tipos).
+    """
+    hiperparametros = hiperparametros or HIPERPARAMETROS_PADRAO
+    conteudo = json.dumps({
+        **assinatura_dados(df),
+        'hiperparametros': hiperparametros,
+        'preparacao': VERSAO_PREPARACAO,
+        'amostra': max_linhas if max_linhas and len(df) > max_linhas else None,
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(conteudo.encode()).hexdigest()[:16]
+
+
+class RegistroModelos:
+    """
+    Registro em disco dos modelos XGBoost treinados e de suas importâncias.
+    Cada modelo fica em '<diretorio>/<impressao_digital>/', e o arquivo 'ultimo.json'
+    aponta para o último modelo válido. O re-treino roda em uma thread em segundo plano.
+    """
+
+    def __init__(self, diretorio=DIRETORIO_MODELOS, max_linhas_treino=TAMANHO_AMOSTRA_TREINO):
+        self.diretorio = diretorio
+        self.max_linhas_treino = max_linhas_treino
+        self._lock = threading.Lock()
+        self._treinos_em_andamento = {}
+        self._cache_importancias = {}
+        os.makedirs(self.diretorio, exist_ok=True)
+
+    def _caminho(self, impressao):
+        return os.path.join(self.diretorio, impressao)
+
+    def existe(self, impressao):
+        return os.path.exists(os.path.join(self._caminho(impressao), 'metadados.json'))
+
+    def salvar(self, impressao, modelo, importancias, hiperparametros, codificador=None):
+        """Grava modelo + importâncias (+ vocabulário do codificador) em um diretório temporário e o publica de forma atômica."""
+        booster = modelo.get_booster() if hasattr(modelo, 'get_booster') else modelo
+        tmp = tempfile.mkdtemp(prefix=f".{impressao}-", dir=self.diretorio)
+        booster.save_model(os.path.join(tmp, 'modelo.ubj'))
+        importancias.to_csv(os.path.join(tmp, 'importancias.csv'), index=False)
+        if codificador is not None:
+            codificador.salvar(os.path.join(tmp, ARQUIVO_CODIFICADOR))
+        with open(os.path.join(tmp, 'metadados.json'), 'w') as f:
+            json.dump({
+                'impressao_digital': impressao,
+                'hiperparametros': hiperparametros,
+                'colunas': booster.feature_names,
+                'treino': importancias.attrs.get('treino'),
+                'treinado_em': time.time(),
+            }, f, default=str)
+
+        destino = self._caminho(impressao)
+        if os.path.exists(destino):
+            shutil.rmtree(destino)
+        os.replace(tmp, destino)
+
+        # Atualiza o ponteiro para o último modelo válido
+        ponteiro_tmp = os.path.join(self.diretorio, f".{ARQUIVO_ULTIMO_MODELO}.tmp")
+        with open(ponteiro_tmp, 'w') as f:
+            json.dump({'impressao_digital': impressao}, f)
+        os.replace(ponteiro_tmp, os.path.join(self.diretorio, ARQUIVO_ULTIMO_MODELO))
+
+    def carregar_importancias(self, impressao):
+        """Lê as importâncias salvas (mantidas em memória após a primeira leitura)."""
+        if impressao not in self._cache_importancias:
+            if not self.existe(impressao):
+                return None
+            caminho = os.path.join(self._caminho(impressao), 'importancias.csv')
+            importancias = pd.read_csv(caminho)
+            importancias.attrs['treino'] = (self.carregar_metadados(impressao) or {}).get('treino')
+            self._cache_importancias[impressao] = importancias
+        return self._cache_importancias[impressao]
+
+    def carregar_metadados(self, impressao):
+        """Lê o 'metadados.json' do modelo (hiperparâmetros, colunas e resumo do treino), se existir."""
+        if not self.existe(impressao):
+            return None
+        with open(os.path.join(self._caminho(impressao), 'metadados.json')) as f:
+            return json.load(f)
+
+    def caminho_modelo(self, impressao):
+        return os.path.join(self._caminho(impressao), 'modelo.ubj')
+
+    def carregar_codificador(self, impressao):
+        """Codificador (vocabulário do one-hot) salvo com o modelo, ou None para modelos antigos."""
+        caminho = os.path.join(self._caminho(impressao), ARQUIVO_CODIFICADOR)
+        if not os.path.exists(caminho):
+            return None
+        return CodificadorOneHot.carregar(caminho)
+
+    def carregar_modelo(self, impressao):
+        """Recarrega o booster salvo para a impressão digital informada."""
+        if not self.existe(impressao):
+            return None
+        modelo = XGBClassifier()
+        modelo.load_model(self.caminho_modelo(impressao))
+        return modelo
+
+    def ultimo_valido(self):
+        """Retorna a impressão digital do último modelo salvo, se houver."""
+        try:
+            with open(os.path.join(self.diretorio, ARQUIVO_ULTIMO_MODELO)) as f:
+                impressao = json.load(f)['impressao_digital']
+        except (OSError, ValueError, KeyError):
+            return None
+        return impressao if self.existe(impressao) else None
+
+    def treinando(self, impressao):
+        with self._lock:
+            thread = self._treinos_em_andamento.get(impressao)
+            return thread is not None and thread.is_alive()
+
+    def treinar(self, df, hiperparametros=None):
+        """Treina de forma síncrona e salva o resultado no registro."""
+        hiperparametros = hiperparametros or HIPERPARAMETROS_PADRAO
+        impressao = calcular_impressao_digital(df, hiperparametros, self.max_linhas_treino)
+        modelo, importancias, codificador = treinar_modelo_xgboost_e_obter_importancias(
+            df, hiperparametros, self.max_linhas_treino
+        )
+        self.salvar(impressao, modelo, importancias, hiperparametros, codificador)
+        self._cache_importancias[impressao] = importancias
+        return importancias
+
+    def treinar_externo(self, abrir_lotes, descricao_fonte, hiperparametros=None, max_linhas=None):
+        """
+        Treina em memória externa (veja 'treinar_em_memoria_externa') e salva no registro.
+        A impressão digital usa a descrição da fonte, o nº de linhas e as colunas, já que não há
+        um DataFrame em memória. Retorna (impressao, importancias).
+        """
+        hiperparametros = hiperparametros or HIPERPARAMETROS_PADRAO
+        booster, importancias, codificador = treinar_em_memoria_externa(abrir_lotes, hiperparametros, max_linhas)
+        conteudo = json.dumps({
+            'fonte': descricao_fonte,
+            'linhas': importancias.attrs['treino']['linhas_totais'],
+            'colunas': codificador.colunas,
+            'hiperparametros': hiperparametros,
+            'preparacao': VERSAO_PREPARACAO,
+            'amostra': max_linhas,
+        }, sort_keys=True, default=str)
+        impressao = hashlib.sha256(conteudo.encode()).hexdigest()[:16]
+        self.salvar(impressao, booster, importancias, hiperparametros, codificador)
+        self._cache_importancias[impressao] = importancias
+        return impressao, importancias
+
+    def treinar_em_segundo_plano(self, df, hiperparametros=None):
+        """Dispara o treino em uma thread, evitando treinos duplicados da mesma impressão digital."""
+        impressao = calcular_impressao_digital(df, hiperparametros, self.max_linhas_treino)
+        with self._lock:
+            thread = self._treinos_em_andamento.get(impressao)
+            if thread is not None and thread.is_alive():
+                return
+            thread = threading.Thread(target=self._treinar_seguro, args=(df, hiperparametros), daemon=True)
+            self._treinos_em_andamento[impressao] = thread
+            thread.start()
+
+    def _treinar_seguro(self, df, hiperparametros):
+        try:
+            self.treinar(df, hiperparametros)
+        except Exception as e:
+            print(f"ERRO no treino em segundo plano: {e}")
+
+    def obter_importancias(self, df, hiperparametros=None):
+        """
+        Retorna (importancias, atualizado).
+        - Se já existe um modelo para os dados atuais, ele é reutilizado (atualizado=True).
+        - Se existe um modelo anterior, retorna suas importâncias e re-treina em segundo plano (atualizado=False).
+        - Se não existe nenhum modelo, treina de forma síncrona.
+        O resumo do treino (linhas usadas, amostragem) está em importancias.attrs['treino'].
+        """
+        impressao = calcular_impressao_digital(df, hiperparametros, self.max_linhas_treino)
+        if self.existe(impressao):
+            return self.carregar_importancias(impressao), True
+
+        ultimo = self.ultimo_valido()
+        if ultimo is not None:
+            self.treinar_em_segundo_plano(df, hiperparametros)
+            return self.carregar_importancias(ultimo), False
+
+        return self.treinar(df, hiperparametros), True
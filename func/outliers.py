@@ -0,0 +1,175 @@
+# func/outliers.py
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# --- CONFIGURAÇÕES ---
+# Regras de outlier. Todas saem das mesmas estatísticas, calculadas de uma vez para todas as colunas.
+METODOS = ('iqr', 'mad', 'percentil')
+ROTULOS_METODOS = {'iqr': 'IQR', 'mad': 'MAD', 'percentil': 'Percentil'}
+FATOR_IQR = 1.5                 # Cercas de Tukey: Q1 - 1,5 x IQR e Q3 + 1,5 x IQR
+LIMITE_Z_ROBUSTO = 3.5          # |z robusto| acima disso é outlier (Iglewicz e Hoaglin)
+CONSTANTE_Z_ROBUSTO = 0.6745    # z robusto = 0,6745 x (x - mediana) / MAD
+CONSTANTE_DESVIO_MEDIO = 1.2533 # Se o MAD é zero, a escala vem do desvio absoluto médio
+PERCENTIS_CORTE = (0.01, 0.99)  # Percentis de corte (capping)
+SEGMENTO_GLOBAL = 'Todos'
+MAX_COLUNAS = 63                # Uma máscara int64 por método: um bit por coluna
+
+# Máscaras por linha gravadas pelo ETL: o bit i indica que a coluna de 'Bit' = i está fora dos limites
+COLUNAS_FLAGS = {metodo: f'Outlier_{rotulo}' for metodo, rotulo in ROTULOS_METODOS.items()}
+
+
+def coluna_limite(metodo, lado):
+    """Nome da coluna do limite ('Inferior' ou 'Superior') de um método no DataFrame de limites."""
+    return f'Limite_{lado}_{ROTULOS_METODOS[metodo]}'
+
+
+def _matriz_por_coluna(valores, num_colunas):
+    """(linhas x colunas) -> matriz float64 contígua (colunas x linhas): os quantis particionam cada coluna na memória contígua."""
+    valores = np.asarray(valores, dtype=np.float64)
+    if valores.ndim == 1:
+        valores = valores.reshape(-1, num_colunas)
+    return np.ascontiguousarray(valores.T)
+
+
+def _quantis_por_coluna(matriz, quantis, pode_alterar=False):
+    """
+    np.quantile de cada coluna da 'matriz' (colunas x linhas), ignorando NaN. As colunas sem NaN vão
+    juntas em uma única chamada; as com NaN, uma a uma e só com os valores válidos (o np.nanquantile
+    vetorizado faz várias cópias da matriz inteira). Com 'pode_alterar' a matriz é reordenada no lugar.
+    Retorna um array (quantis x colunas).
+    """
+    resultado = np.full((len(quantis), matriz.shape[0]), np.nan)
+    com_nan = np.isnan(matriz).any(axis=1)
+    if not com_nan.all():
+        sem_nan = matriz[~com_nan] if com_nan.any() else matriz
+        resultado[:, ~com_nan] = np.quantile(sem_nan, quantis, axis=1, overwrite_input=pode_alterar or sem_nan is not matriz)
+    for i in np.flatnonzero(com_nan):
+        validos = matriz[i][~np.isnan(matriz[i])]
+        if len(validos):
+            resultado[:, i] = np.quantile(validos, quantis, overwrite_input=True)
+    return resultado
+
+
+def _estatisticas_matriz(matriz, metodos):
+    """
+    Quantis, MAD e limites de todas as colunas da 'matriz' (colunas x linhas): um único
+    np.quantile com todos os quantis e, para o MAD, uma mediana dos desvios. NaN é ignorado.
+    Retorna um dict nome -> array com uma posição por coluna.
+    """
+    num_colunas, num_linhas = matriz.shape
+    if num_linhas == 0:
+        vazio = np.full(num_colunas, np.nan)
+        p_inf = q1 = mediana = q3 = p_sup = mad = vazio
+    else:
+        p_inf, q1, mediana, q3, p_sup = _quantis_por_coluna(matriz, [PERCENTIS_CORTE[0], 0.25, 0.5, 0.75, PERCENTIS_CORTE[1]])
+        if 'mad' in metodos:
+            # Um único temporário: os desvios são feitos no lugar e a mediana pode reordená-los
+            desvios = matriz - mediana[:, None]
+            np.abs(desvios, out=desvios)
+            mad = _quantis_por_coluna(desvios, [0.5], pode_alterar=True)[0]
+            # Colunas com MAD zero (mais da metade dos valores iguais) usam o desvio absoluto médio
+            media_desvios = np.full(num_colunas, np.nan)
+            zerados = mad == 0
+            if zerados.any():
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore', RuntimeWarning)
+                    media_desvios[zerados] = np.nanmean(desvios[zerados], axis=1)
+            escala = np.where(mad > 0, mad / CONSTANTE_Z_ROBUSTO, CONSTANTE_DESVIO_MEDIO * media_desvios)
+        else:
+            mad = np.full(num_colunas, np.nan)
+
+    iqr = q3 - q1
+    resultado = {'Q1': q1, 'Mediana': mediana, 'Q3': q3, 'IQR': iqr, 'MAD': mad}
+    if 'iqr' in metodos:
+        resultado[coluna_limite('iqr', 'Inferior')] = q1 - FATOR_IQR * iqr
+        resultado[coluna_limite('iqr', 'Superior')] = q3 + FATOR_IQR * iqr
+    if 'mad' in metodos:
+        raio = LIMITE_Z_ROBUSTO * escala if num_linhas else mad
+        resultado[coluna_limite('mad', 'Inferior')] = mediana - raio
+        resultado[coluna_limite('mad', 'Superior')] = mediana + raio
+    if 'percentil' in metodos:
+        resultado[coluna_limite('percentil', 'Inferior')] = p_inf
+        resultado[coluna_limite('percentil', 'Superior')] = p_sup
+    return resultado
+
+
+def _segmentar(segmentos):
+    """Rótulos distintos (ordenados) e o índice do rótulo de cada linha; rótulo nulo vira -1."""
+    codigos, rotulos = pd.factorize(np.asarray(segmentos), sort=True)
+    return codigos, list(rotulos)
+
+
+def calcular_limites(valores, colunas, segmentos=None, metodos=METODOS):
+    """
+    Limites de outlier de várias colunas numéricas de uma vez.
+    - valores: array 2D (linhas x colunas), na ordem de 'colunas'.
+    - segmentos: rótulo de segmento de cada linha (ex.: Transaction_Type). Com ele cada segmento
+      tem os seus limites (as linhas são agrupadas com uma ordenação e cada bloco é uma passada).
+    - metodos: subconjunto de METODOS ('iqr', 'mad', 'percentil').
+    Retorna um DataFrame com uma linha por (Segmento, Coluna), com Bit (posição da coluna nas
+    máscaras), Linhas, quantis, MAD e as colunas Limite_Inferior_<MÉTODO> / Limite_Superior_<MÉTODO>.
+    """
+    if len(colunas) > MAX_COLUNAS:
+        raise ValueError(f"No máximo {MAX_COLUNAS} colunas por máscara de outliers ({len(colunas)} recebidas).")
+    matriz = _matriz_por_coluna(valores, len(colunas))
+
+    if segmentos is None:
+        grupos = [(SEGMENTO_GLOBAL, matriz)]
+    else:
+        codigos, rotulos = _segmentar(segmentos)
+        ordem = np.argsort(codigos, kind='stable')
+        fronteiras = np.searchsorted(codigos[ordem], np.arange(len(rotulos) + 1))
+        matriz = matriz[:, ordem]
+        grupos = [(rotulo, matriz[:, fronteiras[i]:fronteiras[i + 1]]) for i, rotulo in enumerate(rotulos)]
+
+    partes = []
+    for rotulo, bloco in grupos:
+        parte = pd.DataFrame(_estatisticas_matriz(bloco, metodos))
+        parte.insert(0, 'Linhas', bloco.shape[1])
+        parte.insert(0, 'Bit', np.arange(len(colunas)))
+        parte.insert(0, 'Coluna', list(colunas))
+        parte.insert(0, 'Segmento', rotulo)
+        partes.append(parte)
+    return pd.concat(partes, ignore_index=True)
+
+
+def marcar_outliers(valores, limites, segmentos=None, metodos=METODOS):
+    """
+    Máscaras de outlier por linha: para cada método, um int64 com o bit 'Bit' ligado quando a
+    coluna correspondente está fora dos limites do segmento da linha ('limites' vem de
+    'calcular_limites'; 'valores' segue a ordem das colunas de lá). NaN, e linhas de segmentos
+    sem limites, não são marcados.
+    Retorna um dict método -> array int64.
+    """
+    colunas = limites.drop_duplicates('Coluna').sort_values('Bit')['Coluna'].tolist()
+    valores = np.asarray(valores, dtype=np.float64)
+    if valores.ndim == 1:
+        valores = valores.reshape(-1, len(colunas))
+    if not colunas:
+        return {metodo: np.zeros(len(valores), dtype=np.int64) for metodo in metodos}
+    rotulos = limites['Segmento'].drop_duplicates().tolist()
+    # Segmento desconhecido vira -1, que aponta para a linha extra de limites NaN
+    indices = None if segmentos is None else pd.Index(rotulos).get_indexer(np.asarray(segmentos))
+    pesos = np.left_shift(np.int64(1), np.arange(len(colunas), dtype=np.int64))
+
+    mascaras = {}
+    for metodo in metodos:
+        cercas = []
+        for lado in ('Inferior', 'Superior'):
+            matriz = limites.pivot(index='Segmento', columns='Coluna', values=coluna_limite(metodo, lado))
+            matriz = matriz.reindex(index=rotulos, columns=colunas).to_numpy(dtype=np.float64)
+            if indices is None:
+                cercas.append(matriz[0])  # Limites globais: uma linha, comparada por broadcast
+            else:
+                cercas.append(np.vstack([matriz, np.full((1, len(colunas)), np.nan)])[indices])
+        fora = (valores < cercas[0]) | (valores > cercas[1])
+        mascaras[metodo] = fora.astype(np.int64) @ pesos
+    return mascaras
+
+
+def contar_outliers(mascara, num_colunas):
+    """Nº de linhas marcadas em cada coluna (bit) de uma máscara."""
+    bits = np.right_shift(np.asarray(mascara, dtype=np.int64)[:, None], np.arange(num_colunas, dtype=np.int64)) & 1
+    return bits.sum(axis=0)
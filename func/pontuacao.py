@@ -0,0 +1,199 @@
+# func/pontuacao.py
+import queue
+import threading
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import xgboost as xgb
+
+import etl
+from func.features import colunas_features
+from func.modelo import DIRETORIO_MODELOS, RegistroModelos
+
+# --- CONFIGURAÇÕES ---
+TAMANHO_MAXIMO_LOTE = 4096   # Máximo de transações pontuadas em uma chamada ao booster
+ESPERA_MAXIMA_LOTE = 0.0     # Segundos que o micro-lote espera por mais pedidos (0 = só os que já estão na fila)
+LIMIAR_FRAUDE = 0.5
+MAX_COLUNAS_DENSAS = 256     # Até aqui a matriz vai densa ao booster (predição mais rápida que em CSR)
+
+
+class RegistroInvalido(ValueError):
+    """
+    Um registro do pedido não pôde ser codificado (ex.: texto em uma coluna numérica, ou falta uma
+    coluna exigida pelo modelo). Erro de quem chama.
+    """
+
+
+
+class Pontuador:
+    """
+    Pontua transações com o booster salvo no registro de modelos.
+    A matriz de features sai do mesmo CodificadorOneHot do treino (vocabulário salvo com o
+    modelo), com um mapa categoria -> índice pré-calculado: nada de get_dummies por requisição.
+    Os registros chegam crus (colunas de TransacoesCompletas): as colunas que o ETL deriva de cada
+    transação (etl.COLUNAS_DO_TIMESTAMP) são recalculadas aqui: um DataFrame passa pelo próprio
+    'etl.transformar_dados'; uma lista de dicionários usa os mesmos atributos do pd.Timestamp. As
+    features por usuário (janelas móveis, média de gastos) dependem do histórico do usuário, que a
+    pontuação não tem: se o modelo as usa, quem chama precisa enviá-las (ex.: lidas da tabela
+    analítica). Registros sem alguma coluna de 'entradas' são recusados com RegistroInvalido, em vez
+    de pontuados com a feature ausente.
+    """
+
+    def __init__(self, booster, codificador, impressao=None):
+        self.booster = booster
+        self.codificador = codificador
+        self.impressao = impressao
+        self.colunas = codificador.colunas
+        self.denso = len(self.colunas) <= MAX_COLUNAS_DENSAS
+        modelo = list(codificador.numericas) + list(codificador.categoricas)
+        self.derivadas = [col for col in etl.COLUNAS_DO_TIMESTAMP if col in modelo]
+        # Colunas que cada registro precisa trazer (o valor pode ser nulo; a chave, não)
+        self.entradas = [col for col in modelo if col not in self.derivadas]
+        if self.derivadas and 'Timestamp' not in self.entradas:
+            self.entradas.append('Timestamp')
+        self.features_usuario = [col for col in colunas_features() if col in self.entradas]
+        self._conjunto_entradas = frozenset(self.entradas)
+
+    @classmethod
+    def carregar(cls, diretorio=DIRETORIO_MODELOS, impressao=None):
+        """Carrega o modelo indicado (ou o último válido) do registro em disco."""
+        registro = RegistroModelos(diretorio)
+        impressao = impressao or registro.ultimo_valido()
+        if impressao is None or not registro.existe(impressao):
+            raise FileNotFoundError(f"Nenhum modelo treinado encontrado em '{diretorio}'.")
+        codificador = registro.carregar_codificador(impressao)
+        if codificador is None:
+            raise ValueError(f"O modelo '{impressao}' foi salvo sem o vocabulário das features. Treine-o novamente.")
+        booster = xgb.Booster()
+        booster.load_model(registro.caminho_modelo(impressao))
+        return cls(booster, codificador, impressao)
+
+    def _conferir_entradas(self, presentes):
+        faltando = [col for col in self.entradas if col not in presentes]
+        if not faltando:
+            return
+        mensagem = f"faltam colunas exigidas pelo modelo: {', '.join(faltando)}"
+        if set(faltando) & set(self.features_usuario):
+            mensagem += (". As features por usuário são calculadas pelo ETL a partir do histórico do usuário "
+                         "e não na pontuação: envie os valores delas (ex.: da tabela analítica)")
+        raise RegistroInvalido(mensagem)
+
+    def _derivar_registro(self, registro):
+        """Registro com as colunas derivadas do Timestamp (self.derivadas); sem Timestamp, elas ficam ausentes."""
+        try:
+            instante = pd.Timestamp(registro['Timestamp'])
+        except (ValueError, TypeError) as e:
+            raise RegistroInvalido(f"Timestamp inválido: {registro['Timestamp']!r}") from e
+        if instante is pd.NaT:
+            return {**registro, **dict.fromkeys(self.derivadas)}
+        return {**registro, **{col: getattr(instante, etl.COLUNAS_DO_TIMESTAMP[col]) for col in self.derivadas}}
+
+    def codificar(self, df: pd.DataFrame):
+        """Matriz (linhas x colunas do modelo; densa ou CSR) a partir de um DataFrame, de forma vetorizada."""
+        self._conferir_entradas(df.columns)
+        if self.derivadas:
+            try:
+                derivadas = etl.transformar_dados(df[['Timestamp']].copy(), verbose=False)[self.derivadas]
+            except (ValueError, TypeError) as e:
+                raise RegistroInvalido(f"Timestamp inválido: {e}") from e
+            df = df.drop(columns=self.derivadas, errors='ignore').join(derivadas)
+        return self.codificador.transformar(df, denso=self.denso)
+
+    def codificar_registros(self, registros):
+        """Mesma matriz de 'codificar', a partir de uma lista de dicionários (caminho rápido para lotes pequenos)."""
+        for registro in registros:
+            if not registro.keys() >= self._conjunto_entradas:
+                self._conferir_entradas(registro)
+        if self.derivadas:
+            registros = [self._derivar_registro(registro) for registro in registros]
+        return self.codificador.transformar_registros(registros, denso=self.denso)
+
+    def empilhar(self, matrizes):
+        """Junta matrizes de 'codificar_registros' (mesmo layout) em uma só, para uma única chamada ao booster."""
+        if len(matrizes) == 1:
+            return matrizes[0]
+        return np.vstack(matrizes) if self.denso else sp.vstack(matrizes, format='csr')
+
+    def pontuar_matriz(self, matriz):
+        """Probabilidade de fraude por linha, com a predição in-place do booster (sem DMatrix)."""
+        if matriz.shape[0] == 0:
+            return np.empty(0, dtype=np.float32)
+        return self.booster.inplace_predict(matriz, validate_features=False)
+
+    def pontuar(self, dados):
+        """Pontua um DataFrame ou uma lista de dicionários. Retorna um array de probabilidades."""
+        if isinstance(dados, pd.DataFrame):
+            return self.pontuar_matriz(self.codificar(dados))
+        return self.pontuar_matriz(self.codificar_registros(dados))
+
+
+class LoteadorPontuacao:
+    """
+    Micro-lotes de pontuação: pedidos concorrentes (ex.: requisições HTTP) entram em uma fila e
+    uma única thread os junta em um lote, pontuado com uma só chamada ao booster.
+    Sem concorrência o pedido é pontuado sozinho, sem espera; sob carga os lotes crescem sozinhos
+    enquanto o lote anterior está sendo pontuado.
+    Cada pedido é codificado na thread de quem chama, antes de entrar na fila: um registro inválido
+    falha só o próprio pedido, e a fila recebe matrizes prontas, apenas empilhadas no lote.
+    """
+
+    def __init__(self, pontuador, tamanho_maximo=TAMANHO_MAXIMO_LOTE, espera_maxima=ESPERA_MAXIMA_LOTE):
+        self.pontuador = pontuador
+        self.tamanho_maximo = tamanho_maximo
+        self.espera_maxima = espera_maxima
+        self._fila = queue.Queue()
+        self._thread = threading.Thread(target=self._laco, daemon=True)
+        self._thread.start()
+
+    def pontuar(self, registros, timeout=None):
+        """
+        Codifica uma lista de registros, enfileira a matriz e espera as probabilidades (lista de floats).
+        Levanta RegistroInvalido se algum registro não puder ser codificado.
+        """
+        try:
+            matriz = self.pontuador.codificar_registros(registros)
+        except RegistroInvalido:
+            raise
+        except (ValueError, TypeError) as e:
+            raise RegistroInvalido(f"registro inválido: {e}") from e
+        futuro = Future()
+        self._fila.put((matriz, futuro))
+        return futuro.result(timeout)
+
+    def fechar(self):
+        self._fila.put(None)
+        self._thread.join()
+
+    def _proximo_lote(self, primeiro):
+        pedidos, total = [primeiro], primeiro[0].shape[0]
+        while total < self.tamanho_maximo:
+            try:
+                pedido = self._fila.get(timeout=self.espera_maxima) if self.espera_maxima else self._fila.get_nowait()
+            except queue.Empty:
+                break
+            if pedido is None:
+                self._fila.put(None)  # Repassa o sinal de parada para depois deste lote
+                break
+            pedidos.append(pedido)
+            total += pedido[0].shape[0]
+        return pedidos
+
+    def _laco(self):
+        while True:
+            primeiro = self._fila.get()
+            if primeiro is None:
+                return
+            pedidos = self._proximo_lote(primeiro)
+            try:
+                matriz = self.pontuador.empilhar([matriz for matriz, _ in pedidos])
+                probabilidades = self.pontuador.pontuar_matriz(matriz).tolist()
+            except Exception as e:
+                for _, futuro in pedidos:
+                    futuro.set_exception(e)
+                continue
+            inicio = 0
+            for matriz, futuro in pedidos:
+                futuro.set_result(probabilidades[inicio:inicio + matriz.shape[0]])
+                inicio += matriz.shape[0]
@@ -0,0 +1,253 @@
+# Arquivo: monitor.py
+import argparse
+import asyncio
+import json
+import os
+import time
+from array import array
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+# --- CONFIGURAÇÕES ---
+DB_URL = "sqlite:///creditdata.db"
+NOME_TABELA_ORIGEM = "TransacoesCompletas"
+LIMITE_FALHAS_PADRAO = 3          # Ação 1: "após um limiar ser atingido (ex: 3 falhas)"
+JANELA_PADRAO_SEGUNDOS = 3600     # Ação 1: janelas curtas de tempo (ex: última hora)
+TAMANHO_FILA = 64                 # Fila pequena: mantém a latência de ponta a ponta abaixo de 1 ms
+TAMANHO_LOTE_REPLAY = 50_000      # Linhas lidas do banco por vez no modo replay
+INTERVALO_TAIL_SEGUNDOS = 0.05    # Espera entre leituras quando o arquivo seguido não tem linhas novas
+
+# --- DETECTOR ---
+# Os eventos de falha não existem na origem: cada transação traz apenas o acumulado
+# Failed_Transaction_Count_7d. As falhas novas de um usuário são derivadas do aumento desse
+# contador entre eventos consecutivos (a primeira observação de um usuário só define a base).
+# Fontes que já emitem falhas explícitas usam o campo 'Falhas' no evento.
+
+
+class DetectorCardTesting:
+    """
+    Contadores de falhas por usuário em janela deslizante, guardados em anéis de tamanho fixo.
+    Cada usuário ocupa 'limite_falhas' posições de um único array('d') com os horários das
+    últimas falhas. Quando chega uma falha, basta olhar a falha mais antiga do anel: se ela
+    ainda está dentro da janela, o usuário atingiu o limiar (O(1) por evento, sem alocação).
+    """
+
+    def __init__(self, limite_falhas=LIMITE_FALHAS_PADRAO, janela_segundos=JANELA_PADRAO_SEGUNDOS):
+        self.limite_falhas = limite_falhas
+        self.janela_segundos = janela_segundos
+        self._slots = {}                 # User_ID -> índice do usuário nos arrays abaixo
+        self._aneis = array('d')         # limite_falhas horários por usuário (-inf = vazio)
+        self._proxima = array('l')       # Próxima posição a sobrescrever no anel de cada usuário
+        self._ultimo_contador = array('l')
+        self._alertado_ate = array('d')  # Evita alertas repetidos do mesmo usuário na mesma janela
+        self.eventos = 0
+        self.falhas = 0
+        self.alertas = 0
+
+    def _slot(self, usuario, contador):
+        slot = self._slots.get(usuario)
+        if slot is None:
+            slot = len(self._slots)
+            self._slots[usuario] = slot
+            self._aneis.extend([float('-inf')] * self.limite_falhas)
+            self._proxima.append(0)
+            self._ultimo_contador.append(contador)
+            self._alertado_ate.append(float('-inf'))
+            return slot, True
+        return slot, False
+
+    def registrar_falhas(self, slot, horario, quantidade):
+        """Grava 'quantidade' falhas no horário informado. Retorna True se o limiar foi atingido."""
+        base = slot * self.limite_falhas
+        proxima = self._proxima[slot]
+        for _ in range(min(quantidade, self.limite_falhas)):
+            self._aneis[base + proxima] = horario
+            proxima = (proxima + 1) % self.limite_falhas
+        self._proxima[slot] = proxima
+        self.falhas += quantidade
+        # A posição 'proxima' guarda a mais antiga das últimas 'limite_falhas' falhas
+        return horario - self._aneis[base + proxima] < self.janela_segundos
+
+    def processar(self, usuario, horario, contador_7d=None, falhas=None):
+        """
+        Processa um evento. 'falhas' (explícito) tem prioridade; senão as falhas novas
+        vêm do aumento de 'contador_7d'. Retorna um dicionário de alerta ou None.
+        """
+        self.eventos += 1
+        slot, novo = self._slot(usuario, contador_7d or 0)
+        if falhas is None:
+            if novo or contador_7d is None:
+                return None
+            falhas = contador_7d - self._ultimo_contador[slot]
+            self._ultimo_contador[slot] = contador_7d
+        if falhas <= 0 or not self.registrar_falhas(slot, horario, falhas):
+            return None
+        if horario < self._alertado_ate[slot]:
+            return None
+        self._alertado_ate[slot] = horario + self.janela_segundos
+        self.alertas += 1
+        return {'User_ID': usuario, 'horario': horario, 'falhas_na_janela': self.contar_falhas(usuario, horario)}
+
+    def contar_falhas(self, usuario, horario):
+        """Nº de falhas do usuário em (horario - janela, horario], limitado a 'limite_falhas'."""
+        slot = self._slots.get(usuario)
+        if slot is None:
+            return 0
+        base = slot * self.limite_falhas
+        inicio = horario - self.janela_segundos
+        return sum(1 for i in range(base, base + self.limite_falhas) if self._aneis[i] > inicio)
+
+    def memoria_estimada(self):
+        """Bytes ocupados pelos anéis e contadores (sem o dicionário de usuários)."""
+        return sum(a.itemsize * len(a) for a in (self._aneis, self._proxima, self._ultimo_contador, self._alertado_ate))
+
+
+# --- FONTES DE EVENTOS ---
+# Um evento é a tupla (User_ID, horario_em_segundos, contador_7d, falhas, recebido_em).
+
+def _evento_de_registro(registro, recebido_em):
+    if not isinstance(registro, dict):
+        raise ValueError(f"esperado um objeto JSON, recebido {type(registro).__name__}")
+    horario = registro['Timestamp']
+    if not isinstance(horario, (int, float)):
+        horario = pd.Timestamp(horario).timestamp()
+    contador = registro.get('Failed_Transaction_Count_7d')
+    falhas = registro.get('Falhas')
+    return (registro['User_ID'], float(horario),
+            None if contador is None else int(contador), None if falhas is None else int(falhas), recebido_em)
+
+
+def _ler_lotes_historicos(engine, limite, tamanho_lote):
+    """Lê a origem em ordem de Timestamp, em lotes, já convertida para listas Python."""
+    consulta = (f"SELECT User_ID, Timestamp, Failed_Transaction_Count_7d FROM {NOME_TABELA_ORIGEM} "
+                f"ORDER BY Timestamp, rowid" + (f" LIMIT {int(limite)}" if limite else ""))
+    with engine.connect() as conn:
+        for lote in pd.read_sql(text(consulta), conn, chunksize=tamanho_lote):
+            segundos = pd.to_datetime(lote['Timestamp'], format='ISO8601').astype('int64') / 1e9
+            yield list(zip(lote['User_ID'].tolist(), segundos.tolist(),
+                           lote['Failed_Transaction_Count_7d'].astype('int64').tolist()))
+
+
+async def reproduzir_historico(fila, engine, limite=None, tamanho_lote=TAMANHO_LOTE_REPLAY):
+    """
+    Modo replay: alimenta a fila com as linhas históricas da origem, o mais rápido possível.
+    A leitura do banco roda em uma thread, para não travar o laço de eventos.
+    """
+    lotes = _ler_lotes_historicos(engine, limite, tamanho_lote)
+    while True:
+        lote = await asyncio.to_thread(next, lotes, None)
+        if lote is None:
+            break
+        for usuario, horario, contador in lote:
+            await fila.put((usuario, horario, contador, None, time.perf_counter()))
+    await fila.put(None)
+
+
+async def seguir_arquivo(fila, caminho, do_inicio=False):
+    """
+    Segue um arquivo de eventos (uma linha JSON por evento, como 'tail -f'). Campos:
+    User_ID, Timestamp (ISO ou segundos) e Failed_Transaction_Count_7d ou Falhas.
+    """
+    with open(caminho, encoding='utf-8') as arquivo:
+        if not do_inicio:
+            arquivo.seek(0, os.SEEK_END)
+        while True:
+            linha = arquivo.readline()
+            if not linha:
+                await asyncio.sleep(INTERVALO_TAIL_SEGUNDOS)
+                continue
+            if not linha.endswith('\n'):
+                # Linha ainda sendo escrita: volta e espera o restante
+                arquivo.seek(arquivo.tell() - len(linha.encode('utf-8')))
+                await asyncio.sleep(INTERVALO_TAIL_SEGUNDOS)
+                continue
+            try:
+                evento = _evento_de_registro(json.loads(linha), time.perf_counter())
+            except (ValueError, KeyError, TypeError) as e:
+                print(f"AVISO: evento inválido ignorado ({e}): {linha.strip()[:120]}")
+                continue
+            await fila.put(evento)
+
+
+# --- CONSUMIDOR ---
+
+async def consumir(fila, detector, ao_alertar=None, amostra_latencia=1):
+    """
+    Consome eventos até receber None. Retorna as latências (ponta a ponta, em segundos) de
+    1 a cada 'amostra_latencia' eventos: da entrada na fila até a decisão do detector.
+    """
+    latencias = []
+    processar = detector.processar
+    while True:
+        evento = await fila.get()
+        if evento is None:
+            return latencias
+        usuario, horario, contador, falhas, recebido_em = evento
+        alerta = processar(usuario, horario, contador, falhas)
+        if alerta is not None and ao_alertar is not None:
+            ao_alertar(alerta)
+        if detector.eventos % amostra_latencia == 0:
+            latencias.append(time.perf_counter() - recebido_em)
+
+
+def _gravador_de_alertas(caminho):
+    if caminho is None:
+        return None
+    arquivo = open(caminho, 'a', encoding='utf-8')
+
+    def gravar(alerta):
+        arquivo.write(json.dumps(alerta) + '\n')
+        arquivo.flush()
+    return gravar
+
+
+def imprimir_resumo(detector, latencias, segundos):
+    print(f"Eventos: {detector.eventos:,} | Falhas derivadas: {detector.falhas:,} | "
+          f"Usuários: {len(detector._slots):,} | Alertas: {detector.alertas:,}")
+    print(f"Vazão: {detector.eventos / segundos:,.0f} eventos/s em {segundos:.2f}s | "
+          f"Memória dos anéis: {detector.memoria_estimada() / 1024:,.0f} KB")
+    if latencias:
+        serie = pd.Series(latencias) * 1000
+        print(f"Latência (ms): p50={serie.quantile(0.5):.3f} p99={serie.quantile(0.99):.3f} max={serie.max():.3f}")
+
+
+async def executar(args):
+    detector = DetectorCardTesting(args.limite_falhas, args.janela)
+    fila = asyncio.Queue(maxsize=TAMANHO_FILA)
+    ao_alertar = _gravador_de_alertas(args.alertas)
+
+    inicio = time.perf_counter()
+    if args.modo == 'replay':
+        produtor = asyncio.create_task(reproduzir_historico(fila, create_engine(DB_URL), args.limite))
+    else:
+        produtor = asyncio.create_task(seguir_arquivo(fila, args.arquivo, args.do_inicio))
+    try:
+        latencias = await consumir(fila, detector, ao_alertar, amostra_latencia=args.amostra_latencia)
+    finally:
+        produtor.cancel()
+    imprimir_resumo(detector, latencias, time.perf_counter() - inicio)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monitor de 'card testing' em tempo real (falhas por usuário em janela deslizante).")
+    parser.add_argument("modo", choices=["replay", "tail"],
+                        help="'replay' reproduz a tabela de origem; 'tail' segue um arquivo de eventos JSON.")
+    parser.add_argument("arquivo", nargs="?", help="Arquivo de eventos (modo 'tail').")
+    parser.add_argument("--limite-falhas", type=int, default=LIMITE_FALHAS_PADRAO,
+                        help=f"Falhas na janela que disparam o alerta (padrão: {LIMITE_FALHAS_PADRAO}).")
+    parser.add_argument("--janela", type=float, default=JANELA_PADRAO_SEGUNDOS,
+                        help=f"Tamanho da janela em segundos (padrão: {JANELA_PADRAO_SEGUNDOS}).")
+    parser.add_argument("--limite", type=int, default=None, help="Replay: nº máximo de linhas reproduzidas.")
+    parser.add_argument("--do-inicio", action="store_true", help="Tail: lê o arquivo desde o início.")
+    parser.add_argument("--alertas", default=None, help="Grava os alertas (JSON por linha) neste arquivo.")
+    parser.add_argument("--amostra-latencia", type=int, default=1, help="Mede a latência de 1 a cada N eventos.")
+    args = parser.parse_args()
+    if args.modo == 'tail' and not args.arquivo:
+        parser.error("o modo 'tail' precisa do caminho do arquivo")
+
+    print("--- Iniciando monitor de card testing ---")
+    try:
+        asyncio.run(executar(args))
+    except KeyboardInterrupt:
+        print("Monitor interrompido.")
@@ -0,0 +1,85 @@
+# paginas/analise_direcionada.py
+import streamlit as st
+import func.functions as api
+from func import graficos
+from func import instrumentacao
+
+
+def renderizar():
+    """Hipóteses de card testing e Risk_Score, só com as colunas necessárias."""
+    st.header("🎯 Análise Direcionada de Fraude")
+    st.markdown(
+        "Após as descobertas da Análise Exploratória, focamos esta investigação nas variáveis que o modelo "
+        "XGBoost apontou como as mais importantes. Vamos aprofundar nosso entendimento sobre os verdadeiros "
+        "indicadores de risco."
+    )
+    
+    # --- Carregamento dos dados ---
+    df = api.carregar_dados(api.COLUNAS_DIRECIONADA)
+
+    if df.empty:
+        st.warning("Não há dados para exibir.")
+        return
+
+    st.divider()
+
+    # --- NOVA Hipótese 1: A Anatomia do "Card Testing" ---
+    st.subheader("Hipótese 1: Qual o padrão exato das transações falhas?")
+    st.markdown(
+        "O `Failed_Transaction_Count_7d` foi o fator mais importante. Este gráfico mostra a distribuição "
+        "dessa variável **apenas para as transações que foram confirmadas como fraude**, revelando o "
+        "comportamento exato do fraudador."
+    )
+    
+    # Só as fraudes saem do banco (filtro no WHERE), em vez de mascarar a tabela inteira em pandas
+    df_fraudes = api.consultar_transacoes(['Failed_Transaction_Count_7d'], fraude=1)
+
+    with instrumentacao.medir("pagina.Análise Direcionada.histograma_falhas", linhas=len(df_fraudes)):
+        # Os histogramas são montados a partir de contagens por bin (NumPy), não das linhas brutas
+        fig_falhas = graficos.figura_histograma(
+            graficos.resumir_histograma(df_fraudes, 'Failed_Transaction_Count_7d', coluna_classe=None),
+            titulo='Distribuição de Falhas Anteriores em Transações Fraudulentas',
+            rotulo_x='Nº de Transações Falhas nos Últimos 7 Dias',
+            text_auto=True # Mostra a contagem em cima das barras
+        )
+    fig_falhas.update_layout(yaxis_title="Contagem de Fraudes")
+    st.plotly_chart(fig_falhas, use_container_width=True)
+    st.info(
+        "💡 **Insight:** O gráfico confirma a teoria do 'card testing'. A grande maioria das fraudes ocorre após "
+        "exatamente **3 ou 4 tentativas falhas**, sugerindo um padrão de ataque automatizado e previsível."
+    )
+
+    st.divider()
+
+    st.subheader("🔬 Análise Profunda do Risk Score: O Indicador Principal")
+    st.markdown(
+        "Vimos que o `Risk_Score` é uma das variáveis mais importantes. Para visualizar de forma simples "
+        "como ele separa as transações, vamos sobrepor os histogramas das duas classes (fraude e não-fraude)."
+    )
+
+    # Usamos um histograma com sobreposição para comparar as distribuições
+    with instrumentacao.medir("pagina.Análise Direcionada.histograma_risco", linhas=len(df)):
+        fig_risk_hist = graficos.figura_histograma(
+            graficos.resumir_histograma(df, "Risk_Score"),
+            barmode='overlay',
+            histnorm='probability density', # Normaliza para comparar as formas das distribuições
+            opacidade=0.6, # Adiciona transparência para ver a sobreposição
+            titulo="Distribuição da Pontuação de Risco por Classe de Fraude",
+            rotulo_x='Pontuação de Risco', rotulo_classe='É Fraude?'
+        )
+
+    fig_risk_hist.update_layout(
+        yaxis_title="Densidade",
+        legend_title_text='É Fraude?'
+    )
+    st.plotly_chart(fig_risk_hist, use_container_width=True)
+
+    st.info(
+        """
+        💡 **Insight:** Este gráfico simplificado mostra a mesma história de forma direta:
+        - **A "montanha" azul (Legítimas)** está quase inteiramente concentrada à esquerda, em valores de `Risk_Score` muito baixos.
+        - **A "montanha" vermelha (Fraudes)** está claramente deslocada para a direita, concentrada em valores de `Risk_Score` altos.
+        
+        A pequena área roxa, onde as duas distribuições se cruzam, representa a "zona de confusão", onde a decisão é mais difícil. A clara separação entre os picos das duas "montanhas" confirma visualmente o imenso poder preditivo desta variável.
+        """
+    )
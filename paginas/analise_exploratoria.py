@@ -0,0 +1,279 @@
+# paginas/analise_exploratoria.py
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+from func import estatisticas
+from func import functions
+from func import graficos
+from func import instrumentacao
+from func import modelo
+
+
+@st.cache_resource
+def obter_registro_modelos():
+    return modelo.RegistroModelos()
+
+
+def renderizar():
+    """EDA da tabela analítica inteira e importância das variáveis (XGBoost)."""
+    st.header("🔬 Análise Exploratória de Dados (EDA)")
+    st.markdown("Esta é a **fundação** da nossa análise. Aqui, fazemos um diagnóstico completo dos dados para entender suas características, distribuições e relações iniciais.")
+    
+    # --- 1. CARREGAMENTO DOS DADOS ---
+    df = functions.carregar_dados()
+    
+    if not df.empty:
+        st.subheader("Nível 1: A Visão Geral do Dataset")
+        
+        st.markdown("### KPIs (Indicadores-Chave de Performance)")
+        
+        if 'Timestamp' in df.columns and pd.api.types.is_datetime64_any_dtype(df['Timestamp']) and not df['Timestamp'].empty:
+            data_inicio = df['Timestamp'].min().strftime('%d/%m/%Y')
+            data_fim = df['Timestamp'].max().strftime('%d/%m/%Y')
+            st.info(f"Estas são as métricas essenciais que resumem o nosso banco de dados \n\n📅 **Período em Análise:** de {data_inicio} a {data_fim}")
+        
+        col1, col2, col3, col4 = st.columns(4)
+        
+        # --- Cálculo das métricas ---
+        total_transacoes = df.shape[0]
+        total_variaveis = df.shape[1]
+        total_fraudes = df['Fraud_Label'].sum()
+        taxa_fraude = (total_fraudes / total_transacoes) * 100 if total_transacoes > 0 else 0
+        
+        with col1:
+            st.markdown(f"""
+            <div class='kpi-card color-1'>
+                <h3>Total de Transações</h3>
+                <h2>{total_transacoes:,}</h2>
+            </div>
+            """, unsafe_allow_html=True)
+
+        with col2:
+            st.markdown(f"""
+            <div class='kpi-card color-2'>
+                <h3>Total de Variáveis</h3>
+                <h2>{total_variaveis}</h2>
+            </div>
+            """, unsafe_allow_html=True)
+
+        with col3:
+            st.markdown(f"""
+            <div class='kpi-card color-3'>
+                <h3>Total de Fraudes</h3>
+                <h2>{total_fraudes:,}</h2>
+            </div>
+            """, unsafe_allow_html=True)
+
+        with col4:
+            st.markdown(f"""
+            <div class='kpi-card color-4'>
+                <h3>Taxa de Fraude</h3>
+                <h2>{taxa_fraude:.2f}%</h2>
+            </div>
+            """, unsafe_allow_html=True)
+
+        st.markdown("---")
+        
+        # Estatísticas calculadas uma vez por versão dos dados (trocar de variável não recalcula nada)
+        modo_aproximado = st.toggle(
+            "Modo aproximado (amostragem)",
+            value=len(df) > estatisticas.LIMITE_MODO_APROXIMADO,
+            help="Calcula quantis, medianas, outliers e contagens de categorias sobre uma amostra aleatória. "
+                 "Médias, desvios e correlações continuam exatos."
+        )
+        stats = functions.obter_estatisticas_eda(df, estatisticas.versao_dados(df), modo_aproximado)
+        if stats['aproximado']:
+            erro = stats['erro']
+            st.caption(
+                f"📐 Estatísticas aproximadas com uma amostra de {erro['tamanho_amostra']:,} de {stats['linhas']:,} linhas. "
+                f"Quantis/mediana: erro de posto de no máximo ±{erro['margem_quantil'] * 100:.2f} p.p. "
+                f"(confiança de {erro['confianca']:.0%}, desigualdade DKW)."
+            )
+
+        st.markdown("#### Detalhes Técnicos do Dataset")
+        
+        with st.expander("👁️ Visualizar Amostra dos Dados"):
+            st.dataframe(df.head(10))
+            st.caption("As 10 primeiras linhas do conjunto de dados.")
+
+        with st.expander("📊 Visualizar Resumo Estatístico (Colunas Numéricas)"):
+            st.dataframe(stats['resumo'])
+            st.caption("Fornece insights como média, mediana e desvio padrão para cada variável numérica.")
+
+        with st.expander("📄 Visualizar Estrutura e Tipos de Dados"):
+            st.dataframe(stats['tipos'])
+            st.caption("Lista de todas as colunas e seus respectivos tipos de dados.")
+        
+        st.markdown("---")
+        
+        st.subheader("Nível 2: Análise Univariada (Perfil de Cada Variável)")
+        st.markdown("Selecione uma variável para investigar suas características, distribuição e outliers em detalhe.")
+        
+        colunas_numericas = df.select_dtypes(include=np.number).columns.tolist()
+        # Contagens de outliers gravadas pelo ETL (todas as colunas, três métodos): ler não exige reprocessar nada
+        resumo_outliers = functions.carregar_resumo_outliers()
+        colunas_categoricas = df.select_dtypes(include=['object', 'category']).columns.tolist()
+        colunas_analisaveis = [col for col in df.columns if col != 'Fraud_Label']
+        colunas_data = df.select_dtypes(include=['datetime', 'datetimetz', 'datetime64[ns]']).columns.tolist()
+        
+        coluna_selecionada = st.selectbox(
+            "Selecione uma variável para uma análise detalhada:",
+            options = colunas_analisaveis,
+            index=None,
+            placeholder="Escolha uma varíavel..."
+        )
+        
+        if coluna_selecionada:
+            if coluna_selecionada in colunas_numericas:
+                st.markdown(f"**Analisando a variável numérica:** `{coluna_selecionada}`")
+                
+                col_grafico, col_stats = st.columns([2, 1])
+                
+                with col_grafico, instrumentacao.medir("pagina.Analise Exploratoria.univariada", linhas=len(df)):
+                    fig = graficos.figura_histograma_com_box(
+                        graficos.resumir_histograma(df, coluna_selecionada, coluna_classe=None),
+                        graficos.resumir_boxplot(df, coluna_selecionada, coluna_classe=None),
+                        titulo=f"Distruibuição de '{coluna_selecionada}'", rotulo_x=coluna_selecionada
+                    )
+                    st.plotly_chart(fig, use_container_width=True)
+                with col_stats:
+                    stats_coluna = stats['numericas'][coluna_selecionada]
+                    media = stats_coluna['media']
+                    mediana = stats_coluna['mediana']
+                    desvio_pad = stats_coluna['desvio_padrao']
+                    num_outliers = f"{stats_coluna['num_outliers']:,.0f}"
+                    outliers_etl = resumo_outliers[resumo_outliers['Coluna'] == coluna_selecionada] if not resumo_outliers.empty else resumo_outliers
+                    if not outliers_etl.empty:
+                        num_outliers = f"{outliers_etl['Qtd_Outliers_IQR'].sum():,.0f}"
+                    elif stats['aproximado']:
+                        num_outliers = f"≈ {num_outliers} <small>± {stats_coluna['margem_outliers']:,.0f}</small>"
+                    
+                    st.markdown(f"<div class='kpi-card color-1'><h3>Média</h3><h2>{media:,.2f}</h2></div>", unsafe_allow_html=True)
+                    st.markdown("<div style='height: 15px;'></div>", unsafe_allow_html=True)
+                    st.markdown(f"<div class='kpi-card color-2'><h3>Mediana</h3><h2>{mediana:,.2f}</h2></div>", unsafe_allow_html=True)
+                    st.markdown("<div style='height: 15px;'></div>", unsafe_allow_html=True)
+                    st.markdown(f"<div class='kpi-card color-3'><h3>Desvio Padrão</h3><h2>{desvio_pad:,.2f}</h2></div>", unsafe_allow_html=True)
+                    st.markdown("<div style='height: 15px;'></div>", unsafe_allow_html=True)
+                    st.markdown(f"<div class='kpi-card color-4'><h3>Nº de Outliers</h3><h2>{num_outliers}</h2></div>", unsafe_allow_html=True)
+                    if not outliers_etl.empty:
+                        segmento = outliers_etl['Coluna_Segmento'].iloc[0]
+                        # Entre dois recálculos (full refresh ou crescimento da tabela) as linhas novas usam limites antigos
+                        calculo = ""
+                        if 'Calculado_Em' in outliers_etl.columns:
+                            calculo = (f" Limites calculados em {outliers_etl['Calculado_Em'].iloc[0]}, "
+                                       f"com a tabela em {outliers_etl['Linhas_Base'].iloc[0]:,.0f} linhas.")
+                        st.caption(
+                            f"Outliers calculados pelo ETL (IQR{f', limites por {segmento}' if segmento else ''}). "
+                            f"MAD/z robusto: {outliers_etl['Qtd_Outliers_MAD'].sum():,.0f} · "
+                            f"fora dos percentis 1%–99%: {outliers_etl['Qtd_Outliers_Percentil'].sum():,.0f}.{calculo}"
+                        )
+            
+            elif coluna_selecionada in colunas_categoricas:
+                st.markdown(f"**Analisando a variável categórica:** `{coluna_selecionada}`")
+                
+                col_grafico_cat, col_stats_cat = st.columns([2, 1])
+
+                with col_grafico_cat:
+                    contagem = stats['categoricas'][coluna_selecionada]['top'].reset_index()
+                    contagem.columns = [coluna_selecionada, 'Contagem']
+                    fig = px.bar(contagem, x=coluna_selecionada, y='Contagem', title=f"Contagem das 15 categorias mais comuns em '{coluna_selecionada}'")
+                    st.plotly_chart(fig, use_container_width=True)
+                
+                with col_stats_cat:
+                    num_categorias = stats['categoricas'][coluna_selecionada]['num_categorias']
+                    moda = stats['categoricas'][coluna_selecionada]['moda']
+                    
+                    st.markdown(f"<div class='kpi-card color-1'><h3>Nº de Categorias Únicas</h3><h2>{num_categorias:,}</h2></div>", unsafe_allow_html=True)
+                    st.markdown("<div style='height: 15px;'></div>", unsafe_allow_html=True)
+                    st.markdown(f"<div class='kpi-card color-2'><h3>Categoria Mais Comum (Moda)</h3><h2>{moda}</h2></div>", unsafe_allow_html=True)
+            
+            elif coluna_selecionada in colunas_data:
+                st.markdown(f"**Analisando a variável de data/hora:** `{coluna_selecionada}`")
+        
+                st.info("Para variáveis de tempo, visualizamos a contagem de transações por dia.")
+        
+                transacoes_por_dia = df.set_index(coluna_selecionada).resample('D').size().reset_index(name='Contagem')
+        
+                fig = px.line(transacoes_por_dia, x=coluna_selecionada, y='Contagem',
+                      title=f'Volume de Transações por Dia',
+                      labels={'Contagem': 'Número de Transações', coluna_selecionada: 'Data'})
+                st.plotly_chart(fig, use_container_width=True)
+                
+        st.subheader("Nível 3: Investigação das Relações")
+        st.markdown("Aqui, cruzamos as variáveis para encontrar padrões e relações, focando em como elas se conectam com a ocorrência de fraude.")
+        
+        st.markdown("#### Relação de Cada Variável com a Fraude")
+        st.info("Selecione uma variável para ver como sua distribuição difere entre transações normais e fraudulentas.")
+        
+        opcoes_bivariada = [col for col in df.columns if col != 'Fraud_Label']
+        feature_to_compare = st.selectbox("Selecione uma variável para comparar:", opcoes_bivariada, key='bivariada_select')
+
+        if feature_to_compare:
+            # Lógica para Gráficos Comparativos
+            if feature_to_compare in colunas_numericas:
+                fig = graficos.figura_boxplot(graficos.resumir_boxplot(df, feature_to_compare),
+                             titulo=f"Distribuição de '{feature_to_compare}' por Classe de Fraude",
+                             rotulo_y=feature_to_compare, rotulo_classe='É Fraude?')
+                st.plotly_chart(fig, use_container_width=True)
+            elif feature_to_compare in colunas_categoricas:
+                # Usando abas para mostrar contagem absoluta e relativa
+                tab1, tab2 = st.tabs(["Contagem Absoluta", "Proporção Relativa (%)"])
+                contagem_classes = graficos.resumir_categorias(df, feature_to_compare)
+                with tab1:
+                    fig_abs = graficos.figura_categorias(contagem_classes, feature_to_compare,
+                                           barmode='group', titulo=f"Contagem de '{feature_to_compare}' por Classe de Fraude")
+                    st.plotly_chart(fig_abs, use_container_width=True)
+                with tab2:
+                    fig_rel = graficos.figura_categorias(contagem_classes, feature_to_compare,
+                                           barmode='relative', titulo=f"Proporção de Fraude em '{feature_to_compare}'",
+                                           histnorm='percent')
+                    st.plotly_chart(fig_rel, use_container_width=True)
+            # --- 3.2 Mapa de Calor de Correlação ---
+        st.markdown("#### Mapa de Calor de Correlação")
+        st.info("Mostra como as variáveis numéricas se relacionam entre si. Valores próximos de 1 (vermelho) ou -1 (azul) indicam forte correlação.")
+        
+        with instrumentacao.medir("pagina.Analise Exploratoria.correlacao"):
+            corr_matrix = stats['correlacao']
+            fig_corr = px.imshow(corr_matrix, text_auto=".2f", aspect="auto", 
+                                 title="Mapa de Calor de Correlação", color_continuous_scale='RdBu_r')
+            st.plotly_chart(fig_corr, use_container_width=True)
+
+        st.markdown("---")
+        st.subheader("Análise de Importância de Variáveis com XGBoost")
+
+        registro = obter_registro_modelos()
+        with instrumentacao.medir("pagina.Analise Exploratoria.importancias", linhas=len(df)):
+            if registro.ultimo_valido() is None:
+                with st.spinner("Treinando modelo XGBoost para analisar as variáveis..."):
+                    df_importancias, modelo_atualizado = registro.obter_importancias(df)
+            else:
+                df_importancias, modelo_atualizado = registro.obter_importancias(df)
+
+        if not modelo_atualizado:
+            st.info("Os dados mudaram desde o último treino. Exibindo as importâncias do último modelo válido "
+                    "enquanto um novo modelo é treinado em segundo plano.")
+
+        treino = df_importancias.attrs.get('treino')
+        if treino and treino.get('taxas'):
+            taxa_legitimas = treino['taxas'].get('0', 1.0)
+            st.caption(f"Modelo treinado com {treino['linhas_treino']:,} de {treino['linhas_totais']:,} transações: "
+                       f"amostra estratificada com {taxa_legitimas:.1%} das legítimas e pesos que compensam a amostragem.")
+        elif treino:
+            st.caption(f"Modelo treinado com todas as {treino['linhas_treino']:,} transações.")
+        
+        #st.success("Análise de importância com XGBoost concluída!")
+
+        top_20_features = df_importancias.head(20)
+
+        fig_importancia = px.bar(
+            top_20_features,
+            x='Importancia',
+            y='Variavel',
+            orientation='h',
+            title='As 20 Variáveis Mais Importantes (Análise com XGBoost)',
+            labels={'Importancia': 'Nível de Importância (Score)', 'Variavel': 'Variável'},
+            height=600
+        )
+        fig_importancia.update_layout(yaxis={'categoryorder':'total ascending'})
+        st.plotly_chart(fig_importancia, use_container_width=True)
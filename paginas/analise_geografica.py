@@ -0,0 +1,34 @@
+# paginas/analise_geografica.py
+import streamlit as st
+from streamlit_folium import st_folium
+import func.functions as api
+from func import instrumentacao
+
+
+def renderizar():
+    """Mapa agregado por localização, com filtros aplicados no banco."""
+    st.header("🗺️ Análise Geográfica Agregada")
+    st.info("Explore o volume e a taxa de fraude por localização. O tamanho do círculo indica o volume de transações e a cor indica o risco de fraude.")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        tipos_transacao = ['Todos'] + api.listar_tipos_transacao()
+        tipo_selecionado = st.selectbox("Filtrar por Tipo de Transação:", tipos_transacao)
+    with col2:
+        status_fraude = {'Todos': None, 'Apenas Fraudes': 1, 'Apenas Legítimas': 0}
+        status_selecionado_key = st.selectbox("Filtrar por Status:", options=list(status_fraude.keys()))
+        status_selecionado_value = status_fraude[status_selecionado_key]
+
+    # Os filtros são aplicados no banco e o mapa fica em cache por combinação de filtros
+    mapa_agregado = api.obter_mapa_geografico(
+        tipo_transacao=None if tipo_selecionado == 'Todos' else tipo_selecionado,
+        fraude=status_selecionado_value,
+    )
+
+    # ** LINHAS ADICIONADAS PARA EXIBIR O MAPA **
+    if mapa_agregado:
+        with instrumentacao.medir("pagina.Análise Geográfica.renderizacao_mapa"):
+            st_folium(mapa_agregado, use_container_width=True)
+    else:
+        # Mostra um aviso se não houver dados ou se o mapa não puder ser gerado
+        st.warning("Não há dados para exibir com os filtros selecionados.")
@@ -0,0 +1,67 @@
+# paginas/performance.py
+import os
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+from func import instrumentacao
+
+
+def renderizar():
+    """Medições de desempenho do servidor e do último ETL (aberta com '?performance=1')."""
+    st.header("⏱️ Performance do Dashboard e do ETL")
+    st.markdown(
+        "Medições deste processo do servidor: duração, linhas processadas, variação de memória e acertos de cache "
+        "das funções de dados, das seções das páginas e de cada página inteira. "
+        f"Percentis calculados sobre as últimas {instrumentacao.CAPACIDADE_PADRAO:,} medições."
+    )
+
+    resumo = instrumentacao.REGISTRO.resumo()
+    if resumo.empty:
+        st.info("Nenhuma medição registrada ainda. Navegue pelas outras páginas para gerar medições.")
+    else:
+        st.dataframe(
+            resumo, hide_index=True, use_container_width=True,
+            column_config={
+                'Total_s': st.column_config.NumberColumn("Total (s)", format="%.2f"),
+                'Media_ms': st.column_config.NumberColumn("Média (ms)", format="%.1f"),
+                'P50_ms': st.column_config.NumberColumn("p50 (ms)", format="%.1f"),
+                'P95_ms': st.column_config.NumberColumn("p95 (ms)", format="%.1f"),
+                'Linhas': st.column_config.NumberColumn("Linhas", format="%d"),
+                'Linhas_por_s': st.column_config.NumberColumn("Linhas/s", format="%.0f"),
+                'Cache_Hit': st.column_config.NumberColumn("Cache hit", format="%d"),
+                'Cache_Miss': st.column_config.NumberColumn("Cache miss", format="%d"),
+                'Taxa_Acerto': st.column_config.ProgressColumn("Taxa de acerto", min_value=0.0, max_value=1.0, format="%.2f"),
+                'Ultima_Memoria_MB': st.column_config.NumberColumn("Δ memória (MB)", format="%.1f"),
+            },
+        )
+
+        recentes = instrumentacao.REGISTRO.recentes()
+        operacoes = st.multiselect(
+            "Operações no gráfico:", resumo['Operacao'].tolist(),
+            default=resumo.nlargest(5, 'Total_s')['Operacao'].tolist()
+        )
+        recentes = recentes[recentes['Operacao'].isin(operacoes)].assign(Cache=lambda d: d['Cache'].fillna('-'))
+        fig_duracoes = px.scatter(
+            recentes, x='Instante', y='Duracao_ms', color='Operacao', symbol='Cache', log_y=True,
+            hover_data=['Linhas', 'Memoria_MB'], title="Duração de cada execução (escala log)",
+            labels={'Duracao_ms': 'Duração (ms)', 'Instante': 'Horário', 'Operacao': 'Operação'}
+        )
+        st.plotly_chart(fig_duracoes, use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("Baixar métricas (formato Prometheus)", instrumentacao.REGISTRO.para_prometheus('dashboard'),
+                           file_name="dashboard.prom", mime="text/plain")
+    with col2:
+        if st.button("Limpar medições"):
+            instrumentacao.REGISTRO.limpar()
+            st.rerun()
+    st.caption(f"As métricas também são gravadas a cada {instrumentacao.INTERVALO_EXPORTACAO} s em "
+               f"'{instrumentacao.ARQUIVO_METRICAS_DASHBOARD}' (textfile collector do node_exporter).")
+
+    if os.path.exists(instrumentacao.ARQUIVO_METRICAS_ETL):
+        with st.expander("📄 Métricas da última execução do ETL"):
+            modificado = pd.Timestamp(os.path.getmtime(instrumentacao.ARQUIVO_METRICAS_ETL), unit='s')
+            st.caption(f"'{instrumentacao.ARQUIVO_METRICAS_ETL}', gravado em {modificado:%d/%m/%Y %H:%M:%S} (UTC).")
+            with open(instrumentacao.ARQUIVO_METRICAS_ETL, encoding='utf-8') as f:
+                st.code(f.read(), language=None)
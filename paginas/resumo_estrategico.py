@@ -0,0 +1,92 @@
+# paginas/resumo_estrategico.py
+import streamlit as st
+
+
+def renderizar():
+    """Conclusões e recomendações (texto estático: não lê dados nem importa bibliotecas pesadas)."""
+    st.header("🏆 Resumo Estratégico e Recomendações Finais")
+    st.markdown(
+        "Esta seção consolida as descobertas finais do projeto. Após uma análise iterativa, "
+        "identificamos os verdadeiros vetores de fraude e descartamos as hipóteses que se provaram "
+        "irrelevantes, resultando em um perfil de risco claro e em recomendações estratégicas focadas."
+    )
+    st.divider()
+    
+    
+    st.subheader("Principais Fatores de Risco e Considerações")
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        st.markdown(
+            """
+            <div class='kpi-card color-4' style='height: 240px;'>
+                <h3>👣 RASTRO COMPORTAMENTAL</h3>
+                <h2>Testes de Cartão</h2>
+                <p style='font-size: 0.9em;'>O número de falhas recentes é o indicador #1. Um usuário com 3+ falhas em 7 dias representa um alerta máximo de fraude iminente.</p>
+            </div>
+            """, unsafe_allow_html=True)
+
+    with col2:
+        st.markdown(
+            """
+            <div class='kpi-card color-3' style='height: 240px;'>
+                <h3>🚨 SUPER-SINAL DE RISCO</h3>
+                <h2>Risk Score Elevado</h2>
+                <p style='font-size: 0.9em;'>Sendo o indicador #2, esta variável sintética é extremamente eficaz, mas sua origem deve ser conhecida para evitar data leakage.</p>
+            </div>
+            """, unsafe_allow_html=True)
+    
+    with col3:
+        st.markdown(
+            """
+            <div class='kpi-card color-1' style='height: 240px;'>
+                <h3>📉 RISCO E DEPENDÊNCIA</h3>
+                <h2>Concentração de Risco</h2>
+                <p style='font-size: 0.9em;'>A forte dependência em apenas 2 variáveis é eficiente, mas arriscada. O sistema pode ser vulnerável a novos tipos de fraude não capturados por elas.</p>
+            </div>
+            """, unsafe_allow_html=True)
+    
+    st.divider()
+
+    st.subheader("O 'Retrato Falado' da Fraude")
+    with st.container(border=True):
+        st.markdown("""
+        A análise revelou um perfil de fraude com características muito específicas, que se concentram mais no **comportamento prévio** do que no contexto da transação em si:
+
+        - **A Impressão Digital do Fraudador:** O sinal mais forte de uma fraude iminente é o comportamento de **'card testing'**. A grande maioria das fraudes é precedida por um número elevado de transações falhas recentes (`Failed_Transaction_Count_7d`), tipicamente entre 3 e 4 falhas.
+
+        - **O Super-Sinal de Risco:** Quase toda transação fraudulenta carrega consigo uma alta **`Pontuação de Risco` (`Risk_Score`)**. Esta variável, provavelmente derivada de um outro modelo, age como um condensador de informações e é o segundo indicador mais poderoso.
+        
+        - **Fatores Secundários:** Características como o valor da transação e o horário, ao contrário da intuição inicial, provaram ter **baixa ou nenhuma relevância preditiva** isoladamente.
+        """)
+
+    st.divider()
+
+    st.subheader("Recomendações Acionáveis para o Negócio")
+
+    with st.expander("**Ação 1: Implementar Monitoramento de 'Card Testing' em Tempo Real**"):
+        st.markdown("""
+        **A Descoberta:** O número de transações falhas recentes é o indicador mais poderoso de fraude.
+        
+        **A Solução Sugerida:**
+        - Criar regras de negócio que monitorem ativamente a contagem de falhas por cartão ou usuário em janelas curtas de tempo (ex: última hora, últimas 24h).
+        - Após um limiar ser atingido (ex: 3 falhas), o sistema deve automaticamente aplicar mais fricção (ex: exigir autenticação de dois fatores - OTP) ou até mesmo bloquear temporariamente o cartão para novas tentativas, notificando o cliente.
+        """)
+
+    with st.expander("**Ação 2: Validar e Operacionalizar o `Risk_Score` com Cautela**"):
+        st.markdown("""
+        **A Observação:** O `Risk_Score` é um "super-sinal", mas sua natureza de "caixa-preta" representa um risco de **vazamento de dados (data leakage)** se não for bem compreendido.
+        
+        **A Solução Sugerida:**
+        - **Auditoria:** Antes de usar este score em produção, é crucial auditar sua origem. A equipe deve garantir que ele seja calculado com dados disponíveis **antes** da transação ser aprovada e que não contenha informações sobre o resultado final da fraude.
+        - **Operacionalização:** Se validado, ele deve ser o principal critério para priorizar revisões manuais e para regras de bloqueio automático de transações com scores extremos (ex: > 0.95).
+        """)
+
+    with st.expander("**Ação 3: Diversificar Fontes de Dados para Aumentar a Robustez**"):
+        st.markdown("""
+        **O Risco:** Depender de apenas duas variáveis torna o sistema vulnerável a novos tipos de fraude que não exibam esses dois sinais específicos.
+        
+        **A Solução Sugerida:**
+        - **Engenharia de Features:** Priorizar, em futuras iterações, a criação de novas variáveis. Exemplos: "tempo desde a última transação", "frequência de uso de um novo dispositivo", "relação do valor da transação com a média histórica do usuário".
+        - **Análise sem Super-Sinais:** Realizar uma nova rodada de análise **excluindo** `Risk_Score` e `Failed_Transaction_Count_7d` para forçar a descoberta de sinais secundários mais sutis, que podem ser úteis para capturar fraudes mais sofisticadas.
+        """)
@@ -0,0 +1,89 @@
+# paginas/visao_geral.py
+import plotly.express as px
+import streamlit as st
+import func.functions as api
+from func import cardinalidade
+from func import instrumentacao
+
+
+# Chave do cache: versão dos dados + período (o DataFrame em si não é "hasheado")
+@st.cache_data
+def criar_grafico_tendencia(versao_dados, data_inicio, data_fim, _df_rollup):
+    df_diario = api.calcular_tendencia_diaria(_df_rollup)
+
+    fig = px.line(df_diario, x='Data', y=['Total_Transacoes', 'Total_Fraudes'],
+                  title="Transações Totais vs. Fraudes por Dia",
+                  labels={'Data': 'Data', 'value': 'Número de Transações'},
+                  color_discrete_map={'Total_Transacoes': '#0d47a1', 'Total_Fraudes': '#d84315'})
+    return fig
+
+
+def formatar_usuarios(usuarios, chave):
+    """Contagem de usuários para o card; a estimativa dos sketches vem com '≈' e a margem de erro."""
+    valor = f"{usuarios[chave]:,.0f}"
+    if usuarios['aproximado']:
+        return f"≈ {valor} <small>± {usuarios['margem_' + chave]:,.0f}</small>"
+    return valor
+
+
+def renderizar():
+    """Resumo executivo: KPIs e tendência diária, a partir do rollup diário do ETL."""
+    st.header("💡 Resumo Executivo de Segurança e Operações")
+    # A página lê apenas o rollup diário gerado pelo ETL (uma linha por dia/local/tipo/classe)
+    data_minima, data_maxima = api.obter_intervalo_datas()
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        data_inicio = st.date_input("Data de Início", data_minima)
+    with col2:
+        data_fim = st.date_input("Data de Fim", data_maxima)
+    
+    if data_inicio and data_fim:
+        # Busca apenas os dias do período selecionado (data final inclusiva)
+        df_filtrado = api.carregar_rollup_diario(data_inicio, data_fim)
+
+        if df_filtrado.empty:
+            st.warning("Não há dados para o período selecionado.")
+        else:
+            # Calcula os KPIs com base nos dados filtrados
+            kpis = api.calcular_kpis_rollup(df_filtrado)
+
+            # --- ALTERADO: KPIs de volta para o formato HTML ---
+            kpi1, kpi2, kpi3, kpi4 = st.columns(4)
+            with kpi1:
+                st.markdown(f"<div class='kpi-card color-1'><h3>Valor Total Transacionado</h3><h2>R$ {kpis['valor_total']:,.2f}</h2></div>", unsafe_allow_html=True)
+            with kpi2:
+                st.markdown(f"<div class='kpi-card color-4'><h3>Volume de Fraudes</h3><h2>{kpis['num_fraudes']:}</h2></div>", unsafe_allow_html=True)
+            with kpi3:
+                st.markdown(f"<div class='kpi-card color-4'><h3>Taxa de Fraude (%)</h3><h2>{kpis['taxa_fraude_vol']:.2f}%</h2></div>", unsafe_allow_html=True)
+            with kpi4:
+                st.markdown(f"<div class='kpi-card color-4'><h3>Valor Perdido</h3><h2>R$ {kpis['valor_fraudes']:,.2f}</h2></div>", unsafe_allow_html=True)
+
+            # Usuários distintos não saem do rollup: vêm da união dos sketches do ETL (ou da contagem exata)
+            contagem_exata = st.toggle(
+                "Contagem exata de usuários",
+                help="Conta os usuários distintos direto nas transações do período (mais lento em períodos longos). "
+                     "Desligado, períodos pequenos já são contados exatamente e os demais usam os sketches HyperLogLog do ETL."
+            )
+            usuarios = api.contar_usuarios(data_inicio, data_fim, exato=True if contagem_exata else None)
+            if usuarios is not None:
+                kpi5, kpi6 = st.columns(2)
+                with kpi5:
+                    st.markdown(f"<div class='kpi-card color-2'><h3>Usuários Ativos</h3><h2>{formatar_usuarios(usuarios, 'ativos')}</h2></div>", unsafe_allow_html=True)
+                with kpi6:
+                    st.markdown(f"<div class='kpi-card color-4'><h3>Usuários Afetados (com fraude)</h3><h2>{formatar_usuarios(usuarios, 'afetados')}</h2></div>", unsafe_allow_html=True)
+                if usuarios['aproximado']:
+                    st.caption(
+                        f"📐 Usuários estimados com HyperLogLog: erro padrão relativo de {cardinalidade.ERRO_PADRAO:.1%}, "
+                        f"margem de ~95% (± {cardinalidade.Z_CONFIANCA * cardinalidade.ERRO_PADRAO:.1%}) mostrada ao lado."
+                    )
+
+            st.divider()
+            
+            st.subheader("Tendência de Transações e Fraudes")
+
+            with instrumentacao.medir("pagina.Visão Geral.tendencia"):
+                fig_tendencia = criar_grafico_tendencia(api.obter_versao_dados(), data_inicio, data_fim, df_filtrado)
+                st.plotly_chart(fig_tendencia, use_container_width=True)
+    else:
+        st.error("Por favor, selecione uma data de início e fim.")
@@ -0,0 +1,97 @@
+# Arquivo: servidor_pontuacao.py
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from func.modelo import DIRETORIO_MODELOS
+from func.pontuacao import LIMIAR_FRAUDE, LoteadorPontuacao, Pontuador, RegistroInvalido
+
+# --- CONFIGURAÇÕES ---
+HOST_PADRAO = "127.0.0.1"
+PORTA_PADRAO = 8502
+TAMANHO_MAXIMO_CORPO = 64 * 1024 * 1024  # Bytes aceitos por requisição
+
+# Endpoints:
+#   POST /pontuar  corpo: um objeto JSON (uma transação) ou uma lista de objetos, com as colunas da
+#                  tabela TransacoesCompletas. As colunas que o ETL deriva do Timestamp são calculadas
+#                  aqui; as features por usuário do modelo (janelas móveis, média de gastos), não: elas
+#                  dependem do histórico do usuário e precisam vir no registro. Resposta:
+#                  {"probabilidades": [...], "fraude": [...]}; 400 se faltar alguma coluna de "entradas".
+#   GET  /saude    resposta: {"modelo": <impressão digital>, "colunas": <nº de features>,
+#                  "entradas": <colunas exigidas em cada registro>}
+
+
+def criar_handler(loteador, limiar):
+    class HandlerPontuacao(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Mantém a conexão aberta entre requisições do mesmo cliente
+
+        def _responder(self, status, conteudo):
+            corpo = json.dumps(conteudo).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def do_GET(self):
+            if self.path != "/saude":
+                return self._responder(404, {"erro": "rota não encontrada"})
+            pontuador = loteador.pontuador
+            self._responder(200, {"modelo": pontuador.impressao, "colunas": len(pontuador.colunas),
+                                  "entradas": pontuador.entradas})
+
+        def do_POST(self):
+            if self.path != "/pontuar":
+                return self._responder(404, {"erro": "rota não encontrada"})
+            tamanho = int(self.headers.get("Content-Length") or 0)
+            if tamanho > TAMANHO_MAXIMO_CORPO:
+                return self._responder(413, {"erro": "corpo da requisição muito grande"})
+            try:
+                dados = json.loads(self.rfile.read(tamanho))
+            except ValueError as e:
+                return self._responder(400, {"erro": f"JSON inválido: {e}"})
+            registros = [dados] if isinstance(dados, dict) else dados
+            if not isinstance(registros, list) or not all(isinstance(r, dict) for r in registros):
+                return self._responder(400, {"erro": "envie um objeto ou uma lista de objetos"})
+            try:
+                probabilidades = loteador.pontuar(registros)
+            except RegistroInvalido as e:
+                return self._responder(400, {"erro": str(e)})
+            except Exception as e:
+                return self._responder(500, {"erro": str(e)})
+            self._responder(200, {
+                "probabilidades": probabilidades,
+                "fraude": [p >= limiar for p in probabilidades],
+            })
+
+        def log_message(self, formato, *args):
+            pass  # Sem log por requisição: ele custaria mais que a própria pontuação
+
+    return HandlerPontuacao
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API local de pontuação de fraude com o modelo XGBoost salvo.")
+    parser.add_argument("--host", default=HOST_PADRAO)
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    parser.add_argument("--modelos", default=DIRETORIO_MODELOS, help="Diretório do registro de modelos.")
+    parser.add_argument("--modelo", default=None, help="Impressão digital do modelo (padrão: o último válido).")
+    parser.add_argument("--limiar", type=float, default=LIMIAR_FRAUDE, help="Probabilidade a partir da qual a transação é marcada como fraude.")
+    args = parser.parse_args()
+
+    try:
+        pontuador = Pontuador.carregar(args.modelos, args.modelo)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"ERRO ao carregar o modelo: {e}")
+        raise SystemExit(1)
+
+    loteador = LoteadorPontuacao(pontuador)
+    servidor = ThreadingHTTPServer((args.host, args.porta), criar_handler(loteador, args.limiar))
+    print(f"--- Modelo {pontuador.impressao} ({len(pontuador.colunas)} features) servindo em http://{args.host}:{args.porta} ---")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("Servidor encerrado.")
+    finally:
+        servidor.server_close()
+        loteador.fechar()
@@ -0,0 +1,59 @@
+# tests/conftest.py
+import os
+import shutil
+import sqlite3
+import sys
+
+import pandas as pd
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [RAIZ, os.path.join(RAIZ, 'benchmarks')]
+
+import etl  # noqa: E402
+import gerador  # noqa: E402
+
+
+@pytest.fixture
+def banco(tmp_path, monkeypatch):
+    """Banco SQLite temporário com 3.000 transações sintéticas (60 usuários) na tabela de origem."""
+    monkeypatch.chdir(tmp_path)
+    caminho = str(tmp_path / 'creditdata.db')
+    gerador.gravar_sqlite(caminho, 3000, num_usuarios=60)
+    return caminho
+
+
+def rodar_etl(caminho, **opcoes):
+    """Roda o ETL sobre o banco 'caminho' (mesmos argumentos de 'etl.executar_etl')."""
+    engine = etl.criar_engine(f"sqlite:///{caminho}")
+    try:
+        etl.executar_etl(engine, **opcoes)
+    finally:
+        engine.dispose()
+
+
+def copiar_banco(caminho, destino):
+    """Cópia do banco para rodar outro modo do ETL sobre a mesma origem."""
+    shutil.copy(caminho, destino)
+    return str(destino)
+
+
+def inserir_origem(caminho, df):
+    """Acrescenta linhas (colunas de 'gerador.COLUNAS', Timestamp como texto) à tabela de origem."""
+    conn = sqlite3.connect(caminho)
+    try:
+        conn.executemany(
+            f"INSERT INTO {etl.NOME_TABELA_ORIGEM} VALUES ({', '.join('?' * len(gerador.COLUNAS))})",
+            df[gerador.COLUNAS].itertuples(index=False, name=None),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def ler_tabela(caminho, consulta):
+    conn = sqlite3.connect(caminho)
+    try:
+        return pd.read_sql(consulta, conn)
+    finally:
+        conn.close()
@@ -0,0 +1,85 @@
+# tests/test_cardinalidade.py
+import numpy as np
+import pandas as pd
+import pytest
+
+import etl
+import gerador
+from conftest import copiar_banco, inserir_origem, ler_tabela, rodar_etl
+from func import cardinalidade
+
+
+def sketch(valores, grupos=None, num_grupos=1):
+    grupos = np.zeros(len(valores), dtype=np.int64) if grupos is None else grupos
+    return cardinalidade.serializar(cardinalidade.acumular(grupos, cardinalidade.hash_valores(valores)), num_grupos)
+
+
+def usuarios(inicio, fim):
+    return [f'USER_{i}' for i in range(inicio, fim)]
+
+
+def test_uniao_de_sketches_igual_ao_sketch_do_conjunto():
+    a, b = usuarios(0, 30_000), usuarios(20_000, 50_000)
+    unidos = cardinalidade.unir(sketch(a) + sketch(b))
+    np.testing.assert_array_equal(unidos, cardinalidade.unir(sketch(a + b)))
+
+
+def test_acumular_em_lotes_igual_a_uma_vez():
+    rng = np.random.default_rng(5)
+    valores = np.array(usuarios(0, 5000))[rng.integers(0, 5000, 40_000)]
+    grupos = rng.integers(0, 7, len(valores))
+    acumulado = None
+    for lote in np.array_split(np.arange(len(valores)), 6):
+        acumulado = cardinalidade.acumular(grupos[lote], cardinalidade.hash_valores(valores[lote]), acumulado)
+    assert cardinalidade.serializar(acumulado, 7) == sketch(valores, grupos, 7)
+
+
+def test_repeticoes_nao_mudam_o_sketch():
+    valores = usuarios(0, 2000)
+    assert sketch(valores * 5) == sketch(valores)
+
+
+@pytest.mark.parametrize('distintos', [1, 10, 200])
+def test_conjuntos_pequenos_quase_exatos(distintos):
+    estimativa, _ = cardinalidade.contar_distintos(sketch(usuarios(0, distintos)))
+    assert abs(estimativa - distintos) <= max(1, 0.01 * distintos)
+
+
+def test_erro_relativo_proximo_do_erro_padrao():
+    # 40 conjuntos disjuntos de 20 mil usuários: o erro relativo observado deve seguir ERRO_PADRAO
+    distintos = 20_000
+    erros, dentro_da_margem = [], 0
+    for k in range(40):
+        estimativa, margem = cardinalidade.contar_distintos(sketch(usuarios(k * distintos, (k + 1) * distintos)))
+        erros.append(estimativa / distintos - 1)
+        dentro_da_margem += abs(estimativa - distintos) <= margem
+    assert np.sqrt(np.mean(np.square(erros))) < 1.5 * cardinalidade.ERRO_PADRAO
+    assert dentro_da_margem >= 34  # ~95% de 40, com folga para a variação amostral
+
+
+# --- SKETCHES GRAVADOS PELO ETL ---
+
+def sketches_do_banco(caminho):
+    return ler_tabela(caminho, f"SELECT * FROM {etl.NOME_TABELA_SKETCHES}").sort_values(
+        etl.COLUNAS_GRUPO_SKETCH).reset_index(drop=True)
+
+
+def test_etl_grava_os_mesmos_sketches_em_todos_os_modos(banco, tmp_path):
+    rodar_etl(banco, full_refresh=True)
+    # Lote incremental: transações novas e antigas (fora de ordem), de usuários novos e já carregados
+    novas = gerador.gerar_lote(3000, 500, 80, semente=1, timestamp_texto=True)
+    inserir_origem(banco, novas)
+    rodar_etl(banco)
+    completo = copiar_banco(banco, tmp_path / 'completo.db')
+    rodar_etl(completo, full_refresh=True)
+    streaming = copiar_banco(banco, tmp_path / 'streaming.db')
+    rodar_etl(streaming, full_refresh=True, chunksize=300)
+
+    incremental = sketches_do_banco(banco)
+    pd.testing.assert_frame_equal(incremental, sketches_do_banco(completo))
+    pd.testing.assert_frame_equal(incremental, sketches_do_banco(streaming))
+
+    exatos = ler_tabela(banco, f"SELECT COUNT(DISTINCT User_ID) AS n FROM {etl.NOME_TABELA_DESTINO}")['n'].iloc[0]
+    estimativa, margem = cardinalidade.contar_distintos(incremental['Sketch_Usuarios'].tolist())
+    assert exatos == 80
+    assert abs(estimativa - exatos) <= margem
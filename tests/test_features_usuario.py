@@ -0,0 +1,165 @@
+# tests/test_features_usuario.py
+import numpy as np
+import pandas as pd
+import pytest
+
+import etl
+import gerador
+from conftest import copiar_banco, inserir_origem, ler_tabela, rodar_etl
+from func.features import JANELAS, calcular_features_usuario, colunas_features
+
+
+def features_referencia(df, janelas=JANELAS):
+    """
+    Referência direta em pandas (groupby + cumsum/rolling) das features de 'calcular_features_usuario'.
+    'df' tem User_ID, Timestamp (segundos inteiros), Transaction_Amount e Desempate; empates no mesmo
+    segundo seguem o Desempate e a janela de uma linha não inclui os empates que vêm depois dela.
+    Retorna as features no índice de 'df'.
+    """
+    ordenado = df.sort_values(['User_ID', 'Timestamp', 'Desempate'], kind='stable')
+    por_usuario = ordenado.groupby('User_ID', sort=False)
+    valor = ordenado['Transaction_Amount']
+    qtd = por_usuario.cumcount() + 1
+    soma = por_usuario['Transaction_Amount'].cumsum()
+    media_anterior = (soma - valor) / (qtd - 1)
+
+    saida = pd.DataFrame(index=ordenado.index)
+    saida['Segundos_Desde_Ultima'] = por_usuario['Timestamp'].diff().dt.total_seconds()
+    saida['Media_Gasto_Usuario'] = soma / qtd
+    saida['Valor_Relativo_Media'] = (valor / media_anterior).where((qtd > 1) & (media_anterior > 0))
+    por_tempo = ordenado.set_index('Timestamp').groupby('User_ID', sort=False)['Transaction_Amount']
+    for nome, largura in janelas.items():
+        janela = por_tempo.rolling(pd.Timedelta(seconds=largura))
+        saida[f'Qtd_Transacoes_{nome}'] = janela.count().to_numpy().astype(np.int32)
+        saida[f'Soma_Valor_{nome}'] = janela.sum().to_numpy()
+        saida[f'Media_Valor_{nome}'] = saida[f'Soma_Valor_{nome}'] / saida[f'Qtd_Transacoes_{nome}']
+    return saida.loc[df.index, colunas_features(janelas)]
+
+
+def comparar(obtido, esperado):
+    pd.testing.assert_frame_equal(obtido.reset_index(drop=True), esperado.reset_index(drop=True),
+                                  check_dtype=False, rtol=1e-9, atol=1e-9)
+
+
+def transacoes_com_empates(linhas=2000, num_usuarios=30, semente=7):
+    """Transações em ordem aleatória, com ~25% das linhas repetindo o segundo de outra do mesmo usuário."""
+    rng = np.random.default_rng(semente)
+    df = pd.DataFrame({
+        'User_ID': rng.integers(0, num_usuarios, linhas).astype(str),
+        'Timestamp': gerador.INICIO_PERIODO + pd.to_timedelta(rng.integers(0, 10 * 86400, linhas), unit='s'),
+        'Transaction_Amount': np.where(rng.random(linhas) < 0.05, 0.0, rng.exponential(100, linhas).round(2)),
+        'Desempate': rng.permutation(linhas),
+    })
+    repetidas = np.flatnonzero(rng.random(linhas) < 0.25)
+    origem = df.groupby('User_ID')['Timestamp'].transform('first')
+    df.loc[repetidas, 'Timestamp'] = origem.iloc[repetidas].to_numpy()
+    return df
+
+
+def calcular(df):
+    return calcular_features_usuario(df['User_ID'], df['Timestamp'], df['Transaction_Amount'],
+                                     desempate=df['Desempate'].to_numpy())
+
+
+def test_igual_a_referencia_do_pandas():
+    df = transacoes_com_empates()
+    comparar(calcular(df), features_referencia(df))
+
+
+def test_ordem_da_entrada_nao_muda_o_resultado():
+    df = transacoes_com_empates()
+    embaralhado = df.sample(frac=1, random_state=3)
+    obtido = calcular(embaralhado).set_axis(embaralhado.index)
+    comparar(obtido.loc[df.index], calcular(df))
+
+
+def test_features_de_um_usuario_nao_dependem_dos_outros():
+    # As somas recomeçam em cada usuário: o mesmo usuário dá os mesmos bits em qualquer lote
+    df = transacoes_com_empates()
+    metade = df[df['User_ID'].astype(int) % 2 == 0]
+    obtido = calcular(metade).set_axis(metade.index)
+    pd.testing.assert_frame_equal(obtido, calcular(df).loc[metade.index], check_exact=True)
+
+
+def test_empates_no_mesmo_segundo_seguem_o_desempate():
+    instante = pd.Timestamp('2023-03-01 12:00:00')
+    df = pd.DataFrame({
+        'User_ID': ['A', 'A', 'A', 'A'],
+        'Timestamp': [instante, instante, instante, instante + pd.Timedelta(seconds=1)],
+        'Transaction_Amount': [30.0, 10.0, 20.0, 40.0],
+        'Desempate': [3, 1, 2, 4],
+    })
+    features = calcular(df)
+    # Ordem efetiva: 10 (desempate 1), 20, 30 e depois 40, um segundo mais tarde
+    assert features['Qtd_Transacoes_1h'].tolist() == [3, 1, 2, 4]
+    assert features['Soma_Valor_1h'].tolist() == [60.0, 10.0, 30.0, 100.0]
+    np.testing.assert_array_equal(features['Segundos_Desde_Ultima'], [0.0, np.nan, 0.0, 1.0])
+    np.testing.assert_allclose(features['Valor_Relativo_Media'], [30 / 15, np.nan, 20 / 10, 40 / 20])
+
+
+def test_janela_exclui_a_borda_inferior():
+    inicio = pd.Timestamp('2023-03-01 12:00:00')
+    df = pd.DataFrame({
+        'User_ID': ['A', 'A', 'B', 'B'],
+        'Timestamp': [inicio, inicio + pd.Timedelta(seconds=3600), inicio, inicio + pd.Timedelta(seconds=3599)],
+        'Transaction_Amount': [1.0, 2.0, 1.0, 2.0],
+        'Desempate': [1, 2, 3, 4],
+    })
+    # Janela (t - 1h, t]: exatamente 1h depois a primeira transação já saiu
+    assert calcular(df)['Qtd_Transacoes_1h'].tolist() == [1, 1, 1, 2]
+
+
+# --- FEATURES GRAVADAS PELO ETL ---
+
+def features_do_banco(caminho):
+    colunas = ", ".join(f'"{col}"' for col in colunas_features())
+    return ler_tabela(
+        caminho, f"SELECT Transaction_ID, User_ID, Timestamp, Transaction_Amount, {colunas} FROM {etl.NOME_TABELA_DESTINO}"
+    ).set_index('Transaction_ID').sort_index()
+
+
+def referencia_do_banco(tabela):
+    """Referência sobre as linhas finais da tabela de destino, com o desempate que o ETL usa (hash do Transaction_ID)."""
+    df = pd.DataFrame({
+        'User_ID': tabela['User_ID'],
+        'Timestamp': pd.to_datetime(tabela['Timestamp'], format='ISO8601'),
+        'Transaction_Amount': tabela['Transaction_Amount'],
+        'Desempate': pd.util.hash_pandas_object(tabela.index.to_series(), index=False).to_numpy(),
+    }, index=tabela.index)
+    return features_referencia(df)
+
+
+def linhas_atrasadas(caminho):
+    """
+    Lote que chega depois da primeira carga: transações antigas (fora de ordem) de usuários já
+    carregados, metade delas no mesmo segundo de uma transação existente, e a correção do valor
+    de uma transação já carregada (mesmo Transaction_ID).
+    """
+    origem = ler_tabela(caminho, f"SELECT * FROM {etl.NOME_TABELA_ORIGEM}")
+    atrasadas = origem.sample(200, random_state=11).reset_index(drop=True)
+    atrasadas['Transaction_ID'] = [f'TXN_ATRASADA_{i}' for i in range(len(atrasadas))]
+    deslocadas = atrasadas.index % 2 == 1
+    atrasadas.loc[deslocadas, 'Timestamp'] = (
+        pd.to_datetime(atrasadas.loc[deslocadas, 'Timestamp']) - pd.Timedelta(days=30)
+    ).dt.strftime('%Y-%m-%d %H:%M:%S')
+    correcao = origem.iloc[[100]].copy()
+    correcao['Transaction_Amount'] = correcao['Transaction_Amount'] * 3 + 1
+    return pd.concat([atrasadas, correcao], ignore_index=True)
+
+
+@pytest.mark.parametrize('chunksize', [None, 400])
+def test_etl_incremental_com_linhas_atrasadas(banco, tmp_path, chunksize):
+    rodar_etl(banco, full_refresh=True, chunksize=chunksize)
+    inserir_origem(banco, linhas_atrasadas(banco))
+    rodar_etl(banco, chunksize=chunksize)
+    completo = copiar_banco(banco, tmp_path / 'completo.db')
+    rodar_etl(completo, full_refresh=True, chunksize=chunksize)
+
+    incremental = features_do_banco(banco)
+    assert len(incremental) == 3200
+    assert incremental.loc['TXN_100', 'Transaction_Amount'] == ler_tabela(
+        banco, f"SELECT Transaction_Amount FROM {etl.NOME_TABELA_ORIGEM} WHERE Transaction_ID = 'TXN_100'"
+    )['Transaction_Amount'].iloc[-1]
+    comparar(incremental[colunas_features()], referencia_do_banco(incremental))
+    # Incremental (só os usuários afetados) e full refresh gravam exatamente os mesmos valores
+    pd.testing.assert_frame_equal(incremental, features_do_banco(completo), check_exact=True)
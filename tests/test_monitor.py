@@ -0,0 +1,30 @@
+# tests/test_monitor.py
+import asyncio
+import json
+
+import monitor
+
+
+def test_seguir_arquivo_ignora_linhas_que_nao_sao_objetos(tmp_path, capsys):
+    caminho = tmp_path / 'eventos.jsonl'
+    validos = [{'User_ID': 'U1', 'Timestamp': 10.0, 'Falhas': 1}, {'User_ID': 'U2', 'Timestamp': 20.0, 'Falhas': 2}]
+    caminho.write_text('\n'.join([
+        json.dumps(validos[0]),
+        '[1, 2]', '42', '"texto"', 'null', 'não é JSON',
+        json.dumps({'User_ID': 'U1', 'Timestamp': [1]}),
+        json.dumps({'User_ID': 'U1', 'Timestamp': 1.0, 'Falhas': {}}),
+        json.dumps(validos[1]),
+    ]) + '\n', encoding='utf-8')
+
+    async def ler(quantidade):
+        fila = asyncio.Queue()
+        tarefa = asyncio.create_task(monitor.seguir_arquivo(fila, caminho, do_inicio=True))
+        eventos = [await asyncio.wait_for(fila.get(), 5) for _ in range(quantidade)]
+        # A tarefa continua seguindo o arquivo depois das linhas inválidas
+        assert not tarefa.done()
+        tarefa.cancel()
+        return eventos
+
+    eventos = asyncio.run(ler(len(validos)))
+    assert [evento[:4] for evento in eventos] == [('U1', 10.0, None, 1), ('U2', 20.0, None, 2)]
+    assert capsys.readouterr().out.count('AVISO: evento inválido ignorado') == 7
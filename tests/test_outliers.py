@@ -0,0 +1,163 @@
+# tests/test_outliers.py
+import numpy as np
+import pandas as pd
+import pytest
+
+import etl
+import gerador
+from conftest import copiar_banco, inserir_origem, ler_tabela, rodar_etl
+from func import outliers as motor_outliers
+
+
+def dados_de_teste(linhas=5000, semente=3):
+    """Colunas com formas diferentes: assimétrica, normal, com NaN e com mais da metade dos valores iguais (MAD zero)."""
+    rng = np.random.default_rng(semente)
+    df = pd.DataFrame({
+        'Valor': rng.exponential(100, linhas),
+        'Normal': rng.normal(50, 10, linhas),
+        'Com_Nulos': rng.normal(0, 1, linhas),
+        'Constante': np.where(rng.random(linhas) < 0.7, 2.0, rng.normal(2, 5, linhas)),
+        'Segmento': rng.choice(['POS', 'Online', 'ATM'], linhas),
+    })
+    df.loc[rng.random(linhas) < 0.1, 'Com_Nulos'] = np.nan
+    return df
+
+
+COLUNAS = ['Valor', 'Normal', 'Com_Nulos', 'Constante']
+
+
+def limites_referencia(serie):
+    """Limites de uma coluna calculados direto com pandas (quantis lineares, NaN ignorado)."""
+    serie = serie.dropna()
+    q1, mediana, q3 = serie.quantile([0.25, 0.5, 0.75])
+    desvios = (serie - mediana).abs()
+    mad = desvios.median()
+    escala = mad / motor_outliers.CONSTANTE_Z_ROBUSTO if mad > 0 else motor_outliers.CONSTANTE_DESVIO_MEDIO * desvios.mean()
+    raio = motor_outliers.LIMITE_Z_ROBUSTO * escala
+    return {
+        'Linhas': len(serie), 'Q1': q1, 'Mediana': mediana, 'Q3': q3, 'IQR': q3 - q1, 'MAD': mad,
+        'Limite_Inferior_IQR': q1 - motor_outliers.FATOR_IQR * (q3 - q1),
+        'Limite_Superior_IQR': q3 + motor_outliers.FATOR_IQR * (q3 - q1),
+        'Limite_Inferior_MAD': mediana - raio, 'Limite_Superior_MAD': mediana + raio,
+        'Limite_Inferior_Percentil': serie.quantile(motor_outliers.PERCENTIS_CORTE[0]),
+        'Limite_Superior_Percentil': serie.quantile(motor_outliers.PERCENTIS_CORTE[1]),
+    }
+
+
+def comparar_limites(limites, df, segmento=motor_outliers.SEGMENTO_GLOBAL):
+    for coluna in COLUNAS:
+        linha = limites[(limites['Segmento'] == segmento) & (limites['Coluna'] == coluna)].iloc[0]
+        for nome, esperado in limites_referencia(df[coluna]).items():
+            if nome == 'Linhas':
+                continue  # 'Linhas' conta as linhas do segmento, inclusive as com NaN
+            assert linha[nome] == pytest.approx(esperado, rel=1e-12, abs=1e-12), (segmento, coluna, nome)
+
+
+def test_limites_iguais_aos_do_pandas():
+    df = dados_de_teste()
+    limites = motor_outliers.calcular_limites(df[COLUNAS].to_numpy(), COLUNAS)
+    assert limites['Bit'].tolist() == list(range(len(COLUNAS)))
+    assert (limites['Linhas'] == len(df)).all()
+    comparar_limites(limites, df)
+    # Mais da metade dos valores iguais: a escala do z robusto vem do desvio absoluto médio
+    assert limites.set_index('Coluna').loc['Constante', 'MAD'] == 0
+
+
+def test_limites_por_segmento_iguais_aos_do_groupby():
+    df = dados_de_teste()
+    limites = motor_outliers.calcular_limites(df[COLUNAS].to_numpy(), COLUNAS, df['Segmento'].to_numpy())
+    assert sorted(limites['Segmento'].unique()) == ['ATM', 'Online', 'POS']
+    for segmento, grupo in df.groupby('Segmento'):
+        comparar_limites(limites, grupo, segmento)
+
+
+@pytest.mark.parametrize('por_segmento', [False, True])
+def test_mascaras_iguais_as_comparacoes_do_pandas(por_segmento):
+    df = dados_de_teste()
+    segmentos = df['Segmento'].to_numpy() if por_segmento else None
+    limites = motor_outliers.calcular_limites(df[COLUNAS].to_numpy(), COLUNAS, segmentos)
+    # Uma linha de segmento desconhecido não é marcada
+    novos = pd.concat([df, df.iloc[[0]].assign(Segmento='Outro', Valor=1e9)], ignore_index=True)
+    mascaras = motor_outliers.marcar_outliers(novos[COLUNAS].to_numpy(), limites,
+                                              novos['Segmento'].to_numpy() if por_segmento else None)
+
+    limites_por_linha = (limites.set_index(['Segmento', 'Coluna']) if por_segmento
+                         else limites.drop(columns='Segmento').set_index('Coluna'))
+    for metodo, mascara in mascaras.items():
+        assert mascara.dtype == np.int64
+        inferior, superior = (motor_outliers.coluna_limite(metodo, lado) for lado in ('Inferior', 'Superior'))
+        for bit, coluna in enumerate(COLUNAS):
+            if por_segmento:
+                chaves = pd.MultiIndex.from_arrays([novos['Segmento'], np.repeat(coluna, len(novos))])
+                cercas = limites_por_linha.reindex(chaves)[[inferior, superior]].to_numpy()
+            else:
+                cercas = np.tile(limites_por_linha.loc[coluna, [inferior, superior]].to_numpy(dtype=float), (len(novos), 1))
+            # Comparação com NaN (valor ou limite) é falsa: NaN nunca é marcado
+            esperado = (novos[coluna].to_numpy() < cercas[:, 0]) | (novos[coluna].to_numpy() > cercas[:, 1])
+            np.testing.assert_array_equal((mascara >> bit) & 1, esperado.astype(np.int64), err_msg=f"{metodo} {coluna}")
+        # Valor = 1e9 está fora de todos os limites globais; no segmento desconhecido não é marcado
+        assert mascara[-1] & 1 == (0 if por_segmento else 1)
+        contagem = motor_outliers.contar_outliers(mascara, len(COLUNAS))
+        np.testing.assert_array_equal(contagem, [((mascara >> bit) & 1).sum() for bit in range(len(COLUNAS))])
+
+
+def test_mais_colunas_que_bits_da_mascara():
+    colunas = [f'c{i}' for i in range(motor_outliers.MAX_COLUNAS + 1)]
+    with pytest.raises(ValueError):
+        motor_outliers.calcular_limites(np.zeros((3, len(colunas))), colunas)
+
+
+# --- MÁSCARAS GRAVADAS PELO ETL ---
+
+def estado_outliers(caminho):
+    """(limites publicados, DataFrame com as colunas avaliadas e as máscaras de cada linha)."""
+    limites = ler_tabela(caminho, f"SELECT * FROM {etl.NOME_TABELA_OUTLIERS}")
+    colunas = limites.drop_duplicates('Coluna').sort_values('Bit')['Coluna'].tolist()
+    selecao = ", ".join(f'"{col}"' for col in ['Transaction_ID', *colunas, *motor_outliers.COLUNAS_FLAGS.values()])
+    linhas = ler_tabela(caminho, f"SELECT {selecao} FROM {etl.NOME_TABELA_DESTINO}").set_index('Transaction_ID').sort_index()
+    return limites, linhas
+
+
+def conferir_mascaras(caminho):
+    """As máscaras gravadas pelo UPDATE em SQL são as que o motor calcula com os limites publicados."""
+    limites, linhas = estado_outliers(caminho)
+    colunas = limites.drop_duplicates('Coluna').sort_values('Bit')['Coluna'].tolist()
+    esperadas = motor_outliers.marcar_outliers(linhas[colunas].to_numpy(dtype=np.float64), limites)
+    for metodo, mascara in motor_outliers.COLUNAS_FLAGS.items():
+        np.testing.assert_array_equal(linhas[mascara].to_numpy(), esperadas[metodo], err_msg=mascara)
+    return limites, linhas
+
+
+def test_etl_completo_e_streaming_gravam_as_mesmas_mascaras(banco, tmp_path):
+    streaming = copiar_banco(banco, tmp_path / 'streaming.db')
+    rodar_etl(banco, full_refresh=True)
+    rodar_etl(streaming, full_refresh=True, chunksize=400)
+    limites, linhas = conferir_mascaras(banco)
+    limites_streaming, linhas_streaming = conferir_mascaras(streaming)
+    assert limites['Linhas_Base'].iloc[0] == 3000
+    pd.testing.assert_frame_equal(linhas, linhas_streaming)
+    pd.testing.assert_frame_equal(limites.drop(columns='Calculado_Em'), limites_streaming.drop(columns='Calculado_Em'))
+
+
+def test_etl_incremental_recalcula_limites_quando_a_tabela_cresce(banco, tmp_path):
+    rodar_etl(banco, full_refresh=True)
+    limites_iniciais, _ = estado_outliers(banco)
+
+    # +100 linhas (3,3%): abaixo de FRACAO_RECALCULO_OUTLIERS, os limites publicados continuam valendo
+    inserir_origem(banco, gerador.gerar_lote(3000, 100, 60, semente=2, timestamp_texto=True))
+    rodar_etl(banco)
+    limites, _ = conferir_mascaras(banco)
+    pd.testing.assert_frame_equal(limites.drop(columns=['Linhas', 'Qtd_Outliers_IQR', 'Qtd_Outliers_MAD', 'Qtd_Outliers_Percentil']),
+                                  limites_iniciais.drop(columns=['Linhas', 'Qtd_Outliers_IQR', 'Qtd_Outliers_MAD', 'Qtd_Outliers_Percentil']))
+    assert (limites['Linhas'] == 3100).all()
+
+    # +100 linhas (6,7% sobre a base): limites recalculados com a tabela inteira, iguais aos de um full refresh
+    inserir_origem(banco, gerador.gerar_lote(3100, 100, 60, semente=2, timestamp_texto=True))
+    rodar_etl(banco)
+    limites, _ = conferir_mascaras(banco)
+    assert limites['Linhas_Base'].iloc[0] == 3200
+    completo = copiar_banco(banco, tmp_path / 'completo.db')
+    rodar_etl(completo, full_refresh=True)
+    limites_completo, _ = conferir_mascaras(completo)
+    pd.testing.assert_frame_equal(limites.drop(columns='Calculado_Em'), limites_completo.drop(columns='Calculado_Em'),
+                                  check_exact=False, rtol=1e-12)
@@ -0,0 +1,92 @@
+# tests/test_pontuacao.py
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+import etl
+from conftest import ler_tabela, rodar_etl
+from func.features import colunas_features
+from func.modelo import RegistroModelos, preparar_dados_para_modelo
+from func.pontuacao import LoteadorPontuacao, Pontuador, RegistroInvalido
+from servidor_pontuacao import criar_handler
+
+
+@pytest.fixture
+def cenario(banco, tmp_path):
+    """
+    Modelo treinado como o do dashboard e do 'treinar_modelo.py' (tabela analítica do ETL) e as
+    mesmas transações como chegam à API: cruas, da tabela de origem.
+    Retorna (pontuador, predict_proba do modelo na tabela analítica, analitica, crus), com as linhas
+    das duas tabelas na mesma ordem.
+    """
+    rodar_etl(banco, full_refresh=True)
+    analitica = ler_tabela(banco, f"SELECT * FROM {etl.NOME_TABELA_DESTINO} ORDER BY Transaction_ID")
+    crus = ler_tabela(banco, f"SELECT * FROM {etl.NOME_TABELA_ORIGEM} ORDER BY Transaction_ID")
+    diretorio = str(tmp_path / 'modelos')
+    registro = RegistroModelos(diretorio)
+    registro.treinar(analitica)
+    pontuador = Pontuador.carregar(diretorio)
+    # Matriz montada como no treino, com as colunas da tabela analítica
+    X, _, _ = preparar_dados_para_modelo(analitica, pontuador.codificador)
+    esperado = registro.carregar_modelo(pontuador.impressao).predict_proba(X)[:, 1]
+    return pontuador, esperado, analitica, crus
+
+
+def registros_crus_com_features_usuario(analitica, crus):
+    """O que um cliente envia: a transação crua (sem o rótulo) e as features por usuário da tabela analítica."""
+    pedidos = crus.drop(columns='Fraud_Label').copy()
+    pedidos[colunas_features()] = analitica[colunas_features()].to_numpy()
+    return pedidos
+
+
+def test_registros_crus_pontuam_como_a_tabela_analitica(cenario):
+    pontuador, esperado, analitica, crus = cenario
+    assert pontuador.derivadas == list(etl.COLUNAS_DO_TIMESTAMP)
+    pedidos = registros_crus_com_features_usuario(analitica, crus)
+    np.testing.assert_allclose(pontuador.pontuar(pedidos.to_dict('records')), esperado, atol=1e-6)
+    np.testing.assert_allclose(pontuador.pontuar(pedidos), esperado, atol=1e-6)
+
+
+def test_registros_sem_features_usuario_sao_recusados(cenario):
+    pontuador, _, _, crus = cenario
+    registros = crus.drop(columns='Fraud_Label').head(5).to_dict('records')
+    with pytest.raises(RegistroInvalido, match='features por usuário'):
+        pontuador.pontuar(registros)
+    with pytest.raises(RegistroInvalido, match='Media_Gasto_Usuario'):
+        pontuador.pontuar(crus.drop(columns='Fraud_Label'))
+
+
+def test_api_recusa_so_o_pedido_invalido(cenario):
+    pontuador, _, analitica, crus = cenario
+    pedidos = registros_crus_com_features_usuario(analitica, crus).head(3).to_dict('records')
+    loteador = LoteadorPontuacao(pontuador)
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), criar_handler(loteador, 0.5))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{servidor.server_port}"
+
+    def enviar(corpo):
+        requisicao = urllib.request.Request(f"{url}/pontuar", data=json.dumps(corpo, default=str).encode())
+        try:
+            with urllib.request.urlopen(requisicao) as resposta:
+                return resposta.status, json.loads(resposta.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    try:
+        status, resposta = enviar(pedidos)
+        assert status == 200 and len(resposta['probabilidades']) == 3
+        status, resposta = enviar(crus.drop(columns='Fraud_Label').iloc[0].to_dict())
+        assert status == 400 and 'features por usuário' in resposta['erro']
+        status, resposta = enviar({**pedidos[0], 'Timestamp': 'ontem'})
+        assert status == 400 and 'Timestamp' in resposta['erro']
+        with urllib.request.urlopen(f"{url}/saude") as resposta:
+            assert set(colunas_features()) <= set(json.loads(resposta.read())['entradas'])
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+        loteador.fechar()
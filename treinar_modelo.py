@@ -0,0 +1,44 @@
+# Arquivo: treinar_modelo.py
+import argparse
+import os
+import time
+from functools import partial
+
+from sqlalchemy import create_engine
+
+from func.modelo import DIRETORIO_MODELOS, TAMANHO_LOTE_EXTERNO, RegistroModelos, lotes_parquet, lotes_sqlite
+
+# --- CONFIGURAÇÕES ---
+DB_URL = "sqlite:///creditdata.db"
+NOME_TABELA_ANALITICA = "analytics_dashboard"
+DIRETORIO_PARQUET = "dados_parquet"
+
+# Treina o modelo de fraude em memória externa: os dados são lidos em lotes da cópia Parquet do ETL
+# (ou do banco) e nunca ficam inteiros na memória. O modelo vai para o registro em 'modelos/',
+# onde fica disponível para o dashboard (último modelo válido) e para o 'servidor_pontuacao.py'.
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Treino do modelo XGBoost em memória externa (lotes do Parquet ou do SQLite).")
+    parser.add_argument("--fonte", choices=["parquet", "sqlite"], default=None,
+                        help="Origem dos lotes (padrão: Parquet, se existir; senão a tabela analítica do banco).")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE_EXTERNO, help="Linhas por lote.")
+    parser.add_argument("--max-linhas", type=int, default=None,
+                        help="Amostragem estratificada por classe (com pesos) para treinar com ~N linhas.")
+    parser.add_argument("--modelos", default=DIRETORIO_MODELOS, help="Diretório do registro de modelos.")
+    args = parser.parse_args()
+
+    fonte = args.fonte or ("parquet" if os.path.isdir(DIRETORIO_PARQUET) else "sqlite")
+    if fonte == "parquet":
+        abrir_lotes = partial(lotes_parquet, DIRETORIO_PARQUET, args.lote)
+        descricao = os.path.abspath(DIRETORIO_PARQUET)
+    else:
+        abrir_lotes = partial(lotes_sqlite, create_engine(DB_URL), NOME_TABELA_ANALITICA, args.lote)
+        descricao = f"{DB_URL}#{NOME_TABELA_ANALITICA}"
+
+    print(f"--- Treinando em memória externa a partir de {fonte} ({descricao}) ---")
+    inicio = time.perf_counter()
+    impressao, importancias = RegistroModelos(args.modelos).treinar_externo(abrir_lotes, descricao, max_linhas=args.max_linhas)
+    treino = importancias.attrs['treino']
+    print(f"Modelo {impressao} salvo em '{args.modelos}' em {time.perf_counter() - inicio:.1f}s")
+    print(f"Linhas: {treino['linhas_treino']:,} usadas no treino de {treino['linhas_totais']:,}")
+    print(importancias.head(10).to_string(index=False))